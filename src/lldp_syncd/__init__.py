@@ -4,4 +4,10 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 logger.addHandler(logging.NullHandler())
 
-from .daemon import LldpSyncDaemon
+
+def __getattr__(name):
+    # The daemon module pulls in swsscommon and friends; only import it once it is actually needed.
+    if name == 'LldpSyncDaemon':
+        from .daemon import LldpSyncDaemon
+        return LldpSyncDaemon
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
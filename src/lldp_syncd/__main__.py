@@ -1,15 +1,34 @@
 import logging.handlers
 import sys
 
-import sonic_py_common.util
+# offline mode, usable without a SONiC environment: python -m lldp_syncd replay lldpctl.json ...
+if sys.argv[1:2] == ['replay']:
+    from .replay import main as replay_main
+    sys.exit(replay_main(sys.argv[2:]))
+# query the change history of the running daemon: python -m lldp_syncd history [INTERFACE]
+if sys.argv[1:2] == ['history']:
+    from .history import main as history_main
+    sys.exit(history_main(sys.argv[2:]))
 
 import lldp_syncd
 import sonic_syncd
 
 LOG_FORMAT = "lldp-syncd [%(name)s] %(levelname)s: %(message)s"
 
-# import command line arguments
-args = sonic_py_common.util.process_options("lldp_syncd")
+# lldp_syncd's own options (see lldp_syncd.main.DAEMON_OPTIONS), unknown to process_options
+from .main import parse_daemon_options
+try:
+    daemon_options, sys.argv[1:] = parse_daemon_options(sys.argv[1:])
+except ValueError as e:
+    sys.exit("lldp_syncd: {}".format(e))
+
+# import command line arguments. supervisord starts the daemon without options; only import the
+# parser when some are given
+if sys.argv[1:]:
+    import sonic_py_common.util
+    args = sonic_py_common.util.process_options("lldp_syncd")
+else:
+    args = {}
 
 # configure logging. If debug is specified, logs to stdout at designated level. syslog otherwise.
 log_level = args.get('log_level')
@@ -34,4 +53,4 @@ sonic_syncd.logger.handlers = lldp_syncd.logger.handlers
 #
 from .main import main
 
-main(update_frequency=args.get('update_frequency'))
+main(update_frequency=args.get('update_frequency'), **daemon_options)
@@ -1,16 +1,30 @@
 import datetime
+import itertools
 import json
+import logging
 import re
-import subprocess
 import time
 from collections import defaultdict
 
 from enum import unique, Enum
-from swsscommon.swsscommon import SonicV2Connector
 
 from sonic_syncd import SonicSyncDaemon
+from sonic_syncd.connection import DBConnectionManager, DBUnavailableError, is_connection_error
+from sonic_syncd.command import CommandRunner, DEFAULT_COMMAND_TIMEOUT
+from sonic_syncd.publisher import BatchedPublisher, DirectPublisher
+from sonic_syncd.scheduler import PRIORITY_DELETE, PRIORITY_TIME_MARK
+from sonic_syncd.shadow import ShadowTableSwap, TableSwapError
+from sonic_syncd.logutil import LazyJson, RateLimitedLogger, Truncated
 from . import logger
 from .conventions import LldpPortIdSubtype, LldpChassisIdSubtype, LldpSystemCapabilitiesMap
+from .dampening import same_content
+from .diff import CacheIndex, parsed_entry
+from .fields import FieldProjection
+from .history import ChangeHistory, HistoryServer
+from .journal import ChangeJournal, OP_DEL, OP_SET
+from .neighbor_index import NeighborIndex
+from .parallel import ParallelParser
+from .snapshot import SnapshotError, load_snapshot, save_snapshot
 
 LLDPD_TIME_FORMAT = '%H:%M:%S'
 
@@ -22,6 +36,9 @@ DEFAULT_UPDATE_INTERVAL = 10
 SONIC_ETHERNET_RE_PATTERN = r'^(Ethernet(\d+)|Ethernet-BP(\d+)|eth0)$'
 LLDPD_UPTIME_RE_SPLIT_PATTERN = r' days?, '
 
+# lldpd runs under supervisord in the lldp container
+DEFAULT_SOURCE_RESTART_CMD = ('/usr/bin/supervisorctl', 'restart', 'lldpd')
+
 
 def parse_time(time_str):
     """
@@ -52,10 +69,252 @@ def parse_time(time_str):
                                         seconds=struct_time.tm_sec)
         return int(time_delta.total_seconds())
     except ValueError:
-        logger.exception("Failed to parse lldp age {} -- ".format(time_str))
+        logger.exception("Failed to parse lldp age %s -- ", time_str)
     return 0
 
 
+def split_chassis(chassis_attributes):
+    """
+    lldpd nests the chassis attributes under the system name when the neighbor advertises one:
+    {'sys_name': {'id': ..., 'descr': ...}}, otherwise they are inline: {'id': ..., 'descr': ...}
+    :return: (sys_name, attributes)
+    """
+    # the second test guards against a system literally named 'id'
+    if 'id' in chassis_attributes and 'id' not in chassis_attributes['id']:
+        return '', chassis_attributes
+    return next(iter(chassis_attributes.items()), ('', {}))
+
+
+def _list_layout_items(interface_list):
+    # [{'if_name' : { attributes...}}, {'if_other': {...}}, ...]
+    for interface in interface_list:
+        yield from interface.items()
+
+
+def _generic_layout_items(interface_list):
+    # fallback for shapes not in INTERFACE_LAYOUTS, probing every item
+    for interface in interface_list:
+        try:
+            (if_name, if_attributes), = interface.items()
+        except AttributeError:
+            if_name = interface
+            if_attributes = interface_list[if_name]
+        yield if_name, if_attributes
+
+
+# lldpd renders a JSON array with a single element as that element, so `interface` is a list of
+# single-key dicts when there are several neighbors and a dict keyed by name when there is just one.
+# The layout is looked up once per dump and walked by a parser without per-item probing.
+INTERFACE_LAYOUTS = {
+    list: _list_layout_items,
+    dict: dict.items,
+}
+
+
+@unique
+class PortIdSubtypeMap(int, Enum):
+    """
+    This class follows the 802.1AB TEXTUAL-CONVENTION for mapping LLDP subtypes to integers (enum).
+    `lldpd` does this as well.  This avoids using regex to parse `lldpd` data.
+
+    From lldpd / src / lib / atoms / port.c:
+    static lldpctl_map_t port_id_subtype_map[] = {
+        { LLDP_PORTID_SUBTYPE_IFNAME,   "ifname"},
+        { LLDP_PORTID_SUBTYPE_IFALIAS,  "ifalias" },
+        { LLDP_PORTID_SUBTYPE_LOCAL,    "local" },
+        { LLDP_PORTID_SUBTYPE_LLADDR,   "mac" },
+        { LLDP_PORTID_SUBTYPE_ADDR,     "ip" },
+        { LLDP_PORTID_SUBTYPE_PORT,     "unhandled" },
+        { LLDP_PORTID_SUBTYPE_AGENTCID, "unhandled" },
+        { 0, NULL},
+    };
+    """
+    ifalias = int(LldpPortIdSubtype.interfaceAlias)
+    # port =  LldpPortIdSubtype.portComponent # (unsupported by lldpd)
+    mac = int(LldpPortIdSubtype.macAddress)
+    ip = int(LldpPortIdSubtype.networkAddress)
+    ifname = int(LldpPortIdSubtype.interfaceName)
+    # agentcircuitid = int(LldpPortIdSubtype.agentCircuitId) # (unsupported by lldpd)
+    local = int(LldpPortIdSubtype.local)
+
+
+@unique
+class ChassisIdSubtypeMap(int, Enum):
+    """
+    This class follows the 802.1AB TEXTUAL-CONVENTION for mapping LLDP subtypes to integers (enum).
+    `lldpd` does this as well.  This avoids using regex to parse `lldpd` data.
+
+    From lldpd / src / lib / atoms / chassis.c:
+    static lldpctl_map_t chassis_id_subtype_map[] = {
+        { LLDP_CHASSISID_SUBTYPE_IFNAME,  "ifname"},
+        { LLDP_CHASSISID_SUBTYPE_IFALIAS, "ifalias" },
+        { LLDP_CHASSISID_SUBTYPE_LOCAL,   "local" },
+        { LLDP_CHASSISID_SUBTYPE_LLADDR,  "mac" },
+        { LLDP_CHASSISID_SUBTYPE_ADDR,    "ip" },
+        { LLDP_CHASSISID_SUBTYPE_PORT,    "unhandled" },
+        { LLDP_CHASSISID_SUBTYPE_CHASSIS, "unhandled" },
+        { 0, NULL},
+    };
+    """
+    ifname = int(LldpChassisIdSubtype.interfaceName)
+    ifalias = int(LldpChassisIdSubtype.interfaceAlias)
+    # port =  int(LldpChassisIdSubtype.portComponent) # (unsupported by lldpd)
+    mac = int(LldpChassisIdSubtype.macAddress)
+    ip = int(LldpChassisIdSubtype.networkAddress)
+    # chassis = int(LldpChassisIdSubtype.chassisComponent) # (unsupported by lldpd)
+    local = int(LldpPortIdSubtype.local)
+
+
+def interface_items(interface_list):
+    """
+    :param interface_list: the `interface` member of an lldpctl dump
+    :return: iterator of (interface name, lldpd attributes)
+    """
+    return INTERFACE_LAYOUTS.get(type(interface_list), _generic_layout_items)(interface_list)
+
+
+# The parsers below are plain functions so that parse workers (see lldp_syncd.parallel) run them
+# without a daemon instance; `rate_limited_log` is a sonic_syncd.logutil.RateLimitedLogger.
+
+def get_sys_capability_list(if_attributes, if_name, chassis_id, rate_limited_log):
+    """
+    Get a list of capabilities from interface attributes dictionary.
+    :param if_attributes: interface attributes
+    :return: list of capabilities
+    """
+    chassis_attributes = if_attributes.get('chassis')
+    if chassis_attributes is None:
+        rate_limited_log.info(if_name, "Failed to get system capabilities on %s (%s)", if_name, chassis_id)
+        return []
+    _, attributes = split_chassis(chassis_attributes)
+    return chassis_capabilities(attributes, if_name, chassis_id, rate_limited_log)
+
+
+def chassis_capabilities(attributes, if_name, chassis_id, rate_limited_log):
+    """
+    Get a list of capabilities from chassis attributes, as returned by `split_chassis`.
+    """
+    # [{'enabled': ..., 'type': 'capability1'}, {'enabled': ..., 'type': 'capability2'}]
+    capability_list = attributes.get('capability')
+    if capability_list is None:
+        rate_limited_log.info(if_name, "Failed to get system capabilities on %s (%s)", if_name, chassis_id)
+        return []
+    # {'enabled': ..., 'type': 'capability'}
+    if isinstance(capability_list, dict):
+        return [capability_list]
+    return capability_list
+
+
+def parse_sys_capabilities(capability_list, enabled=False):
+    """
+    Get a bit map of capabilities, accoding to textual convention.
+    :param capability_list: list of capabilities
+    :param enabled: if true, consider only the enabled capabilities
+    :return: string representing a bit map
+    """
+    # chassis is incomplete, missing capabilities
+    if not capability_list:
+        return ""
+
+    sys_cap = 0x00
+    for capability in capability_list:
+        try:
+            if (not enabled) or capability["enabled"]:
+                sys_cap |= 128 >> LldpSystemCapabilitiesMap[capability["type"].lower()]
+        except KeyError:
+            logger.debug("Unknown capability %s", capability["type"])
+    return "%0.2X 00" % sys_cap
+
+
+def parse_split_chassis(chassis, chassis_attributes):
+    """
+    :param chassis: (sys_name, attributes) as returned by `split_chassis`
+    :param chassis_attributes: the unsplit attributes, for error reporting
+    """
+    try:
+        sys_name, attributes = chassis
+        id_attributes = attributes['id']
+        chassis_id_subtype = str(ChassisIdSubtypeMap[id_attributes['type']].value)
+        chassis_id = id_attributes.get('value', '')
+        descr = attributes.get('descr', '')
+        mgmt_ip = attributes.get('mgmt-ip', '')
+        if isinstance(mgmt_ip, list):
+            mgmt_ip = ','.join(mgmt_ip)
+    except (KeyError, ValueError):
+        logger.exception("Could not infer system information from: %s",
+                         Truncated(chassis_attributes))
+        chassis_id_subtype = chassis_id = sys_name = descr = mgmt_ip = ''
+
+    return (chassis_id_subtype,
+            chassis_id,
+            sys_name,
+            descr,
+            mgmt_ip,
+            )
+
+
+def parse_port(port_attributes):
+    port_identifiers = port_attributes.get('id')
+    try:
+        subtype = str(PortIdSubtypeMap[port_identifiers['type']].value)
+        value = port_identifiers['value']
+
+    except ValueError:
+        logger.exception("Could not infer chassis subtype from: %s", Truncated(port_attributes))
+        subtype, value = None
+
+    return (subtype,
+            value,
+            port_attributes.get('descr', ''),
+            )
+
+
+def parse_interface(if_name, if_attributes, projection, rate_limited_log):
+    """
+    Extract the projected fields of one remote interface.
+    :param if_name: local interface name
+    :param if_attributes: lldpd attributes of the interface
+    :param projection: FieldProjection selecting the fields
+    :return: list of (field, value) pairs
+    """
+    parsed = []
+    chassis_id = ''
+    # split once, shared by the chassis and capability fields
+    chassis = split_chassis(if_attributes['chassis']) if 'chassis' in if_attributes else None
+
+    if projection.port_keys and 'port' in if_attributes:
+        parsed.extend(projection.project(projection.port_keys, parse_port(if_attributes['port'])))
+
+    if projection.chassis_keys and chassis is not None:
+        parsed_chassis = parse_split_chassis(chassis, if_attributes['chassis'])
+        parsed.extend(projection.project(projection.chassis_keys, parsed_chassis))
+        chassis_id = parsed_chassis[1]
+
+    if projection.index:
+        # lldpRemIndex
+        parsed.append(('lldp_rem_index', str(if_attributes.get('rid'))))
+
+    if projection.sys_cap_keys:
+        if chassis is not None:
+            capability_list = chassis_capabilities(chassis[1], if_name, chassis_id, rate_limited_log)
+        else:
+            capability_list = get_sys_capability_list(if_attributes, if_name, chassis_id, rate_limited_log)
+        # lldpSysCapSupported, lldpSysCapEnabled
+        parsed.extend(projection.project(projection.sys_cap_keys,
+                                         (parse_sys_capabilities(capability_list),
+                                          parse_sys_capabilities(capability_list, enabled=True))))
+
+    for field, extractor in projection.extractors:
+        parsed.append((field, extractor(if_attributes)))
+
+    if projection.time_mark:
+        # lldpRemTimeMark           TimeFilter,
+        # last, so that parsed_entry slices it off the content
+        parsed.append(('lldp_rem_time_mark', str(parse_time(if_attributes.get('age')))))
+
+    return parsed
+
+
 class LldpSyncDaemon(SonicSyncDaemon):
     """
     This script uploads lldp information to Redis DB.
@@ -64,139 +323,181 @@ class LldpSyncDaemon(SonicSyncDaemon):
     """
     LLDP_ENTRY_TABLE = 'LLDP_ENTRY_TABLE'
     LLDP_LOC_CHASSIS_TABLE = 'LLDP_LOC_CHASSIS'
+    LLDP_ENTRY_FRESHNESS_TABLE = 'LLDP_ENTRY_FRESHNESS'
 
-    @unique
-    class PortIdSubtypeMap(int, Enum):
-        """
-        This class follows the 802.1AB TEXTUAL-CONVENTION for mapping LLDP subtypes to integers (enum).
-        `lldpd` does this as well.  This avoids using regex to parse `lldpd` data.
-
-        From lldpd / src / lib / atoms / port.c:
-        static lldpctl_map_t port_id_subtype_map[] = {
-            { LLDP_PORTID_SUBTYPE_IFNAME,   "ifname"},
-            { LLDP_PORTID_SUBTYPE_IFALIAS,  "ifalias" },
-            { LLDP_PORTID_SUBTYPE_LOCAL,    "local" },
-            { LLDP_PORTID_SUBTYPE_LLADDR,   "mac" },
-            { LLDP_PORTID_SUBTYPE_ADDR,     "ip" },
-            { LLDP_PORTID_SUBTYPE_PORT,     "unhandled" },
-            { LLDP_PORTID_SUBTYPE_AGENTCID, "unhandled" },
-            { 0, NULL},
-        };
-        """
-        ifalias = int(LldpPortIdSubtype.interfaceAlias)
-        # port =  LldpPortIdSubtype.portComponent # (unsupported by lldpd)
-        mac = int(LldpPortIdSubtype.macAddress)
-        ip = int(LldpPortIdSubtype.networkAddress)
-        ifname = int(LldpPortIdSubtype.interfaceName)
-        # agentcircuitid = int(LldpPortIdSubtype.agentCircuitId) # (unsupported by lldpd)
-        local = int(LldpPortIdSubtype.local)
-
-    @unique
-    class ChassisIdSubtypeMap(int, Enum):
-        """
-        This class follows the 802.1AB TEXTUAL-CONVENTION for mapping LLDP subtypes to integers (enum).
-        `lldpd` does this as well.  This avoids using regex to parse `lldpd` data.
-
-        From lldpd / src / lib / atoms / chassis.c:
-        static lldpctl_map_t chassis_id_subtype_map[] = {
-            { LLDP_CHASSISID_SUBTYPE_IFNAME,  "ifname"},
-            { LLDP_CHASSISID_SUBTYPE_IFALIAS, "ifalias" },
-            { LLDP_CHASSISID_SUBTYPE_LOCAL,   "local" },
-            { LLDP_CHASSISID_SUBTYPE_LLADDR,  "mac" },
-            { LLDP_CHASSISID_SUBTYPE_ADDR,    "ip" },
-            { LLDP_CHASSISID_SUBTYPE_PORT,    "unhandled" },
-            { LLDP_CHASSISID_SUBTYPE_CHASSIS, "unhandled" },
-            { 0, NULL},
-        };
-        """
-        ifname = int(LldpChassisIdSubtype.interfaceName)
-        ifalias = int(LldpChassisIdSubtype.interfaceAlias)
-        # port =  int(LldpChassisIdSubtype.portComponent) # (unsupported by lldpd)
-        mac = int(LldpChassisIdSubtype.macAddress)
-        ip = int(LldpChassisIdSubtype.networkAddress)
-        # chassis = int(LldpChassisIdSubtype.chassisComponent) # (unsupported by lldpd)
-        local = int(LldpPortIdSubtype.local)
+    PortIdSubtypeMap = PortIdSubtypeMap
+    ChassisIdSubtypeMap = ChassisIdSubtypeMap
 
     def get_sys_capability_list(self, if_attributes, if_name, chassis_id):
-        """
-        Get a list of capabilities from interface attributes dictionary.
-        :param if_attributes: interface attributes
-        :return: list of capabilities
-        """
-        try:
-            # [{'enabled': ..., 'type': 'capability1'}, {'enabled': ..., 'type': 'capability2'}]
-            if 'capability' in if_attributes['chassis']:
-                capability_list = if_attributes['chassis']['capability']
-            else:
-                capability_list = list(if_attributes['chassis'].values())[0]['capability']
-            # {'enabled': ..., 'type': 'capability'}
-            if isinstance(capability_list, dict):
-                capability_list = [capability_list]
-        except KeyError:
-            logger.info("Failed to get system capabilities on {} ({})".format(if_name, chassis_id))
-            return []
-        return capability_list
+        return get_sys_capability_list(if_attributes, if_name, chassis_id, self._rate_limited_log)
+
+    def chassis_capabilities(self, attributes, if_name, chassis_id):
+        return chassis_capabilities(attributes, if_name, chassis_id, self._rate_limited_log)
 
     def parse_sys_capabilities(self, capability_list, enabled=False):
+        return parse_sys_capabilities(capability_list, enabled)
+
+    def __init__(self, update_interval=None, dampener=None, journal_size=0, neighbor_index=False,
+                 fields=None, command_timeout=DEFAULT_COMMAND_TIMEOUT, snapshot_path=None, connection=None,
+                 publisher=None, event_source=None, write_scheduler=None, parse_processes=0,
+                 table_swap_threshold=0, freshness_slo=0, source_restart_cmd=DEFAULT_SOURCE_RESTART_CMD,
+                 history_size=0, history_socket=None, batch_writes=False):
+        """
+        :param update_interval: polling interval (in seconds)
+        :param dampener: optional NeighborDampener applied to each parsed update before it is synced
+        :param journal_size: number of generations kept in the LLDP_ENTRY_TABLE change journal (0 disables it)
+        :param neighbor_index: maintain reverse indexes by remote chassis ID and management address
+        :param fields: LLDP_ENTRY_TABLE fields to parse and publish (see lldp_syncd.fields)
+        :param command_timeout: time (in seconds) lldpctl/lldpcli may run before being killed
+        :param snapshot_path: file to checkpoint the parsed caches to, and to restore them from on start-up
+        :param connection: sonic_syncd.connection.DBConnectionManager for APPL_DB
+        :param publisher: LLDP_ENTRY_TABLE publishing backend (see sonic_syncd.publisher); by default
+                          writes go directly through the APPL_DB connection. It must write the LLDP_ENTRY_TABLE:*
+                          keys themselves, which snapshot restore and the stale entry cleanup read back
+        :param event_source: optional port oper-status event source (see sonic_syncd.events); neighbors of a
+                             port that goes down are withdrawn immediately and kept out until it is up again
+        :param write_scheduler: optional sonic_syncd.scheduler.WriteScheduler rate-limiting LLDP_ENTRY_TABLE writes
+        :param parse_processes: parse large dumps in a pool of this many processes (0 disables parallel parsing)
+        :param table_swap_threshold: publish full resyncs, and cycles rewriting at least this many entries, by
+                                     atomically swapping in a shadow copy of LLDP_ENTRY_TABLE (0 disables it)
+        :param freshness_slo: maximum age (in seconds) of LLDP_ENTRY_TABLE before the watchdog escalates; when set,
+                              freshness is also published to LLDP_ENTRY_FRESHNESS (0 disables both)
+        :param source_restart_cmd: command restarting lldpd when it stops delivering
+        :param history_size: number of LLDP_ENTRY_TABLE change events kept in memory (0 disables the history); the
+                             per-change log lines are then only logged at debug level
+        :param history_socket: Unix socket path on which the change history is served (see lldp_syncd.history)
+        :param batch_writes: write the LLDP_ENTRY_TABLE changes of a cycle in one round trip, through
+                             sonic_syncd.publisher.BatchedPublisher, instead of one command each
         """
-        Get a bit map of capabilities, accoding to textual convention.
-        :param capability_list: list of capabilities
-        :param enabled: if true, consider only the enabled capabilities
-        :return: string representing a bit map
-        """
-        # chassis is incomplete, missing capabilities
-        if not capability_list:
-            return ""
-
-        sys_cap = 0x00
-        for capability in capability_list:
-            try:
-                if (not enabled) or capability["enabled"]:
-                    sys_cap |= 128 >> LldpSystemCapabilitiesMap[capability["type"].lower()]
-            except KeyError:
-                logger.debug("Unknown capability {}".format(capability["type"]))
-        return "%0.2X 00" % sys_cap
-
-    def __init__(self, update_interval=None):
-        super(LldpSyncDaemon, self).__init__()
+        super(LldpSyncDaemon, self).__init__(event_source=event_source, freshness_slo=freshness_slo)
+        self.source_restart_cmd = list(source_restart_cmd)
         self._update_interval = update_interval or DEFAULT_UPDATE_INTERVAL
-        self.db_connector = SonicV2Connector()
-        self.db_connector.connect(self.db_connector.APPL_DB)
+        self.connection = connection or DBConnectionManager('APPL_DB')
+        if table_swap_threshold and (publisher is not None or write_scheduler is not None):
+            raise ValueError("table swaps write APPL_DB directly and cannot be combined with a publisher "
+                             "or write scheduler")
+        if batch_writes and publisher is not None:
+            raise ValueError("batch_writes selects the publisher and cannot be combined with one")
+        publisher_class = BatchedPublisher if batch_writes else DirectPublisher
+        self.publisher = publisher or publisher_class(LldpSyncDaemon.LLDP_ENTRY_TABLE, self.connection.get)
+        self.table_swap = ShadowTableSwap(LldpSyncDaemon.LLDP_ENTRY_TABLE) if table_swap_threshold else None
+        self.table_swap_threshold = table_swap_threshold
+        self.write_scheduler = write_scheduler
+        if write_scheduler is not None:
+            write_scheduler.attach(self.publisher, self._on_writes_applied)
+            self.publisher = write_scheduler
+        self.connection.on_reconnect = self.request_full_resync
+        self._full_resync_pending = False
+        self.command_runner = CommandRunner(command_timeout)
+        # True while the last lldpctl run failed, i.e. APPL_DB reflects an older dump
+        self.source_stale = False
+        self.source_stats = {'runs': 0, 'failures': 0, 'timeouts': 0,
+                             'last_duration': 0.0, 'max_duration': 0.0, 'last_success': None}
 
         self.chassis_cache = {}
         self.interfaces_cache = {}
+        self.cache_index = CacheIndex()
+        self.projection = FieldProjection(fields)
+        self.parallel_parser = ParallelParser(fields, parse_processes) if parse_processes else None
+        self.dampener = dampener
+        self.journal = ChangeJournal(journal_size) if journal_size else None
+        self.neighbor_index = NeighborIndex() if neighbor_index else None
+        self.history = ChangeHistory(history_size) if history_size else None
+        self.history_server = HistoryServer(self.history, history_socket) if history_size and history_socket else None
+        # the history records every change, making the per-change log lines redundant
+        self._change_log_level = logging.DEBUG if self.history is not None else logging.INFO
+        self.snapshot_path = snapshot_path
+        self._snapshot_restored = False
+        self._snapshot_dirty = False
+        self._rate_limited_log = RateLimitedLogger(logger)
+        # ports reported oper down by the event source
+        self.oper_down = set()
+        # set after the first full sync; partial refreshes are merged into its result
+        self._synced = False
+        # total time spent diffing updates against the cache, for profiling (see lldp_syncd.replay)
+        self.diff_seconds = 0.0
+
+    def connect(self):
+        """
+        Connect to APPL_DB. Called from `run` concurrently with the first lldpctl scrape, or lazily on
+        first use of `db_connector`.
+        """
+        self.connection.get()
 
-    @staticmethod
-    def _scrap_output(cmd):
-        try:
-            # execute the subprocess command
-            lldpctl_output = subprocess.check_output(cmd)
-        except subprocess.CalledProcessError:
-            logger.exception("lldpctl exited with non-zero status")
+    @property
+    def db_connector(self):
+        return self.connection.get()
+
+    def request_full_resync(self):
+        """
+        Forget what was written to APPL_DB, so that the next sync rewrites the whole LLDP state and removes
+        entries that are no longer valid. Used whenever writes may have been lost, e.g. after a reconnect.
+        """
+        self.chassis_cache = {}
+        self.interfaces_cache = {}
+        self.cache_index = CacheIndex()
+        if self.neighbor_index is not None:
+            self.neighbor_index = NeighborIndex()
+        if self.journal is not None:
+            self.journal.reset()
+        if self.history is not None:
+            self.history.discard_staged()
+        self.publisher.discard()
+        self._full_resync_pending = True
+
+    def _load_output(self, result):
+        """
+        Decode the JSON output of a finished source command.
+        :param result: sonic_syncd.command.CommandResult
+        :return: JSON object, or None if the command failed
+        """
+        if result.error is not None:
+            logger.error("Failed to execute %s: %s", result.cmd, result.error)
+            return None
+        if result.timed_out:
+            logger.error("%s timed out after %.1f seconds", result.cmd[0], result.duration)
+            return None
+        if result.returncode != 0:
+            logger.error("%s exited with non-zero status %s", result.cmd[0], result.returncode)
             return None
 
         try:
             # parse the scrapped output
-            lldpctl_json = json.loads(lldpctl_output)
+            return json.loads(result.output)
         except ValueError:
-            logger.exception("Failed to parse lldpctl output")
+            logger.exception("Failed to parse %s output", result.cmd[0])
             return None
 
-        return lldpctl_json
+    def _record_source_result(self, result, succeeded):
+        stats = self.source_stats
+        stats['runs'] += 1
+        stats['last_duration'] = result.duration
+        stats['max_duration'] = max(stats['max_duration'], result.duration)
+        if result.timed_out:
+            stats['timeouts'] += 1
+        if succeeded:
+            stats['last_success'] = time.time()
+        else:
+            stats['failures'] += 1
+        self.source_stale = not succeeded
 
     def source_update(self):
         """
         Invoke lldpctl and format as JSON
         """
         cmd = ['/usr/sbin/lldpctl', '-f', 'json']
-        logger.debug("Invoking lldpctl with: {}".format(cmd))
+        logger.debug("Invoking lldpctl with: %s", cmd)
         cmd_local = ['/usr/sbin/lldpcli', '-f', 'json', 'show', 'chassis']
-        logger.debug("Invoking lldpcli with: {}".format(cmd_local))
+        logger.debug("Invoking lldpcli with: %s", cmd_local)
 
-        lldp_json = self._scrap_output(cmd)
+        # both commands run concurrently, each bounded by the runner's timeout
+        result, result_local = self.command_runner.run([cmd, cmd_local])
+
+        lldp_json = self._load_output(result)
+        self._record_source_result(result, lldp_json is not None)
         if lldp_json is None:
             return None
-        lldp_json['lldp_loc_chassis'] = self._scrap_output(cmd_local)
+        lldp_json['lldp_loc_chassis'] = self._load_output(result_local)
 
         return lldp_json
 
@@ -207,6 +508,7 @@ class LldpSyncDaemon(SonicSyncDaemon):
         (2) LldpRemPortID;
         (3) LldpRemPortIdSubtype;
         (4) LldpRemSysName.
+        Only the fields selected by `self.projection` are extracted.
 
         LldpRemEntry ::= SEQUENCE {
               lldpRemTimeMark           TimeFilter,
@@ -224,52 +526,22 @@ class LldpSyncDaemon(SonicSyncDaemon):
         }
         """
         try:
-            interface_list = lldp_json['lldp'].get('interface') or []
             parsed_interfaces = defaultdict(dict)
-            for interface in interface_list:
-                try:
-                    # [{'if_name' : { attributes...}}, {'if_other': {...}}, ...]
-                    (if_name, if_attributes), = interface.items()
-                except AttributeError:
-                    # {'if_name' : { attributes...}}, {'if_other': {...}}
-                    if_name = interface
-                    if_attributes = interface_list[if_name]
-
-                if 'port' in if_attributes:
-                    rem_port_keys = ('lldp_rem_port_id_subtype',
-                                     'lldp_rem_port_id',
-                                     'lldp_rem_port_desc')
-                    parsed_port = list(zip(rem_port_keys, self.parse_port(if_attributes['port'])))
-                    parsed_interfaces[if_name].update(parsed_port)
-
-                chassis_id = ''
-
-                if 'chassis' in if_attributes:
-                    rem_chassis_keys = ('lldp_rem_chassis_id_subtype',
-                                        'lldp_rem_chassis_id',
-                                        'lldp_rem_sys_name',
-                                        'lldp_rem_sys_desc',
-                                        'lldp_rem_man_addr')
-                    parsed_chassis = list(zip(rem_chassis_keys,
-                                         self.parse_chassis(if_attributes['chassis'])))
-                    parsed_interfaces[if_name].update(parsed_chassis)
-                    chassis_id = parsed_chassis[1][1]
-
-                # lldpRemTimeMark           TimeFilter,
-                parsed_interfaces[if_name].update({'lldp_rem_time_mark':
-                                                   str(parse_time(if_attributes.get('age')))})
-
-                # lldpRemIndex
-                parsed_interfaces[if_name].update({'lldp_rem_index': str(if_attributes.get('rid'))})
-
-                capability_list = self.get_sys_capability_list(if_attributes, if_name, chassis_id)
-                # lldpSysCapSupported
-                parsed_interfaces[if_name].update({'lldp_rem_sys_cap_supported':
-                                                   self.parse_sys_capabilities(capability_list)})
-                # lldpSysCapEnabled
-                parsed_interfaces[if_name].update({'lldp_rem_sys_cap_enabled':
-                                                   self.parse_sys_capabilities(
-                                                       capability_list, enabled=True)})
+            items = interface_items(lldp_json['lldp'].get('interface') or [])
+            parsed_items = None
+            if self.parallel_parser is not None:
+                items = list(items)
+                if self.parallel_parser.wants(items):
+                    parsed_items = self.parallel_parser.parse(items)
+            if parsed_items is None:
+                parsed_items = ((if_name, self.parse_interface(if_name, if_attributes))
+                                for if_name, if_attributes in items)
+            for if_name, parsed in parsed_items:
+                entry = parsed_interfaces.get(if_name)
+                if entry is not None:
+                    # an interface listed more than once is merged, the later fields winning
+                    parsed = list(dict(itertools.chain(entry.items(), parsed)).items())
+                parsed_interfaces[if_name] = parsed_entry(parsed)
             if lldp_json.get('lldp_loc_chassis'):
                 loc_chassis_keys = ('lldp_loc_chassis_id_subtype',
                                     'lldp_loc_chassis_id',
@@ -293,139 +565,409 @@ class LldpSyncDaemon(SonicSyncDaemon):
 
             return parsed_interfaces
         except (KeyError, ValueError):
-            logger.exception("Failed to parse LLDPd JSON. \n{}\n -- ".format(lldp_json))
+            logger.exception("Failed to parse LLDPd JSON. \n%s\n -- ", Truncated(lldp_json))
+
+    def parse_interface(self, if_name, if_attributes):
+        return parse_interface(if_name, if_attributes, self.projection, self._rate_limited_log)
 
     def parse_chassis(self, chassis_attributes):
-        try:
-            if 'id' in chassis_attributes and 'id' not in chassis_attributes['id']:
-                sys_name = ''
-                attributes = chassis_attributes
-                id_attributes = chassis_attributes['id']
-            else:
-                (sys_name, attributes) = list(chassis_attributes.items())[0]
-                id_attributes = attributes.get('id', '')
-
-            chassis_id_subtype = str(self.ChassisIdSubtypeMap[id_attributes['type']].value)
-            chassis_id = id_attributes.get('value', '')
-            descr = attributes.get('descr', '')
-            mgmt_ip = attributes.get('mgmt-ip', '')
-            if isinstance(mgmt_ip, list):
-                mgmt_ip = ','.join(mgmt_ip)
-        except (KeyError, ValueError):
-            logger.exception("Could not infer system information from: {}"
-                             .format(chassis_attributes))
-            chassis_id_subtype = chassis_id = sys_name = descr = mgmt_ip = ''
+        return parse_split_chassis(split_chassis(chassis_attributes), chassis_attributes)
 
-        return (chassis_id_subtype,
-                chassis_id,
-                sys_name,
-                descr,
-                mgmt_ip,
-                )
+    def parse_split_chassis(self, chassis, chassis_attributes):
+        return parse_split_chassis(chassis, chassis_attributes)
 
     def parse_port(self, port_attributes):
-        port_identifiers = port_attributes.get('id')
-        try:
-            subtype = str(self.PortIdSubtypeMap[port_identifiers['type']].value)
-            value = port_identifiers['value']
-
-        except ValueError:
-            logger.exception("Could not infer chassis subtype from: {}".format(port_attributes))
-            subtype, value = None
-
-        return (subtype,
-                value,
-                port_attributes.get('descr', ''),
-                )
+        return parse_port(port_attributes)
 
-    def cache_diff(self, cache, update):
+    def restore_snapshot(self):
         """
-        Find difference in keys between update and local cache dicts
-        :param cache: Local cache dict
-        :param update: Update dict
-        :return: new, changed, deleted keys tuple
+        Seed the caches from the on-disk snapshot so that the first sync after a restart only writes the
+        real delta. Only entries that APPL_DB still holds with the same content (lldp_rem_time_mark aside) are
+        restored; the others, e.g. flushed or rewritten while the daemon was down, get written again.
         """
-        new_keys = list(set(update.keys()) - set(cache.keys()))
-        changed_keys = list(set(key for key in set(update.keys()) & set(cache.keys()) if update[key] != cache[key]))
-        deleted_keys = list(set(cache.keys()) - set(update.keys()))
-
-        return new_keys, changed_keys, deleted_keys
+        self._snapshot_restored = True
+        try:
+            chassis_cache, interfaces_cache = load_snapshot(self.snapshot_path)
+        except FileNotFoundError:
+            return
+        except (OSError, SnapshotError):
+            logger.exception("Failed to load LLDP snapshot %s", self.snapshot_path)
+            return
+
+        db = self.db_connector
+        if chassis_cache and db.get_all(db.APPL_DB, LldpSyncDaemon.LLDP_LOC_CHASSIS_TABLE) == chassis_cache:
+            self.chassis_cache = chassis_cache
+        self.interfaces_cache = {}
+        for interface, entry in interfaces_cache.items():
+            stored = db.get_all(db.APPL_DB, ':'.join([LldpSyncDaemon.LLDP_ENTRY_TABLE, interface]))
+            if stored and same_content(stored, entry):
+                self.interfaces_cache[interface] = entry
+        _, fingerprints = self.cache_index.diff(self.interfaces_cache)
+        self.cache_index.commit(fingerprints)
+        if self.neighbor_index is not None:
+            self.neighbor_index.update(db, self.interfaces_cache, dict.fromkeys(self.interfaces_cache, OP_SET))
+        logger.info("Restored %d of %d interfaces from snapshot %s",
+                    len(self.interfaces_cache), len(interfaces_cache), self.snapshot_path)
+
+    def save_snapshot(self):
+        try:
+            save_snapshot(self.snapshot_path, self.chassis_cache, self.interfaces_cache)
+        except OSError:
+            logger.exception("Failed to write LLDP snapshot %s", self.snapshot_path)
 
-    def is_only_time_mark_modified(self, cached_interface, updated_interface):
+    def refresh_ports(self, ports):
         """
-        Check if only lldp_rem_time_mark is modified in the update
-        :param cached_interface: Local cached interface dict
-        :param updated_interface: Updated interface dict
-        :return: True if only lldp_rem_time_mark is modified, False otherwise
+        Re-read the neighbors of a few ports and sync only those, at O(len(ports)) cost instead of a
+        full dump. The periodic full dump remains the reconciliation.
+        :param ports: local interface names
+        :return: True if the ports were refreshed
         """
-        if len(cached_interface) != len(updated_interface):
+        ports = sorted(set(ports))
+        if not ports:
             return False
+        cmd = ['/usr/sbin/lldpcli', '-f', 'json', 'show', 'neighbors', 'ports', ','.join(ports), 'details']
+        logger.debug("Invoking lldpcli with: %s", cmd)
+        result, = self.command_runner.run([cmd])
+        lldp_json = self._load_output(result)
+        if lldp_json is None:
+            return False
+        parsed_update = self.parse_update(lldp_json)
+        if parsed_update is None:
+            return False
+        self._run_db_operation(self._sync_ports, ports, parsed_update)
+        return True
+
+    def _sync_ports(self, ports, parsed_update):
+        # before the first full sync (or while a full resync is pending) there is nothing to merge into
+        if not self._synced or self._full_resync_pending:
+            return
+        parsed_update = {port: parsed_update[port] for port in ports if port in parsed_update}
+        if self.dampener is not None:
+            parsed_update = self.dampener.apply(parsed_update, ports)
+        parsed_update = {port: entry for port, entry in parsed_update.items() if port not in self.oper_down}
+        self._publish(parsed_update, ports=ports)
+
+    def run(self):
+        if self.history_server is not None:
+            self.history_server.start()
+        try:
+            super(LldpSyncDaemon, self).run()
+        finally:
+            if self.history_server is not None:
+                self.history_server.stop()
 
-        changed_keys = 0
-
-        for key in cached_interface.keys():
-            if 'lldp_rem_time_mark' == key and cached_interface[key] != updated_interface[key]:
-                changed_keys += 1
-            elif key not in updated_interface or cached_interface[key] != updated_interface[key]:
-                return False
+    def stop(self):
+        super(LldpSyncDaemon, self).stop()
+        if self.parallel_parser is not None:
+            self.parallel_parser.close()
 
-        return True if changed_keys == 1 else False
+    def handle_events(self, events):
+        """
+        Track port oper-status events and withdraw the neighbors of ports that went down.
+        :param events: dict of port name -> oper_status
+        """
+        withdrawn = []
+        restored = []
+        for port, oper_status in events.items():
+            if oper_status == 'up':
+                if port in self.oper_down:
+                    self.oper_down.discard(port)
+                    restored.append(port)
+                    logger.info("Port %s is up, accepting its LLDP neighbors again", port)
+            elif port not in self.oper_down:
+                self.oper_down.add(port)
+                if port in self.interfaces_cache:
+                    withdrawn.append(port)
+        if withdrawn:
+            logger.info("Withdrawing LLDP neighbors of ports that went down: %s", ', '.join(sorted(withdrawn)))
+            self._run_db_operation(self._withdraw_oper_down)
+        if restored:
+            # lldpd may already know the neighbor; otherwise it shows up with the next full dump
+            self.refresh_ports(restored)
+
+    def _withdraw_oper_down(self):
+        # a pending full resync rewrites everything on the next poll, which skips oper down ports anyway
+        if self._full_resync_pending:
+            return
+        self._publish({interface: entry for interface, entry in self.interfaces_cache.items()
+                       if interface not in self.oper_down})
 
     def sync(self, parsed_update):
         """
         Sync LLDP information to redis DB.
+        :return: True if the update went through
+        """
+        return self._run_db_operation(self._sync, parsed_update)
+
+    def restart_source(self):
+        """
+        Restart lldpd after it stopped delivering for longer than the freshness objective.
+        """
+        result, = self.command_runner.run([self.source_restart_cmd])
+        if result.ok:
+            logger.info("Restarted lldpd with %s", self.source_restart_cmd)
+        else:
+            logger.error("Failed to restart lldpd with %s: %s", self.source_restart_cmd, result)
+
+    def report_health(self):
+        """
+        Publish freshness next to LLDP_ENTRY_TABLE, so that consumers can tell how current it is.
+        """
+        if self.health.slo:
+            self._run_db_operation(self._publish_health)
+
+    def _publish_health(self):
+        health = self.health
+        status = {
+            'last_source_update': '%.3f' % health.last_source_success if health.last_source_success else '',
+            'last_sync': '%.3f' % health.last_sync_success if health.last_sync_success else '',
+            'freshness_slo': str(health.slo),
+            'stale': 'true' if health.stale else 'false',
+        }
+        for name, p in (('cycle_latency_p50', 50), ('cycle_latency_p99', 99)):
+            latency = health.latency.percentile(p)
+            status[name] = '' if latency is None else '%.3f' % latency
+        self.db_connector.hmset(self.db_connector.APPL_DB, LldpSyncDaemon.LLDP_ENTRY_FRESHNESS_TABLE, status)
+
+    def _run_db_operation(self, func, *args, probe=True):
+        """
+        Run an APPL_DB update, recovering the connection if it fails.
+        :param probe: check the connection with a round-trip first; without, a broken connection is only
+                      noticed when the update itself fails
+        :return: True if the update went through
         """
+        try:
+            if probe and self.connection.connected:
+                self.connection.check_health()
+            # (re)connect before diffing, so that a reconnect's full resync applies to this very update
+            self.connection.get()
+            func(*args)
+            return True
+        except DBUnavailableError as e:
+            logger.warning("Skipping sync: %s", e)
+        except Exception as e:
+            # anything else is a bug, not to be papered over by reconnecting
+            if not is_connection_error(e):
+                raise
+            logger.exception("Failed to sync LLDP information to APPL_DB")
+            self.connection.invalidate()
+            self.request_full_resync()
+        return False
+
+    def _delete_stale_entries(self, parsed_update, changes):
+        """
+        Remove LLDP_ENTRY_TABLE keys that are not part of the update (full resync only).
+        """
+        prefix = LldpSyncDaemon.LLDP_ENTRY_TABLE + ':'
+        for table_key in self.db_connector.keys(self.db_connector.APPL_DB, prefix + '*') or []:
+            interface = table_key[len(prefix):]
+            if interface not in parsed_update:
+                self.publisher.delete(interface)
+                changes[interface] = OP_DEL
+                logger.log(self._change_log_level, "Delete stale table_key: %s", table_key)
+
+    def _sync(self, parsed_update):
         logger.debug("Initiating LLDPd sync to Redis...")
 
+        if self.snapshot_path is not None and not self._snapshot_restored:
+            self.restore_snapshot()
+
         # push local chassis data to APP DB
+        chassis_changed = False
         if 'local-chassis' in parsed_update:
             chassis_update = parsed_update.pop('local-chassis')
             if chassis_update != self.chassis_cache:
+                chassis_changed = True
                 self.db_connector.delete(self.db_connector.APPL_DB,
                                          LldpSyncDaemon.LLDP_LOC_CHASSIS_TABLE)
                 for k, v in chassis_update.items():
                     self.db_connector.set(self.db_connector.APPL_DB,
                                           LldpSyncDaemon.LLDP_LOC_CHASSIS_TABLE, k, v, blocking=True)
-                logger.debug("sync'd: {}".format(json.dumps(chassis_update, indent=3)))
+                self.chassis_cache = chassis_update
+                logger.debug("sync'd: %s", LazyJson(chassis_update, indent=3))
+
+        if self.dampener is not None:
+            parsed_update = self.dampener.apply(parsed_update)
+        if self.oper_down:
+            # lldpd keeps neighbors of a down port until they age out
+            parsed_update = {interface: entry for interface, entry in parsed_update.items()
+                             if interface not in self.oper_down}
 
-        new, changed, deleted = self.cache_diff(self.interfaces_cache, parsed_update)
+        self._publish(parsed_update, chassis_changed)
+        self._synced = True
+
+    def _publish(self, parsed_update, chassis_changed=False, ports=None):
+        """
+        Write the difference between the interfaces cache and `parsed_update` to LLDP_ENTRY_TABLE.
+        :param ports: only compare these interfaces (partial refresh); `parsed_update` then holds those
+                      of them that still have a neighbor
+        """
+        start = time.perf_counter()
+        if ports is None:
+            diff, fingerprints = self.cache_index.diff(parsed_update)
+        else:
+            diff, fingerprints = self.cache_index.diff_subset(parsed_update, ports)
+        self.diff_seconds += time.perf_counter() - start
+        # interface -> op, for the change journal and the neighbor indexes
+        if ports is None and self._wants_table_swap(diff):
+            changes = self._swap_table(parsed_update, diff)
+        else:
+            changes = self._write_incremental(parsed_update, diff)
+        if self.history is not None:
+            if self.write_scheduler is None:
+                self.history.record_changes(changes, self.interfaces_cache, parsed_update)
+            else:
+                self.history.stage_changes(changes, self.interfaces_cache, parsed_update)
+        if ports is None:
+            self.interfaces_cache = parsed_update
+            self.cache_index.commit(fingerprints)
+        else:
+            for interface in ports:
+                if interface in parsed_update:
+                    self.interfaces_cache[interface] = parsed_update[interface]
+                else:
+                    self.interfaces_cache.pop(interface, None)
+            self.cache_index.commit_subset(ports, fingerprints)
+        self.publisher.flush()
+
+        # with a write scheduler, the indexes, history and journal follow the writes as they are applied
+        # (see _on_writes_applied), so readers never see neighbors that are not in LLDP_ENTRY_TABLE yet
+        if self.write_scheduler is None:
+            if self.neighbor_index is not None:
+                self.neighbor_index.update(self.db_connector, parsed_update, changes)
+            if self.journal is not None:
+                self.journal.record(self.db_connector, changes)
+        # lldp_rem_time_mark-only cycles are not checkpointed; a restart just refreshes those fields
+        if self.snapshot_path is not None and (changes or chassis_changed):
+            self._snapshot_dirty = True
+        self._save_snapshot_if_settled()
+        if self.write_scheduler is not None and self.write_scheduler.backlog:
+            self._rate_limited_log.info('write-backlog', "%d LLDP_ENTRY_TABLE writes deferred by the write budget, "
+                                        "oldest waiting %.1fs", self.write_scheduler.backlog,
+                                        self.write_scheduler.backlog_age())
+
+    def _write_incremental(self, parsed_update, diff):
+        """
+        Write the entries of `diff` one by one through the publisher.
+        :return: dict of interface -> op
+        """
+        new, changed, deleted = diff.new, diff.changed, diff.deleted
+        changes = {}
 
         if new or deleted:
             # If detects any new or deleted interfaces, repopulate for changed interfaces
-            for interface in changed:
+            for interface in itertools.chain(changed, diff.time_mark_only):
                 if re.match(SONIC_ETHERNET_RE_PATTERN, interface) is None:
-                    logger.warning("Ignoring interface '{}'".format(interface))
+                    self._rate_limited_log.warning(interface, "Ignoring interface '%s'", interface)
                     continue
-                table_key = ':'.join([LldpSyncDaemon.LLDP_ENTRY_TABLE, interface])
-                self.db_connector.delete(self.db_connector.APPL_DB, table_key)
-                self.db_connector.hmset(self.db_connector.APPL_DB, table_key, parsed_update[interface])
-                logger.info("Force repopulate the changed interface {} : {}".format(interface, parsed_update[interface]))
+                self.publisher.replace(interface, parsed_update[interface])
+                changes[interface] = OP_SET
+                logger.log(self._change_log_level, "Force repopulate the changed interface %s : %s", interface, Truncated(parsed_update[interface]))
         else:
-            # For changed elements, if only lldp_rem_time_mark changed, update its value, otherwise delete and repopulate
+            # If only lldp_rem_time_mark changed, update its value
+            for interface in diff.time_mark_only:
+                if re.match(SONIC_ETHERNET_RE_PATTERN, interface) is None:
+                    self._rate_limited_log.warning(interface, "Ignoring interface '%s'", interface)
+                    continue
+                self.publisher.set_field(interface, 'lldp_rem_time_mark', parsed_update[interface]['lldp_rem_time_mark'])
+                logger.debug("Only sync'd interface %s lldp_rem_time_mark: %s", interface, parsed_update[interface]['lldp_rem_time_mark'])
+            # otherwise delete and repopulate
             for interface in changed:
                 if re.match(SONIC_ETHERNET_RE_PATTERN, interface) is None:
-                    logger.warning("Ignoring interface '{}'".format(interface))
+                    self._rate_limited_log.warning(interface, "Ignoring interface '%s'", interface)
                     continue
-                table_key = ':'.join([LldpSyncDaemon.LLDP_ENTRY_TABLE, interface])
-                if self.is_only_time_mark_modified(self.interfaces_cache[interface], parsed_update[interface]):
-                    self.db_connector.set(self.db_connector.APPL_DB, table_key, 'lldp_rem_time_mark', parsed_update[interface]['lldp_rem_time_mark'], blocking=True)
-                    logger.debug("Only sync'd interface {} lldp_rem_time_mark: {}".format(interface, parsed_update[interface]['lldp_rem_time_mark']))
-                else:
-                    self.db_connector.delete(self.db_connector.APPL_DB, table_key)
-                    self.db_connector.hmset(self.db_connector.APPL_DB, table_key, parsed_update[interface])
-                    logger.info("Repopulate for changed interface {} : {}".format(interface, parsed_update[interface]))
-        self.interfaces_cache = parsed_update
+                self.publisher.replace(interface, parsed_update[interface])
+                changes[interface] = OP_SET
+                logger.log(self._change_log_level, "Repopulate for changed interface %s : %s", interface, Truncated(parsed_update[interface]))
         # Delete LLDP_ENTRIES which are missing
         for interface in deleted:
-            table_key = ':'.join([LldpSyncDaemon.LLDP_ENTRY_TABLE, interface])
-            self.db_connector.delete(self.db_connector.APPL_DB, table_key)
-            logger.info("Delete table_key: {}".format(table_key))
+            self.publisher.delete(interface)
+            changes[interface] = OP_DEL
+            logger.log(self._change_log_level, "Delete table_key: %s:%s", LldpSyncDaemon.LLDP_ENTRY_TABLE, interface)
         # Repopulate LLDP_ENTRY_TABLE by adding new elements
         for interface in new:
             if re.match(SONIC_ETHERNET_RE_PATTERN, interface) is None:
-                logger.warning("Ignoring interface '{}'".format(interface))
+                self._rate_limited_log.warning(interface, "Ignoring interface '%s'", interface)
                 continue
             # port_table_key = LLDP_ENTRY_TABLE:INTERFACE_NAME;
-            table_key = ':'.join([LldpSyncDaemon.LLDP_ENTRY_TABLE, interface])
-            self.db_connector.hmset(self.db_connector.APPL_DB, table_key, parsed_update[interface])
-            logger.info("Add new interface {} : {}".format(interface, parsed_update[interface]))
+            self.publisher.set(interface, parsed_update[interface])
+            changes[interface] = OP_SET
+            logger.log(self._change_log_level, "Add new interface %s : %s", interface, Truncated(parsed_update[interface]))
+
+        if self._full_resync_pending:
+            self._delete_stale_entries(parsed_update, changes)
+            self._full_resync_pending = False
+        return changes
+
+    def _wants_table_swap(self, diff):
+        if self.table_swap is None:
+            return False
+        if self._full_resync_pending:
+            return True
+        # only cycles with new or deleted interfaces rewrite entries in bulk
+        if not (diff.new or diff.deleted):
+            return False
+        rewrites = len(diff.new) + len(diff.deleted) + len(diff.changed) + len(diff.time_mark_only)
+        return rewrites >= self.table_swap_threshold
+
+    def _swap_table(self, parsed_update, diff):
+        """
+        Publish `parsed_update` as the complete LLDP_ENTRY_TABLE in one atomic swap.
+        :return: dict of interface -> op
+        """
+        entries = {}
+        for interface, entry in parsed_update.items():
+            if re.match(SONIC_ETHERNET_RE_PATTERN, interface) is None:
+                self._rate_limited_log.warning(interface, "Ignoring interface '%s'", interface)
+                continue
+            entries[interface] = entry
+        # ignored interfaces are not ours to delete, as with incremental writes
+        try:
+            deleted = self.table_swap.publish(self.db_connector, entries, keep=parsed_update)
+        except TableSwapError:
+            # e.g. no script support in this swsscommon; a partial swap only moved entries to their new state
+            logger.exception("Disabling LLDP_ENTRY_TABLE swaps, writing incrementally")
+            self.table_swap = None
+            return self._write_incremental(parsed_update, diff)
+        self._full_resync_pending = False
+        logger.info("Swapped in LLDP_ENTRY_TABLE with %d entries, %d deleted", len(entries), len(deleted))
+
+        changes = {interface: OP_SET for interface in itertools.chain(diff.new, diff.changed) if interface in entries}
+        changes.update((interface, OP_DEL) for interface in deleted)
+        return changes
+
+    def _save_snapshot_if_settled(self):
+        # a snapshot taken with writes still queued would claim entries APPL_DB does not hold yet
+        if self._snapshot_dirty and (self.write_scheduler is None or not self.write_scheduler.backlog):
+            self._snapshot_dirty = False
+            self.save_snapshot()
+
+    def _on_writes_applied(self, applied):
+        """
+        Update the neighbor indexes, history and journal with the writes the scheduler released.
+        :param applied: dict of interface -> scheduler priority
+        """
+        changes = {interface: OP_DEL if priority == PRIORITY_DELETE else OP_SET
+                   for interface, priority in applied.items() if priority != PRIORITY_TIME_MARK}
+        if not changes:
+            return
+        # writes are coalesced per key, so what was applied is the latest cached state
+        if self.neighbor_index is not None:
+            self.neighbor_index.update(self.db_connector, self.interfaces_cache, changes)
+        if self.history is not None:
+            self.history.commit_staged(changes)
+        if self.journal is not None:
+            self.journal.record(self.db_connector, changes)
+
+    def background_work(self):
+        """
+        Drain the write scheduler's backlog as the budget allows.
+        """
+        if self.write_scheduler is None or not self.write_scheduler.backlog:
+            return None
+        # no health probe: it would be one more command per drain step, outside the scheduler's budget
+        if not self._run_db_operation(self.write_scheduler.flush, probe=False):
+            # retried with the next sync
+            return None
+        self._save_snapshot_if_settled()
+        return self.write_scheduler.next_due()
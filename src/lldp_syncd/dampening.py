@@ -0,0 +1,150 @@
+"""
+Neighbor flap dampening.
+
+Sits between `parse_update` and `sync`: every cycle the freshly parsed interfaces are fed to
+:meth:`NeighborDampener.apply`, which returns the settled view that should be published.
+
+Each content transition of an interface (neighbor appears, disappears or changes) counts as a flap
+and adds a penalty that decays exponentially with `half_life`, in the spirit of BGP route flap
+dampening (RFC 2439). An interface whose penalty reaches `suppress_threshold` is frozen at its
+last published state until the penalty decays below `reuse_threshold`. Independently, a new state
+is only published once it has been stable for `hold_down` seconds.
+"""
+import time
+
+DEFAULT_HOLD_DOWN = 0
+DEFAULT_PENALTY = 1000
+DEFAULT_SUPPRESS_THRESHOLD = 2000
+DEFAULT_REUSE_THRESHOLD = 750
+DEFAULT_HALF_LIFE = 60
+
+TIME_MARK_KEY = 'lldp_rem_time_mark'
+
+
+def same_content(cached_interface, updated_interface):
+    """
+    Compare two parsed interfaces (or None for an absent one), ignoring lldp_rem_time_mark.
+    """
+    if cached_interface is None or updated_interface is None:
+        return cached_interface is updated_interface
+    if len(cached_interface) != len(updated_interface):
+        return False
+    for key, value in cached_interface.items():
+        if key != TIME_MARK_KEY and updated_interface.get(key) != value:
+            return False
+    return True
+
+
+class DampeningConfig(object):
+    """
+    Dampening parameters; times are in seconds.
+    """
+
+    def __init__(self, hold_down=DEFAULT_HOLD_DOWN, penalty=DEFAULT_PENALTY,
+                 suppress_threshold=DEFAULT_SUPPRESS_THRESHOLD, reuse_threshold=DEFAULT_REUSE_THRESHOLD,
+                 half_life=DEFAULT_HALF_LIFE, max_penalty=None):
+        if reuse_threshold > suppress_threshold:
+            raise ValueError("reuse_threshold must not exceed suppress_threshold")
+        self.hold_down = hold_down
+        self.penalty = penalty
+        self.suppress_threshold = suppress_threshold
+        self.reuse_threshold = reuse_threshold
+        self.half_life = half_life
+        self.max_penalty = max_penalty or 4 * suppress_threshold
+
+
+class InterfaceDampeningState(object):
+    __slots__ = ('observed', 'observed_since', 'penalty', 'penalty_time', 'suppressed')
+
+    def __init__(self, observed, observed_since):
+        self.observed = observed
+        self.observed_since = observed_since
+        self.penalty = 0.0
+        self.penalty_time = observed_since
+        self.suppressed = False
+
+    def decay(self, now, half_life):
+        if self.penalty:
+            self.penalty *= 0.5 ** ((now - self.penalty_time) / float(half_life))
+        self.penalty_time = now
+
+
+class NeighborDampener(object):
+    """
+    Absorbs rapid neighbor oscillation and hands only settled interface state to `sync`.
+    """
+
+    def __init__(self, config=None, overrides=None, clock=time.monotonic):
+        """
+        :param config: default DampeningConfig
+        :param overrides: dict of interface name -> DampeningConfig
+        :param clock: monotonic time source
+        """
+        self.config = config or DampeningConfig()
+        self.overrides = overrides or {}
+        self.flap_counts = {}
+        self._clock = clock
+        self._states = {}
+        self._published = {}
+        self._primed = False
+
+    def config_for(self, if_name):
+        return self.overrides.get(if_name, self.config)
+
+    def is_suppressed(self, if_name):
+        state = self._states.get(if_name)
+        return state is not None and state.suppressed
+
+    def apply(self, update, interfaces=None):
+        """
+        Feed one cycle of parsed interfaces.
+        :param update: dict of interface name -> parsed attributes
+        :param interfaces: restrict the cycle to these interfaces (partial refresh); by default the update
+                           is a full dump and interfaces missing from it have disappeared
+        :return: dict of interface name -> attributes to publish
+        """
+        now = self._clock()
+        settled = {}
+        if interfaces is None:
+            interfaces = set(update) | set(self._states)
+        for if_name in interfaces:
+            observed = update.get(if_name)
+            published = self._published.get(if_name)
+            config = self.config_for(if_name)
+            state = self._states.get(if_name)
+
+            if state is None:
+                # the very first dump is taken as-is; later appearances must settle like any other change
+                state = InterfaceDampeningState(observed, float('-inf') if not self._primed else now)
+                self._states[if_name] = state
+                if self._primed:
+                    self._flap(if_name, state, config, now)
+            elif not same_content(state.observed, observed):
+                state.observed_since = now
+                self._flap(if_name, state, config, now)
+            state.observed = observed
+
+            state.decay(now, config.half_life)
+            if state.suppressed and state.penalty <= config.reuse_threshold:
+                state.suppressed = False
+            elif not state.suppressed and state.penalty >= config.suppress_threshold:
+                state.suppressed = True
+
+            if not state.suppressed and now - state.observed_since >= config.hold_down:
+                published = observed
+
+            if published is not None:
+                settled[if_name] = published
+                self._published[if_name] = published
+            else:
+                self._published.pop(if_name, None)
+                if observed is None and state.penalty < 1:
+                    del self._states[if_name]
+
+        self._primed = True
+        return settled
+
+    def _flap(self, if_name, state, config, now):
+        state.decay(now, config.half_life)
+        state.penalty = min(state.penalty + config.penalty, config.max_penalty)
+        self.flap_counts[if_name] = self.flap_counts.get(if_name, 0) + 1
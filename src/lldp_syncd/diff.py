@@ -0,0 +1,147 @@
+"""
+Content-indexed diff between the interfaces cache and a parsed update.
+
+For every cached interface :class:`CacheIndex` keeps the entry's content (its (field, value) pairs
+without lldp_rem_time_mark, in field order) and the time mark itself. Classifying an update is then
+a single pass over it comparing short tuples and strings, instead of set algebra and full dict
+comparisons.
+
+`parse_update` returns :class:`ParsedEntry` dicts, whose content is extracted once from the
+(field, value) pairs the interface was parsed into, so the diff itself builds nothing per entry. Other dicts (e.g. restored from a
+snapshot) are handled on the fly. Contents are compared in field order: entries of the same
+projection are produced in the same order, and snapshots keep it.
+"""
+from collections import namedtuple
+
+TIME_MARK_KEY = 'lldp_rem_time_mark'
+
+DiffResult = namedtuple('DiffResult', ['new', 'changed', 'time_mark_only', 'deleted'])
+
+
+def entry_content(entry):
+    """
+    :return: tuple of the (field, value) pairs of a parsed interface other than lldp_rem_time_mark
+    """
+    return tuple([item for item in entry.items() if item[0] != TIME_MARK_KEY])
+
+
+class ParsedEntry(dict):
+    """
+    A parsed interface with its content, as built by `parsed_entry`. Not to be modified: the content would
+    not follow.
+    """
+    __slots__ = ('content',)
+
+
+def parsed_entry(pairs):
+    """
+    :param pairs: list of (field, value) tuples with distinct fields, as returned by parse_interface
+    :return: ParsedEntry
+    """
+    entry = ParsedEntry(pairs)
+    if pairs and pairs[-1][0] == TIME_MARK_KEY:
+        # where parse_interface puts it
+        entry.content = tuple(pairs[:-1])
+    else:
+        entry.content = tuple([pair for pair in pairs if pair[0] != TIME_MARK_KEY])
+    return entry
+
+
+class CacheIndex(object):
+    """
+    Contents of the cached interfaces.
+    """
+
+    def __init__(self):
+        # interface -> (content, time mark)
+        self.entries = {}
+
+    def diff(self, update):
+        """
+        Classify an update against the index in one pass.
+        :param update: dict of interface -> parsed attributes
+        :return: (DiffResult, fingerprints of the update to pass to `commit`)
+        """
+        entries = self.entries
+        new = []
+        changed = []
+        time_mark_only = []
+        fingerprints = {}
+        matched = 0
+
+        for if_name, entry in update.items():
+            content = getattr(entry, 'content', None)
+            if content is None:
+                content = entry_content(entry)
+            fingerprint = (content, entry.get(TIME_MARK_KEY))
+            fingerprints[if_name] = fingerprint
+            cached = entries.get(if_name)
+            if cached is None:
+                new.append(if_name)
+                continue
+            matched += 1
+            if cached[0] != fingerprint[0]:
+                changed.append(if_name)
+            elif cached[1] != fingerprint[1]:
+                time_mark_only.append(if_name)
+
+        # every cached interface was seen in the update: nothing can have been deleted
+        if matched == len(entries):
+            deleted = []
+        else:
+            deleted = [if_name for if_name in entries if if_name not in update]
+
+        return DiffResult(new, changed, time_mark_only, deleted), fingerprints
+
+    def diff_subset(self, update, keys):
+        """
+        Classify only `keys`, e.g. for a partial refresh of a few ports.
+        :param update: dict of interface -> parsed attributes; keys missing from it are deleted
+        :param keys: interfaces to classify
+        :return: (DiffResult, fingerprints of the update to pass to `commit_subset`)
+        """
+        entries = self.entries
+        new = []
+        changed = []
+        time_mark_only = []
+        deleted = []
+        fingerprints = {}
+
+        for if_name in keys:
+            cached = entries.get(if_name)
+            entry = update.get(if_name)
+            if entry is None:
+                if cached is not None:
+                    deleted.append(if_name)
+                continue
+            content = getattr(entry, 'content', None)
+            if content is None:
+                content = entry_content(entry)
+            fingerprint = (content, entry.get(TIME_MARK_KEY))
+            fingerprints[if_name] = fingerprint
+            if cached is None:
+                new.append(if_name)
+            elif cached[0] != fingerprint[0]:
+                changed.append(if_name)
+            elif cached[1] != fingerprint[1]:
+                time_mark_only.append(if_name)
+
+        return DiffResult(new, changed, time_mark_only, deleted), fingerprints
+
+    def commit(self, fingerprints):
+        """
+        Make the fingerprints returned by `diff` the new index.
+        """
+        self.entries = fingerprints
+
+    def commit_subset(self, keys, fingerprints):
+        """
+        Update the index for `keys` with the fingerprints returned by `diff_subset`.
+        """
+        entries = self.entries
+        for if_name in keys:
+            fingerprint = fingerprints.get(if_name)
+            if fingerprint is None:
+                entries.pop(if_name, None)
+            else:
+                entries[if_name] = fingerprint
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Declarative field projection for the LLDP_ENTRY_TABLE entries produced by `parse_update`.
+
+A :class:`FieldProjection` lists the fields a role wants. Only the parser groups that produce at
+least one selected field are run, so e.g. a projection of just the port and chassis IDs never
+touches the system description or the capability TLVs. Fields outside the fixed LLDP-MIB set are
+provided by extractors registered with :func:`register_field`; an extractor is only ever called
+when its field is selected.
+"""
+
+REM_PORT_KEYS = ('lldp_rem_port_id_subtype',
+                 'lldp_rem_port_id',
+                 'lldp_rem_port_desc')
+REM_CHASSIS_KEYS = ('lldp_rem_chassis_id_subtype',
+                    'lldp_rem_chassis_id',
+                    'lldp_rem_sys_name',
+                    'lldp_rem_sys_desc',
+                    'lldp_rem_man_addr')
+REM_TIME_MARK_KEY = 'lldp_rem_time_mark'
+REM_INDEX_KEY = 'lldp_rem_index'
+REM_SYS_CAP_KEYS = ('lldp_rem_sys_cap_supported',
+                    'lldp_rem_sys_cap_enabled')
+
+DEFAULT_FIELDS = REM_PORT_KEYS + REM_CHASSIS_KEYS + (REM_TIME_MARK_KEY, REM_INDEX_KEY) + REM_SYS_CAP_KEYS
+
+# field name -> callable(if_attributes) returning the field value as a string
+FIELD_EXTRACTORS = {}
+
+
+def register_field(name):
+    """
+    Decorator registering an extractor for an optional field.
+    """
+    def decorator(extractor):
+        FIELD_EXTRACTORS[name] = extractor
+        return extractor
+    return decorator
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+@register_field('lldp_rem_vlan_ids')
+def extract_vlan_ids(if_attributes):
+    return ','.join(vlan.get('vlan-id', '') for vlan in _as_list(if_attributes.get('vlan')))
+
+
+@register_field('lldp_rem_pvid')
+def extract_pvid(if_attributes):
+    for vlan in _as_list(if_attributes.get('vlan')):
+        if vlan.get('pvid'):
+            return vlan.get('vlan-id', '')
+    return ''
+
+
+@register_field('lldp_rem_med_device_type')
+def extract_med_device_type(if_attributes):
+    return (if_attributes.get('lldp-med') or {}).get('device-type', '')
+
+
+@register_field('lldp_rem_med_capabilities')
+def extract_med_capabilities(if_attributes):
+    capabilities = _as_list((if_attributes.get('lldp-med') or {}).get('capability'))
+    return ','.join(capability['type'] for capability in capabilities if capability.get('available'))
+
+
+@register_field('lldp_rem_link_agg_id')
+def extract_link_agg_id(if_attributes):
+    # lldpd reports the 802.3 aggregated port ID as port/aggregation
+    return str((if_attributes.get('port') or {}).get('aggregation', ''))
+
+
+class FieldProjection(object):
+    """
+    The set of fields to parse, cache, diff and write for each remote interface.
+    """
+
+    def __init__(self, fields=None):
+        """
+        :param fields: iterable of field names; defaults to the LLDP-MIB remote entry fields
+        """
+        self.fields = tuple(fields) if fields is not None else DEFAULT_FIELDS
+        unknown = [field for field in self.fields
+                   if field not in DEFAULT_FIELDS and field not in FIELD_EXTRACTORS]
+        if unknown:
+            raise ValueError("Unknown LLDP fields: {}".format(', '.join(unknown)))
+
+        selected = set(self.fields)
+        self.port_keys = self._group_keys(REM_PORT_KEYS, selected)
+        self.chassis_keys = self._group_keys(REM_CHASSIS_KEYS, selected)
+        self.sys_cap_keys = self._group_keys(REM_SYS_CAP_KEYS, selected)
+        self.time_mark = REM_TIME_MARK_KEY in selected
+        self.index = REM_INDEX_KEY in selected
+        self.extractors = tuple((field, FIELD_EXTRACTORS[field]) for field in self.fields
+                                if field not in DEFAULT_FIELDS)
+
+    @staticmethod
+    def _group_keys(group, selected):
+        """
+        :return: the group's keys with unselected ones replaced by None, or None if none is selected
+        """
+        keys = tuple(key if key in selected else None for key in group)
+        return keys if any(keys) else None
+
+    @staticmethod
+    def project(keys, values):
+        """
+        Pair a parser group's values with its selected keys.
+        """
+        return [(key, value) for key, value in zip(keys, values) if key is not None]
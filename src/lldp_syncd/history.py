@@ -0,0 +1,237 @@
+"""
+Bounded in-memory history of LLDP_ENTRY_TABLE changes, for troubleshooting flaps.
+
+:class:`ChangeHistory` keeps the most recent change events as compact tuples
+(timestamp, interface, op, changed field names) in a ring buffer. :class:`HistoryServer` answers
+queries on a Unix socket; the request is a single line `<interface or *> [count]` and the reply
+the matching events, oldest first, as a JSON list. The daemon keeps a history when started with
+`--history`. From a shell:
+
+    python -m lldp_syncd history [--socket PATH] [-n COUNT] [INTERFACE]
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+from . import logger
+from .journal import OP_DEL
+
+DEFAULT_HISTORY_SIZE = 4096
+DEFAULT_QUERY_COUNT = 20
+DEFAULT_SOCKET_PATH = '/var/run/lldp_syncd_history.sock'
+
+OP_ADD = 'add'
+OP_CHANGE = 'change'
+OP_DELETE = 'delete'
+
+
+def changed_fields(old, new, ignore=('lldp_rem_time_mark',)):
+    """
+    :return: sorted names of the fields that differ between two entries
+    """
+    return tuple(sorted(field for field in set(old) | set(new)
+                        if field not in ignore and old.get(field) != new.get(field)))
+
+
+class ChangeHistory(object):
+    """
+    Ring buffer of the last `size` change events.
+    """
+
+    def __init__(self, size=DEFAULT_HISTORY_SIZE, clock=time.time):
+        self._events = deque(maxlen=size)
+        self._clock = clock
+        # recorded from the daemon thread, read from the query server's
+        self._lock = threading.Lock()
+        # field name tuples are shared between events
+        self._field_sets = {}
+        # interface -> (op, fields) of writes queued but not applied yet
+        self._staged = {}
+
+    def __len__(self):
+        return len(self._events)
+
+    def record(self, interface, op, fields=()):
+        fields = self._field_sets.setdefault(fields, fields)
+        with self._lock:
+            self._events.append((self._clock(), interface, op, fields))
+
+    @staticmethod
+    def _change_events(changes, old_entries, new_entries):
+        for interface, op in changes.items():
+            if op == OP_DEL:
+                yield interface, OP_DELETE, ()
+            elif interface not in old_entries:
+                yield interface, OP_ADD, ()
+            else:
+                fields = changed_fields(old_entries[interface], new_entries[interface])
+                # entries rewritten alongside new or deleted ones, with only lldp_rem_time_mark changed
+                if fields:
+                    yield interface, OP_CHANGE, fields
+
+    def record_changes(self, changes, old_entries, new_entries):
+        """
+        Record the entries written in one sync cycle.
+        :param changes: dict of interface -> journal op, as written to LLDP_ENTRY_TABLE
+        :param old_entries: interfaces cache before the cycle
+        :param new_entries: parsed update of the cycle
+        """
+        for interface, op, fields in self._change_events(changes, old_entries, new_entries):
+            self.record(interface, op, fields)
+
+    def stage_changes(self, changes, old_entries, new_entries):
+        """
+        As `record_changes`, for writes that were only queued; they are recorded by `commit_staged` once
+        applied. Successive changes of an interface still queued are merged, as the writes are.
+        """
+        for interface, op, fields in self._change_events(changes, old_entries, new_entries):
+            staged = self._staged.get(interface)
+            if staged is not None and op == OP_CHANGE:
+                if staged[0] == OP_ADD:
+                    op, fields = OP_ADD, ()
+                elif staged[0] == OP_CHANGE:
+                    fields = tuple(sorted(set(staged[1]) | set(fields)))
+            self._staged[interface] = (op, fields)
+
+    def commit_staged(self, interfaces):
+        """
+        Record the staged events of interfaces whose writes were applied.
+        """
+        for interface in interfaces:
+            staged = self._staged.pop(interface, None)
+            if staged is not None:
+                self.record(interface, *staged)
+
+    def discard_staged(self):
+        self._staged.clear()
+
+    def query(self, interface=None, count=DEFAULT_QUERY_COUNT):
+        """
+        :param interface: only events of this interface (default: all)
+        :param count: at least 1
+        :return: up to `count` most recent events, oldest first, as dicts
+        """
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        with self._lock:
+            events = list(self._events)
+        if interface is not None:
+            events = [event for event in events if event[1] == interface]
+        return [{'time': timestamp, 'interface': if_name, 'op': op, 'fields': list(fields)}
+                for timestamp, if_name, op, fields in events[-count:]]
+
+
+def answer_query(history, request):
+    """
+    :param request: one request line, `<interface or *> [count]`
+    :return: JSON encoded reply line
+    """
+    request = request.decode('utf-8', 'replace').split()
+    interface = None
+    count = DEFAULT_QUERY_COUNT
+    try:
+        if request and request[0] != '*':
+            interface = request[0]
+        if len(request) > 1:
+            count = int(request[1])
+    except ValueError:
+        reply = {'error': 'usage: <interface or *> [count]'}
+    else:
+        if count < 1:
+            reply = {'error': 'count must be at least 1'}
+        else:
+            reply = history.query(interface, count)
+    return json.dumps(reply).encode('utf-8') + b'\n'
+
+
+class HistoryServer(object):
+    """
+    Serves a ChangeHistory on a Unix socket from a background thread.
+    """
+
+    def __init__(self, history, path=DEFAULT_SOCKET_PATH):
+        self.history = history
+        self.path = path
+        self._server = None
+
+    def start(self):
+        # only needed once the server runs, not on the daemon's import path
+        import socketserver
+
+        class QueryHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.wfile.write(answer_query(self.server.history, self.rfile.readline(1024)))
+
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        try:
+            server = socketserver.UnixStreamServer(self.path, QueryHandler)
+        except OSError:
+            logger.exception("Failed to listen for history queries on %s", self.path)
+            return
+        os.chmod(self.path, 0o600)
+        server.history = self.history
+        self._server = server
+        thread = threading.Thread(target=server.serve_forever, name='HistoryServer')
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def query_history(path=DEFAULT_SOCKET_PATH, interface=None, count=DEFAULT_QUERY_COUNT, timeout=5):
+    """
+    Ask a running daemon for its change history.
+    :return: list of event dicts, oldest first
+    """
+    import socket
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+        sock.sendall('{} {}\n'.format(interface or '*', count).encode('utf-8'))
+        with sock.makefile('rb') as reply:
+            return json.loads(reply.readline())
+    finally:
+        sock.close()
+
+
+def main(argv=None, out=sys.stdout):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m lldp_syncd history',
+                                     description="Show recent LLDP_ENTRY_TABLE changes of a running lldp_syncd")
+    parser.add_argument('interface', nargs='?', help="only changes of this interface")
+    parser.add_argument('-n', '--count', type=int, default=DEFAULT_QUERY_COUNT, help="number of events")
+    parser.add_argument('-s', '--socket', default=DEFAULT_SOCKET_PATH, help="query socket of the daemon")
+    args = parser.parse_args(argv)
+
+    try:
+        events = query_history(args.socket, args.interface, args.count)
+    except (OSError, ValueError) as e:
+        out.write("error: {}\n".format(e))
+        return 1
+    if isinstance(events, dict):
+        out.write("error: {}\n".format(events.get('error')))
+        return 1
+    for event in events:
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(event['time']))
+        line = "{}.{:03d} {} {} {}".format(stamp, int(event['time'] * 1000) % 1000, event['interface'],
+                                          event['op'], ','.join(event['fields']))
+        out.write(line.rstrip() + '\n')
+    return 0
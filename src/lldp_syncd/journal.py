@@ -0,0 +1,111 @@
+"""
+LLDP_ENTRY_TABLE generation counter and change journal.
+
+Every sync cycle that adds, rewrites or deletes LLDP_ENTRY_TABLE entries bumps the table
+generation and records which interfaces changed:
+
+    LLDP_ENTRY_GENERATION          {'epoch': <id>, 'generation': <g>, 'oldest': <oldest generation still journaled>}
+    LLDP_ENTRY_JOURNAL:<g>         {<interface>: 'set' | 'del', ...}
+
+Only the last `size` generations are kept. lldp_rem_time_mark refreshes do not bump the generation,
+since they happen for nearly every neighbor on every cycle.
+
+The epoch is a random id chosen whenever the writer (re)starts counting: on daemon start-up and on
+every full resync, e.g. after a reconnect, when APPL_DB may have been flushed and the generation
+reset. Generations are only comparable within one epoch.
+
+A reader remembers the epoch and generation it last processed and calls :func:`read_changes`; it only
+needs a full LLDP_ENTRY_TABLE rescan when the epoch changed or it fell behind the journal.
+"""
+import os
+
+DEFAULT_JOURNAL_SIZE = 64
+
+GENERATION_TABLE = 'LLDP_ENTRY_GENERATION'
+JOURNAL_TABLE = 'LLDP_ENTRY_JOURNAL'
+
+OP_SET = 'set'
+OP_DEL = 'del'
+
+
+def journal_key(generation):
+    return ':'.join([JOURNAL_TABLE, str(generation)])
+
+
+def read_generation(db_connector):
+    """
+    :return: (epoch, generation, oldest journaled generation), (None, 0, 0) if nothing was published yet
+    """
+    if not db_connector.exists(db_connector.APPL_DB, GENERATION_TABLE):
+        return None, 0, 0
+    meta = db_connector.get_all(db_connector.APPL_DB, GENERATION_TABLE)
+    return meta.get('epoch'), int(meta.get('generation', 0)), int(meta.get('oldest', 0))
+
+
+def read_changes(db_connector, since_epoch, since_generation):
+    """
+    Fetch the interfaces changed after `since_generation` of `since_epoch`.
+    :param since_epoch: epoch of the last processed generation, None before the first full scan
+    :return: (current epoch, current generation, dict of interface -> last op), or
+             (current epoch, current generation, None) if the caller must rescan the whole table
+    """
+    epoch, generation, oldest = read_generation(db_connector)
+    if since_epoch is None or since_epoch != epoch:
+        return epoch, generation, None
+    if since_generation == generation:
+        return epoch, generation, {}
+    if since_generation > generation or since_generation + 1 < oldest:
+        return epoch, generation, None
+
+    changes = {}
+    for gen in range(since_generation + 1, generation + 1):
+        key = journal_key(gen)
+        if not db_connector.exists(db_connector.APPL_DB, key):
+            return epoch, generation, None
+        changes.update(db_connector.get_all(db_connector.APPL_DB, key))
+    return epoch, generation, changes
+
+
+class ChangeJournal(object):
+    """
+    Writer side of the change journal, owned by LldpSyncDaemon.
+    """
+
+    def __init__(self, size=DEFAULT_JOURNAL_SIZE):
+        self.size = size
+        self.epoch = None
+        self.generation = None
+
+    def reset(self):
+        """
+        Re-read the generation from APPL_DB before the next record, under a new epoch, e.g. after a reconnect.
+        """
+        self.epoch = None
+        self.generation = None
+
+    def record(self, db_connector, changes):
+        """
+        Publish one cycle's changes.
+        :param changes: dict of interface -> OP_SET / OP_DEL
+        :return: the new generation, or None if there was nothing to record
+        """
+        if not changes:
+            return None
+        if self.generation is None:
+            # journal entries written before may not describe what APPL_DB holds now
+            self.epoch = os.urandom(8).hex()
+            _, self.generation, _ = read_generation(db_connector)
+
+        self.generation += 1
+        # the journal entry must exist before readers can observe the new generation
+        db_connector.hmset(db_connector.APPL_DB, journal_key(self.generation), changes)
+
+        stale_key = journal_key(self.generation - self.size)
+        if self.generation > self.size and db_connector.exists(db_connector.APPL_DB, stale_key):
+            db_connector.delete(db_connector.APPL_DB, stale_key)
+
+        db_connector.hmset(db_connector.APPL_DB, GENERATION_TABLE,
+                           {'epoch': self.epoch,
+                            'generation': str(self.generation),
+                            'oldest': str(max(1, self.generation - self.size + 1))})
+        return self.generation
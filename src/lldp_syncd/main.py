@@ -1,12 +1,149 @@
 from . import logger
-from .daemon import LldpSyncDaemon
 
 DEFAULT_UPDATE_FREQUENCY = 10
 
+# lldp_syncd's own command line switches, unknown to sonic_py_common.util.process_options: switch -> main() parameter
+DAEMON_OPTIONS = {
+    # withdraw/refresh neighbors on PORT_TABLE oper-status changes between polls
+    '--port-events': 'port_events',
+    # keep a change history, queried with `python -m lldp_syncd history`; per-change log lines move from INFO to DEBUG
+    '--history': 'history',
+    # write the LLDP_ENTRY_TABLE changes of a cycle in one round trip
+    '--batch-writes': 'batch_writes',
+    # hold flapping neighbors back from APPL_DB until they settle
+    '--dampening': 'dampening',
+    # keep a journal of LLDP_ENTRY_TABLE changes, so that consumers read deltas instead of rescanning the table
+    '--journal': 'journal',
+    # maintain reverse indexes of the neighbors by remote chassis ID and management address
+    '--neighbor-index': 'neighbor_index',
+}
+
+
+def _fields(value):
+    from .fields import FieldProjection
+    # rejects unknown names up front
+    return FieldProjection(name for name in value.split(',') if name).fields
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise ValueError("must be at least 1")
+    return number
+
+
+def _seconds(value):
+    seconds = float(value)
+    if seconds <= 0:
+        raise ValueError("must be positive")
+    return seconds
+
+
+def _write_rate(value):
+    commands_per_second, bytes_per_second = (float(rate) for rate in value.split(','))
+    if commands_per_second <= 0 or bytes_per_second <= 0:
+        raise ValueError("rates must be positive")
+    return commands_per_second, bytes_per_second
+
+
+# lldp_syncd's own command line options taking a value, given as --option=VALUE: option -> (main() parameter,
+# value parser)
+DAEMON_VALUE_OPTIONS = {
+    # LLDP_ENTRY_TABLE fields to parse and publish, comma-separated (see lldp_syncd.fields)
+    '--fields': ('fields', _fields),
+    # file to checkpoint the parsed caches to after each cycle, restored from on start-up
+    '--snapshot': ('snapshot_path', str),
+    # LLDP_ENTRY_TABLE write budget, as COMMANDS_PER_SECOND,BYTES_PER_SECOND
+    '--write-rate': ('write_rate', _write_rate),
+    # parse large lldpctl dumps in a pool of this many processes
+    '--parse-processes': ('parse_processes', _positive_int),
+    # swap in full resyncs, and cycles rewriting at least this many entries, through a shadow table
+    '--table-swap-threshold': ('table_swap_threshold', _positive_int),
+    # maximum age, in seconds, of LLDP_ENTRY_TABLE before lldpd is restarted; freshness is published alongside
+    '--freshness-slo': ('freshness_slo', _seconds),
+}
+
+
+def parse_daemon_options(argv):
+    """
+    Take lldp_syncd's own options out of a command line.
+    :param argv: command line arguments, without the program name
+    :return: (dict of main() keyword arguments, remaining arguments)
+    :raises ValueError: if an option's value is missing or malformed
+    """
+    options = {}
+    remaining = []
+    for arg in argv:
+        option, _, value = arg.partition('=')
+        if arg in DAEMON_OPTIONS:
+            options[DAEMON_OPTIONS[arg]] = True
+        elif option in DAEMON_VALUE_OPTIONS:
+            parameter, parse = DAEMON_VALUE_OPTIONS[option]
+            if not value:
+                raise ValueError("{} requires a value, as {}=VALUE".format(option, option))
+            try:
+                options[parameter] = parse(value)
+            except ValueError as e:
+                raise ValueError("Invalid value for {}: {}".format(option, e))
+        else:
+            remaining.append(arg)
+    return options, remaining
+
+
+def main(update_frequency=None, port_events=False, history=False, batch_writes=False, dampening=False, journal=False,
+         neighbor_index=False, fields=None, snapshot_path=None, write_rate=None, parse_processes=0,
+         table_swap_threshold=0, freshness_slo=0):
+    """
+    :param port_events: subscribe to PORT_TABLE oper-status changes, withdrawing the neighbors of ports that go
+                        down and refreshing ports that come up without waiting for the next poll
+    :param history: keep the LLDP_ENTRY_TABLE change history and serve it on DEFAULT_SOCKET_PATH; the per-change
+                    log lines are then logged at DEBUG instead of INFO
+    :param batch_writes: write the LLDP_ENTRY_TABLE changes of a cycle in one round trip
+    :param dampening: dampen flapping neighbors with the default NeighborDampener settings
+    :param journal: keep the last DEFAULT_JOURNAL_SIZE generations of LLDP_ENTRY_TABLE changes in APPL_DB
+    :param neighbor_index: maintain the reverse indexes of lldp_syncd.neighbor_index in APPL_DB
+    :param fields: LLDP_ENTRY_TABLE fields to parse and publish, all LLDP-MIB remote entry fields by default
+    :param snapshot_path: file to checkpoint the parsed caches to, and to warm restart from
+    :param write_rate: (commands per second, bytes per second) budget of the LLDP_ENTRY_TABLE writes, spread by a
+                       sonic_syncd.scheduler.WriteScheduler; unlimited by default
+    :param parse_processes: parse large dumps in a pool of this many processes (0 parses serially)
+    :param table_swap_threshold: publish full resyncs, and cycles rewriting at least this many entries, by
+                                 atomically swapping in a shadow copy of LLDP_ENTRY_TABLE (0 writes incrementally)
+    :param freshness_slo: maximum age (in seconds) of LLDP_ENTRY_TABLE before the watchdog escalates, published to
+                          LLDP_ENTRY_FRESHNESS with the cycle latencies (0 disables both)
+    """
+    # imported here, after __main__ has configured logging
+    from .daemon import LldpSyncDaemon
+    from .history import DEFAULT_HISTORY_SIZE, DEFAULT_SOCKET_PATH
+    from .journal import DEFAULT_JOURNAL_SIZE
 
-def main(update_frequency=None):
     try:
-        lldp_syncd = LldpSyncDaemon(update_frequency or DEFAULT_UPDATE_FREQUENCY)
+        event_source = None
+        if port_events:
+            from sonic_syncd.events import PortStatusEventSource
+            event_source = PortStatusEventSource()
+        dampener = None
+        if dampening:
+            from .dampening import NeighborDampener
+            dampener = NeighborDampener()
+        write_scheduler = None
+        if write_rate is not None:
+            from sonic_syncd.scheduler import WriteScheduler
+            write_scheduler = WriteScheduler(*write_rate)
+        lldp_syncd = LldpSyncDaemon(update_frequency or DEFAULT_UPDATE_FREQUENCY,
+                                    dampener=dampener,
+                                    journal_size=DEFAULT_JOURNAL_SIZE if journal else 0,
+                                    neighbor_index=neighbor_index,
+                                    fields=fields,
+                                    snapshot_path=snapshot_path,
+                                    write_scheduler=write_scheduler,
+                                    parse_processes=parse_processes,
+                                    table_swap_threshold=table_swap_threshold,
+                                    freshness_slo=freshness_slo,
+                                    event_source=event_source,
+                                    history_size=DEFAULT_HISTORY_SIZE if history else 0,
+                                    history_socket=DEFAULT_SOCKET_PATH if history else None,
+                                    batch_writes=batch_writes)
         logger.info('Starting SONiC LLDP sync daemon...')
         lldp_syncd.start()
         lldp_syncd.join()
@@ -0,0 +1,105 @@
+"""
+Reverse indexes over LLDP_ENTRY_TABLE, kept in APPL_DB:
+
+    LLDP_REM_CHASSIS_INDEX:<lldp_rem_chassis_id>    {'ports': 'Ethernet0,Ethernet4'}
+    LLDP_REM_MAN_ADDR_INDEX:<management address>    {'ports': 'Ethernet0'}
+
+The indexes are maintained from the per-cycle change set computed by `LldpSyncDaemon.sync`, so
+their cost is proportional to the number of changed neighbors rather than the number of ports.
+"""
+from collections import defaultdict
+
+CHASSIS_INDEX_TABLE = 'LLDP_REM_CHASSIS_INDEX'
+MAN_ADDR_INDEX_TABLE = 'LLDP_REM_MAN_ADDR_INDEX'
+PORTS_FIELD = 'ports'
+
+
+def index_key(table, value):
+    return ':'.join([table, value])
+
+
+def lookup_ports(db_connector, table, value):
+    """
+    :return: set of local ports whose neighbor has `value` in the given index table
+    """
+    key = index_key(table, value)
+    if not db_connector.exists(db_connector.APPL_DB, key):
+        return set()
+    ports = db_connector.get(db_connector.APPL_DB, key, PORTS_FIELD)
+    return set(ports.split(',')) if ports else set()
+
+
+def neighbor_index_values(interface):
+    """
+    :return: tuple of (table, value) pairs under which a parsed interface is indexed
+    """
+    values = []
+    chassis_id = interface.get('lldp_rem_chassis_id')
+    if chassis_id:
+        values.append((CHASSIS_INDEX_TABLE, chassis_id))
+    man_addr = interface.get('lldp_rem_man_addr')
+    if man_addr:
+        values.extend((MAN_ADDR_INDEX_TABLE, addr) for addr in man_addr.split(','))
+    return tuple(values)
+
+
+class NeighborIndex(object):
+    """
+    In-memory mirror of the reverse index tables; only the touched index keys are rewritten.
+    """
+
+    def __init__(self):
+        # (table, value) -> set of ports
+        self._ports = defaultdict(set)
+        # port -> indexed (table, value) pairs
+        self._values = {}
+        self._purged = False
+
+    def ports(self, table, value):
+        return set(self._ports.get((table, value), ()))
+
+    def update(self, db_connector, interfaces, changes):
+        """
+        Apply one cycle's changes.
+        :param interfaces: dict of interface -> parsed attributes after the cycle
+        :param changes: dict of interface -> 'set' / 'del', as recorded by sync
+        """
+        if not self._purged:
+            self._purge(db_connector)
+
+        dirty = set()
+        for port in changes:
+            old_values = self._values.get(port, ())
+            new_values = neighbor_index_values(interfaces[port]) if port in interfaces else ()
+            if old_values == new_values:
+                continue
+
+            for slot in old_values:
+                self._ports[slot].discard(port)
+                dirty.add(slot)
+            for slot in new_values:
+                self._ports[slot].add(port)
+                dirty.add(slot)
+            if new_values:
+                self._values[port] = new_values
+            else:
+                self._values.pop(port, None)
+
+        for slot in dirty:
+            key = index_key(*slot)
+            ports = self._ports.get(slot)
+            if ports:
+                db_connector.hmset(db_connector.APPL_DB, key, {PORTS_FIELD: ','.join(sorted(ports))})
+            else:
+                self._ports.pop(slot, None)
+                if db_connector.exists(db_connector.APPL_DB, key):
+                    db_connector.delete(db_connector.APPL_DB, key)
+
+    def _purge(self, db_connector):
+        """
+        Drop index entries left behind by a previous run; they are rebuilt from the first full update.
+        """
+        for table in (CHASSIS_INDEX_TABLE, MAN_ADDR_INDEX_TABLE):
+            for key in db_connector.keys(db_connector.APPL_DB, index_key(table, '*')) or []:
+                db_connector.delete(db_connector.APPL_DB, key)
+        self._purged = True
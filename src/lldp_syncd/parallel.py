@@ -0,0 +1,146 @@
+"""
+Parallel parsing of large lldpctl dumps.
+
+:class:`ParallelParser` parses dumps of at least `threshold` interfaces in a process pool that is
+kept across cycles. The parent decodes the dump once and sends each worker only its share of the
+interfaces, a contiguous slice, so the merged result keeps the dump's order and is identical to a
+serial parse. Decoding in the parent and pickling the slices costs about as much as one worker
+decoding the whole dump did, and spares the other workers from decoding it again. Workers run the
+module-level parsers of lldp_syncd.daemon with their own FieldProjection; no daemon is built in
+a worker.
+
+Log records emitted while parsing in a worker (e.g. the rate-limited capability messages) are
+returned with the results and re-emitted on the parent's `lldp_syncd` logger. Rate limiting
+applies per worker process, so a message can be repeated once per worker within an interval.
+
+Workers are started with the 'forkserver' method (or 'spawn' where unavailable), never by forking
+the multi-threaded daemon.
+"""
+import logging
+import os
+
+from . import logger
+
+# interfaces in an lldpctl dump (about 1 MB of output)
+DEFAULT_THRESHOLD = 1000
+
+# (FieldProjection, RateLimitedLogger, _RecordBuffer) of a worker process, created by _init_worker
+_worker_state = None
+
+
+class _RecordBuffer(logging.Handler):
+    """
+    Collects the log records of a worker, flattened to picklable dicts as QueueHandler does.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        attributes = dict(record.__dict__)
+        attributes['msg'] = record.getMessage()
+        attributes['args'] = None
+        if record.exc_info:
+            attributes['exc_text'] = logging.Formatter().formatException(record.exc_info)
+        attributes['exc_info'] = None
+        self.records.append(attributes)
+
+    def drain(self):
+        records, self.records = self.records, []
+        return records
+
+
+def _init_worker(fields, log_level):
+    global _worker_state
+    from sonic_syncd.logutil import RateLimitedLogger
+    from .fields import FieldProjection
+
+    buffer = _RecordBuffer()
+    # the worker's records only go back to the parent
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(buffer)
+    logger.setLevel(log_level)
+    logger.propagate = False
+    _worker_state = (FieldProjection(fields), RateLimitedLogger(logger), buffer)
+
+
+def _parse_part(items):
+    """
+    :param items: list of (interface name, lldpd attributes)
+    :return: (list of (interface name, parsed (field, value) pairs), log records)
+    """
+    from .daemon import parse_interface
+
+    projection, rate_limited_log, buffer = _worker_state
+    try:
+        parsed = [(if_name, parse_interface(if_name, if_attributes, projection, rate_limited_log))
+                  for if_name, if_attributes in items]
+    finally:
+        records = buffer.drain()
+    return parsed, records
+
+
+class ParallelParser(object):
+    """
+    Parses the interfaces of large dumps in a reusable process pool.
+    """
+
+    def __init__(self, fields=None, processes=None, threshold=DEFAULT_THRESHOLD):
+        """
+        :param fields: LLDP_ENTRY_TABLE fields to parse, as for LldpSyncDaemon
+        :param processes: number of worker processes (default: number of CPUs)
+        :param threshold: smallest number of interfaces worth parsing in parallel
+        """
+        self.fields = fields
+        self.processes = processes or os.cpu_count() or 1
+        self.threshold = threshold
+        self._executor = None
+
+    def _pool(self):
+        if self._executor is None:
+            # imported on first use, keeping them off the daemon's start-up path
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            self._executor = ProcessPoolExecutor(self.processes, mp_context=context, initializer=_init_worker,
+                                                 initargs=(self.fields, logger.getEffectiveLevel()))
+        return self._executor
+
+    def wants(self, items):
+        """
+        :param items: list of (interface name, lldpd attributes) of a dump
+        :return: True if `items` should be parsed in parallel
+        """
+        return len(items) >= self.threshold
+
+    def parse(self, items):
+        """
+        :param items: list of (interface name, lldpd attributes) of a dump
+        :return: list of (interface name, parsed (field, value) pairs) in the dump's order, or None if the
+                 pool is unusable and the caller should parse serially
+        :raises KeyError, ValueError: as the serial parser would for malformed interfaces
+        """
+        parts = self.processes
+        slices = [items[len(items) * index // parts:len(items) * (index + 1) // parts] for index in range(parts)]
+        try:
+            results = list(self._pool().map(_parse_part, slices))
+        except (RuntimeError, OSError):
+            # BrokenProcessPool is a RuntimeError
+            logger.exception("Parallel parse failed, falling back to serial parsing")
+            self.close()
+            return None
+        parsed_items = []
+        for parsed, records in results:
+            parsed_items.extend(parsed)
+            for record in records:
+                logger.handle(logging.makeLogRecord(record))
+        return parsed_items
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,213 @@
+"""
+Offline replay of captured lldpctl output through the parse / diff / sync pipeline.
+
+    python -m lldp_syncd replay [--dry-run] [--chassis FILE] [--fields F1,F2] lldpctl.json [more.json ...]
+
+Every file is one cycle, in order, as if produced by consecutive `lldpctl -f json` runs, and is
+diffed against the daemon's caches from the previous cycle. Writes go to an in-memory APPL_DB, or
+with --dry-run are only recorded, so APPL_DB reads always see an empty database. For every cycle
+the exact redis operations are printed, followed by per-stage timings and peak traced memory.
+Timings come from a pass without tracemalloc, which would inflate them several-fold; peak memory
+from a second pass over the same files under tracemalloc (skipped with --no-memory).
+Needs neither lldpd, redis nor swsscommon.
+"""
+import argparse
+import fnmatch
+import json
+import logging
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from sonic_syncd.connection import DBConnectionManager
+
+from . import logger
+from .daemon import LldpSyncDaemon
+
+STAGES = ('read', 'decode', 'parse', 'diff', 'sync')
+
+
+class MemoryConnector(object):
+    """
+    In-memory stand-in for SonicV2Connector that records every write issued through it.
+    """
+    APPL_DB = 0
+
+    def __init__(self, dry_run=False):
+        """
+        :param dry_run: record writes without applying them
+        """
+        self.dry_run = dry_run
+        self.data = {}
+        # list of (command, args...) in issue order
+        self.operations = []
+
+    def connect(self, db_id, retry_on=False):
+        pass
+
+    def exists(self, db_id, key):
+        return key in self.data
+
+    def keys(self, db_id, pattern='*'):
+        return [key for key in self.data if fnmatch.fnmatchcase(key, pattern)]
+
+    def get(self, db_id, key, field):
+        return self.data.get(key, {}).get(field)
+
+    def get_all(self, db_id, key):
+        return dict(self.data.get(key, {}))
+
+    def set(self, db_id, key, field, value, blocking=False):
+        self.operations.append(('HSET', key, field, value))
+        if not self.dry_run:
+            self.data.setdefault(key, {})[field] = value
+
+    def hmset(self, db_id, key, fieldsvalues):
+        args = []
+        for field, value in fieldsvalues.items():
+            args.extend((field, value))
+        self.operations.append(('HSET', key) + tuple(args))
+        if not self.dry_run:
+            self.data.setdefault(key, {}).update(fieldsvalues)
+
+    def delete(self, db_id, key):
+        self.operations.append(('DEL', key))
+        if not self.dry_run:
+            self.data.pop(key, None)
+
+
+def format_operation(operation):
+    return ' '.join(json.dumps(arg) if (' ' in arg or not arg) else arg for arg in operation)
+
+
+def run_cycle(daemon, connector, path, chassis_json):
+    """
+    Replay one captured dump.
+    :return: dict of stage -> seconds
+    """
+    timings = dict.fromkeys(STAGES, 0.0)
+
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        raw = f.read()
+    timings['read'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lldp_json = json.loads(raw)
+    if chassis_json is not None:
+        lldp_json['lldp_loc_chassis'] = chassis_json
+    timings['decode'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parsed_update = daemon.parse_update(lldp_json)
+    timings['parse'] = time.perf_counter() - start
+    if parsed_update is None:
+        raise ValueError("failed to parse {}".format(path))
+
+    diff_seconds = daemon.diff_seconds
+    start = time.perf_counter()
+    daemon.sync(parsed_update)
+    timings['diff'] = daemon.diff_seconds - diff_seconds
+    timings['sync'] = time.perf_counter() - start - timings['diff']
+    return timings
+
+
+def create_daemon(args):
+    """
+    :return: (LldpSyncDaemon, MemoryConnector) starting from an empty APPL_DB
+    """
+    connector = MemoryConnector(dry_run=args.dry_run)
+    fields = args.fields.split(',') if args.fields else None
+    daemon = LldpSyncDaemon(fields=fields, parse_processes=args.parse_processes,
+                            connection=DBConnectionManager(connector_factory=lambda use_unix_socket_path: connector))
+    return daemon, connector
+
+
+def measure_peaks(args, chassis_json):
+    """
+    Replay the files again under tracemalloc.
+    :return: list of peak traced memory (in bytes) per cycle
+    """
+    daemon, connector = create_daemon(args)
+    peaks = []
+    tracemalloc.start()
+    try:
+        for path in args.files:
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            run_cycle(daemon, connector, path, chassis_json)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+        daemon.stop()
+    return peaks
+
+
+def main(argv=None, out=sys.stdout):
+    parser = argparse.ArgumentParser(prog='python -m lldp_syncd replay', description=__doc__.split('\n\n')[0])
+    parser.add_argument('files', nargs='+', metavar='FILE', help="lldpctl -f json output, one file per cycle")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="record writes without applying them to the in-memory APPL_DB")
+    parser.add_argument('--chassis', metavar='FILE',
+                        help="lldpcli -f json show chassis output, overriding any 'lldp_loc_chassis' in the files")
+    parser.add_argument('--fields', help="comma-separated LLDP_ENTRY_TABLE fields to publish")
+    parser.add_argument('--parse-processes', type=int, default=0, metavar='N',
+                        help="parse large dumps in a pool of N processes")
+    parser.add_argument('--quiet', '-q', action='store_true', help="do not print the redis operations")
+    parser.add_argument('--no-memory', action='store_true', help="skip the peak memory pass")
+    parser.add_argument('--log-level', help="log daemon messages to stderr at this level, e.g. DEBUG")
+    args = parser.parse_args(argv)
+
+    if args.log_level:
+        logger.addHandler(logging.StreamHandler(sys.stderr))
+        logger.setLevel(args.log_level.upper())
+
+    chassis_json = None
+    if args.chassis:
+        with open(args.chassis) as f:
+            chassis_json = json.load(f)
+
+    daemon, connector = create_daemon(args)
+    # per cycle: (operations, interface count, timings)
+    cycles = []
+    try:
+        for path in args.files:
+            del connector.operations[:]
+            timings = run_cycle(daemon, connector, path, chassis_json)
+            cycles.append((list(connector.operations), len(daemon.interfaces_cache), timings))
+        peaks = None if args.no_memory else measure_peaks(args, chassis_json)
+    except (OSError, ValueError) as e:
+        out.write("error: {}\n".format(e))
+        return 1
+    finally:
+        daemon.stop()
+
+    totals = dict.fromkeys(STAGES, 0.0)
+    for cycle, (path, (operations, interfaces, timings)) in enumerate(zip(args.files, cycles), 1):
+        out.write("cycle {}: {}\n".format(cycle, path))
+        if not args.quiet:
+            for operation in operations:
+                out.write("  {}\n".format(format_operation(operation)))
+        out.write("  {} redis operations, {} interfaces\n".format(len(operations), interfaces))
+        out.write("  " + "  ".join("{} {:.3f} ms".format(stage, timings[stage] * 1000) for stage in STAGES))
+        out.write("  total {:.3f} ms".format(sum(timings.values()) * 1000))
+        if peaks is not None:
+            out.write("  peak {:.1f} KiB".format(peaks[cycle - 1] / 1024))
+        out.write("\n")
+        for stage in STAGES:
+            totals[stage] += timings[stage]
+
+    out.write("{} cycles: ".format(len(args.files)))
+    out.write("  ".join("{} {:.3f} ms".format(stage, totals[stage] * 1000) for stage in STAGES))
+    if peaks is not None:
+        out.write("  peak {:.1f} KiB".format(max(peaks) / 1024))
+    if resource is not None:
+        # kilobytes on Linux
+        out.write("  max RSS {} KiB".format(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+    out.write("\n")
+    return 0
@@ -0,0 +1,115 @@
+"""
+On-disk snapshot of the parsed LLDP caches, used to avoid rewriting APPL_DB after a restart.
+
+The file is a sequence of length-prefixed records, read back through mmap:
+
+    magic      b'LLDPSNP1'
+    chassis    <record>
+    count      uint32
+    interfaces <record> * count
+
+    record     := string name, uint32 field count, (string field, string value) * field count
+    string     := uint32 byte length, UTF-8 bytes
+
+All integers are little-endian. Snapshots are written to a temporary file and renamed into place,
+so a reader never sees a partial snapshot.
+"""
+import mmap
+import os
+import struct
+
+MAGIC = b'LLDPSNP1'
+
+_UINT32 = struct.Struct('<I')
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _pack_string(chunks, value):
+    data = value.encode('utf-8')
+    chunks.append(_UINT32.pack(len(data)))
+    chunks.append(data)
+
+
+def _pack_record(chunks, name, fields):
+    _pack_string(chunks, name)
+    chunks.append(_UINT32.pack(len(fields)))
+    for field, value in fields.items():
+        _pack_string(chunks, field)
+        _pack_string(chunks, value)
+
+
+def save_snapshot(path, chassis_cache, interfaces_cache):
+    """
+    Atomically write the caches to `path`.
+    """
+    chunks = [MAGIC]
+    _pack_record(chunks, 'local-chassis', chassis_cache)
+    chunks.append(_UINT32.pack(len(interfaces_cache)))
+    for if_name, fields in interfaces_cache.items():
+        _pack_record(chunks, if_name, fields)
+
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(chunks))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class _Reader(object):
+    __slots__ = ('buf', 'offset')
+
+    def __init__(self, buf, offset):
+        self.buf = buf
+        self.offset = offset
+
+    def uint32(self):
+        if self.offset + 4 > len(self.buf):
+            raise SnapshotError("truncated snapshot")
+        value, = _UINT32.unpack_from(self.buf, self.offset)
+        self.offset += 4
+        return value
+
+    def string(self):
+        length = self.uint32()
+        end = self.offset + length
+        if end > len(self.buf):
+            raise SnapshotError("truncated snapshot")
+        value = self.buf[self.offset:end].decode('utf-8')
+        self.offset = end
+        return value
+
+    def record(self):
+        name = self.string()
+        fields = {}
+        for _ in range(self.uint32()):
+            field = self.string()
+            fields[field] = self.string()
+        return name, fields
+
+
+def load_snapshot(path):
+    """
+    :return: (chassis_cache, interfaces_cache) as saved by `save_snapshot`
+    :raises SnapshotError: if the file is not a valid snapshot
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < len(MAGIC):
+            raise SnapshotError("truncated snapshot")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if buf[:len(MAGIC)] != MAGIC:
+                raise SnapshotError("bad snapshot magic")
+            reader = _Reader(buf, len(MAGIC))
+            _, chassis_cache = reader.record()
+            interfaces_cache = dict(reader.record() for _ in range(reader.uint32()))
+    return chassis_cache, interfaces_cache
@@ -0,0 +1,173 @@
+"""
+Bounded, concurrent execution of source commands.
+
+:class:`CommandRunner` starts all requested commands at once and multiplexes their stdout pipes on a
+single selector, so a slow command does not serialize the others. Each command has its own
+deadline; a child that overruns it is sent SIGTERM, then SIGKILL after a grace period, and is
+always reaped. Output is read straight into per-slot bytearrays that are kept and reused across
+calls instead of accumulating chunk copies.
+"""
+import os
+import selectors
+import subprocess
+import time
+
+from . import logger
+
+DEFAULT_COMMAND_TIMEOUT = 10
+DEFAULT_KILL_GRACE = 1
+# how often a command that closed its stdout is checked for having exited
+EXIT_POLL_INTERVAL = 0.01
+INITIAL_BUFFER_SIZE = 64 * 1024
+
+
+class CommandResult(object):
+    __slots__ = ('cmd', 'output', 'returncode', 'timed_out', 'duration', 'error')
+
+    def __init__(self, cmd, output=b'', returncode=None, timed_out=False, duration=0.0, error=None):
+        self.cmd = cmd
+        self.output = output
+        self.returncode = returncode
+        self.timed_out = timed_out
+        self.duration = duration
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and not self.timed_out and self.error is None
+
+    def __repr__(self):
+        return "CommandResult(cmd={!r}, returncode={!r}, timed_out={!r}, duration={:.3f}, error={!r})".format(
+            self.cmd, self.returncode, self.timed_out, self.duration, self.error)
+
+
+class _RunningCommand(object):
+    __slots__ = ('slot', 'cmd', 'proc', 'buffer', 'length', 'start', 'deadline', 'result')
+
+    def __init__(self, slot, cmd, proc, buffer, start, deadline):
+        self.slot = slot
+        self.cmd = cmd
+        self.proc = proc
+        self.buffer = buffer
+        self.length = 0
+        self.start = start
+        self.deadline = deadline
+        self.result = None
+
+
+class CommandRunner(object):
+    """
+    Runs batches of commands concurrently with per-command timeouts.
+    """
+
+    def __init__(self, timeout=DEFAULT_COMMAND_TIMEOUT, kill_grace=DEFAULT_KILL_GRACE, clock=time.monotonic):
+        """
+        :param timeout: default time (in seconds) each command may run
+        :param kill_grace: time between SIGTERM and SIGKILL for an overrunning command
+        """
+        self.timeout = timeout
+        self.kill_grace = kill_grace
+        self._clock = clock
+        # slot -> bytearray reused across runs
+        self._buffers = {}
+
+    def run(self, cmds, timeout=None):
+        """
+        Execute commands concurrently.
+        :param cmds: list of argv lists
+        :param timeout: per-command timeout overriding the default
+        :return: list of CommandResult, in the order of `cmds`
+        """
+        timeout = self.timeout if timeout is None else timeout
+        selector = selectors.DefaultSelector()
+        running = []
+        # commands that closed stdout but have not exited yet
+        exiting = []
+        try:
+            for slot, cmd in enumerate(cmds):
+                command = self._spawn(slot, cmd, timeout)
+                running.append(command)
+                if command.result is None:
+                    selector.register(command.proc.stdout, selectors.EVENT_READ, command)
+
+            while selector.get_map() or exiting:
+                now = self._clock()
+                for command in list(exiting):
+                    if command.proc.poll() is not None or now >= command.deadline:
+                        exiting.remove(command)
+                        self._finish(command, timed_out=command.proc.returncode is None)
+                for command in [key.data for key in selector.get_map().values()]:
+                    if now >= command.deadline:
+                        selector.unregister(command.proc.stdout)
+                        self._finish(command, timed_out=True)
+
+                pending = [key.data for key in selector.get_map().values()] + exiting
+                if not pending:
+                    break
+                wait = min(command.deadline for command in pending) - now
+                if exiting:
+                    # the exit is not a selectable event: never block on it, poll
+                    wait = min(wait, EXIT_POLL_INTERVAL)
+                for key, _ in selector.select(max(wait, 0)):
+                    command = key.data
+                    if not self._read(command):
+                        selector.unregister(command.proc.stdout)
+                        if command.proc.poll() is None:
+                            exiting.append(command)
+                        else:
+                            self._finish(command)
+        finally:
+            selector.close()
+            for command in running:
+                if command.result is None:
+                    self._finish(command, timed_out=True)
+
+        return [command.result for command in running]
+
+    def _spawn(self, slot, cmd, timeout):
+        start = self._clock()
+        buffer = self._buffers.get(slot)
+        if buffer is None:
+            buffer = self._buffers[slot] = bytearray(INITIAL_BUFFER_SIZE)
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stdin=subprocess.DEVNULL)
+        except OSError as e:
+            command = _RunningCommand(slot, cmd, None, buffer, start, start)
+            command.result = CommandResult(cmd, error=e)
+            return command
+        return _RunningCommand(slot, cmd, proc, buffer, start, start + timeout)
+
+    def _read(self, command):
+        """
+        Read what is available into the command's buffer.
+        :return: False on EOF
+        """
+        buffer = command.buffer
+        if command.length == len(buffer):
+            buffer.extend(bytes(len(buffer)))
+        with memoryview(buffer) as view:
+            count = os.readv(command.proc.stdout.fileno(), [view[command.length:]])
+        command.length += count
+        return count > 0
+
+    def _finish(self, command, timed_out=False):
+        proc = command.proc
+        if timed_out:
+            self._kill(proc)
+        proc.stdout.close()
+
+        with memoryview(command.buffer) as view:
+            output = bytes(view[:command.length])
+        command.result = CommandResult(command.cmd, output, proc.returncode, timed_out,
+                                       self._clock() - command.start)
+
+    def _kill(self, proc):
+        if proc.poll() is not None:
+            return
+        logger.warning("Command %s timed out, terminating pid %d", proc.args, proc.pid)
+        proc.terminate()
+        try:
+            proc.wait(self.kill_grace)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
@@ -0,0 +1,170 @@
+"""
+Resilient database connection handling for sync daemons.
+
+:class:`DBConnectionManager` owns a SonicV2Connector. It connects lazily on first use, prefers the
+redis Unix socket over TCP, and after a failure only retries once a jittered exponential backoff
+has elapsed, so a dead redis is not hammered every cycle. The owner reports failed operations with
+:meth:`DBConnectionManager.invalidate` and is told through `on_reconnect` whenever a new connection
+replaces a lost one, so it can resync everything it had cached.
+"""
+import random
+import re
+import sys
+import time
+
+from . import logger
+
+DEFAULT_BACKOFF_INITIAL = 0.5
+DEFAULT_BACKOFF_MAX = 30
+HEALTH_CHECK_KEY = 'SONIC_SYNCD_HEALTH_CHECK'
+
+# swsscommon reports redis I/O failures as RuntimeError (std::system_error) with one of these messages
+SWSSCOMMON_CONNECTION_ERROR_RE = re.compile(r'Unable to connect to redis|Failed to redis\w+|'
+                                            r'[Cc]onnection (reset|refused|lost|closed)')
+
+
+def is_connection_error(e):
+    """
+    :return: True if `e` means the database connection is broken, as opposed to any other failure
+    """
+    if isinstance(e, (ConnectionError, TimeoutError)):
+        return True
+    # redis-py (used by swsssdk) is not imported here: its exceptions cannot be raised unless it is loaded
+    redis_exceptions = sys.modules.get('redis.exceptions')
+    if redis_exceptions is not None and isinstance(e, (redis_exceptions.ConnectionError,
+                                                       redis_exceptions.TimeoutError)):
+        return True
+    return type(e) is RuntimeError and SWSSCOMMON_CONNECTION_ERROR_RE.search(str(e)) is not None
+
+
+class DBUnavailableError(RuntimeError):
+    """
+    Raised while the database is unreachable and the next reconnect attempt is not due yet.
+    """
+    pass
+
+
+def default_connector_factory(use_unix_socket_path):
+    from swsscommon.swsscommon import SonicV2Connector
+    return SonicV2Connector(use_unix_socket_path=use_unix_socket_path)
+
+
+def redis_script_runner(db_connector, db_name='APPL_DB'):
+    """
+    :return: callable(script, keys, argv) running a Lua script on `db_name` through swsscommon
+    """
+    from swsscommon import swsscommon
+
+    connector = db_connector.get_redis_client(db_name)
+
+    def run(script, keys, argv):
+        sha = swsscommon.loadRedisScript(connector, script)
+        return swsscommon.runRedisScript(connector, sha, keys, argv)
+    return run
+
+
+class DBConnectionManager(object):
+    """
+    Lazily connected, self-healing handle on one database.
+    """
+
+    def __init__(self, db_name='APPL_DB', connector_factory=default_connector_factory, prefer_unix_socket=True,
+                 backoff_initial=DEFAULT_BACKOFF_INITIAL, backoff_max=DEFAULT_BACKOFF_MAX, on_reconnect=None,
+                 clock=time.monotonic):
+        """
+        :param db_name: name of the connector's database attribute, e.g. 'APPL_DB'
+        :param connector_factory: callable(use_unix_socket_path) returning an unconnected SonicV2Connector
+        :param prefer_unix_socket: try the Unix socket before falling back to TCP
+        :param on_reconnect: called without arguments after a lost connection has been re-established
+        """
+        self.db_name = db_name
+        self.connector_factory = connector_factory
+        self.prefer_unix_socket = prefer_unix_socket
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.on_reconnect = on_reconnect
+        self._clock = clock
+        self._connector = None
+        self._ever_connected = False
+        self._failures = 0
+        self._next_attempt = 0
+        self.reconnects = 0
+
+    @property
+    def connected(self):
+        return self._connector is not None
+
+    def get(self):
+        """
+        :return: a connected SonicV2Connector
+        :raises DBUnavailableError: while backing off after a failed attempt
+        """
+        if self._connector is None:
+            self.connect()
+        return self._connector
+
+    def connect(self):
+        """
+        Open a new connection, unless the backoff after the previous failure has not elapsed yet.
+        """
+        now = self._clock()
+        if self._failures and now < self._next_attempt:
+            raise DBUnavailableError("{} unavailable, next reconnect attempt in {:.1f}s".format(
+                self.db_name, self._next_attempt - now))
+
+        try:
+            connector = self._open()
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            self._failures += 1
+            delay = min(self.backoff_max, self.backoff_initial * 2 ** (self._failures - 1))
+            # equal jitter: wait between half and the full backoff delay
+            self._next_attempt = now + delay / 2 + random.uniform(0, delay / 2)
+            raise
+
+        self._connector = connector
+        self._failures = 0
+        if self._ever_connected:
+            self.reconnects += 1
+            logger.info("Reconnected to %s", self.db_name)
+            if self.on_reconnect is not None:
+                self.on_reconnect()
+        self._ever_connected = True
+
+    def _open(self):
+        transports = (True, False) if self.prefer_unix_socket else (False,)
+        for attempt, use_unix_socket_path in enumerate(transports, 1):
+            try:
+                connector = self.connector_factory(use_unix_socket_path)
+                # swsscommon retries forever by default, which would bypass the backoff and the TCP fallback
+                connector.connect(getattr(connector, self.db_name), retry_on=False)
+                return connector
+            except Exception as e:
+                if not is_connection_error(e) or attempt == len(transports):
+                    raise
+                logger.warning("Failed to connect to %s over the Unix socket, falling back to TCP", self.db_name)
+
+    def invalidate(self):
+        """
+        Drop the current connection after an operation on it failed.
+        """
+        if self._connector is not None:
+            logger.warning("Connection to %s lost", self.db_name)
+        self._connector = None
+
+    def check_health(self):
+        """
+        Round-trip to the database; drops the connection if it is broken.
+        :return: True if connected and responsive
+        """
+        if self._connector is None:
+            return False
+        try:
+            self._connector.exists(getattr(self._connector, self.db_name), HEALTH_CHECK_KEY)
+            return True
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            self.invalidate()
+            return False
@@ -0,0 +1,80 @@
+"""
+Event sources that wake a sync daemon between two polls.
+
+An event source runs its own thread and hands `(key, value)` events to the callback it was started
+with, normally `SonicSyncDaemon.notify`. The daemon coalesces them over a short debounce window and
+passes the latest value per key to `SonicSyncDaemon.handle_events` on its own thread.
+"""
+import threading
+import time
+
+from . import logger
+
+DEFAULT_SELECT_TIMEOUT_MS = 1000
+DEFAULT_RETRY_INTERVAL = 5
+
+
+class PortStatusEventSource(object):
+    """
+    Reports port oper-status changes from APPL_DB PORT_TABLE as (port name, oper_status) events.
+
+    The subscription first replays the current table, so the daemon also learns which ports are
+    already down when it starts. A port removed from PORT_TABLE is reported as 'down'.
+    """
+
+    def __init__(self, db_name='APPL_DB', table_name='PORT_TABLE', field='oper_status',
+                 select_timeout_ms=DEFAULT_SELECT_TIMEOUT_MS, retry_interval=DEFAULT_RETRY_INTERVAL):
+        """
+        :param select_timeout_ms: how often (in milliseconds) the listener checks whether it was stopped
+        :param retry_interval: time (in seconds) to wait before resubscribing after a failure
+        """
+        self.db_name = db_name
+        self.table_name = table_name
+        self.field = field
+        self.select_timeout_ms = select_timeout_ms
+        self.retry_interval = retry_interval
+        self._callback = None
+        self._running = threading.Event()
+        self._thread = None
+
+    def start(self, callback):
+        """
+        :param callback: callable(key, value), invoked from the listener thread
+        """
+        self._callback = callback
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name='PortStatusEventSource')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._running.clear()
+
+    def _run(self):
+        while self._running.is_set():
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("%s subscription failed, resubscribing in %ds", self.table_name, self.retry_interval)
+                time.sleep(self.retry_interval)
+
+    def _listen(self):
+        from swsscommon import swsscommon
+
+        db = swsscommon.DBConnector(self.db_name, 0)
+        table = swsscommon.SubscriberStateTable(db, self.table_name)
+        selector = swsscommon.Select()
+        selector.addSelectable(table)
+        while self._running.is_set():
+            state, _ = selector.select(self.select_timeout_ms)
+            if state == swsscommon.Select.TIMEOUT:
+                continue
+            if state != swsscommon.Select.OBJECT:
+                raise RuntimeError("select on {} failed".format(self.table_name))
+            key, op, fvs = table.pop()
+            if op == 'DEL':
+                self._callback(key, 'down')
+                continue
+            value = dict(fvs).get(self.field)
+            if value is not None:
+                self._callback(key, value)
@@ -0,0 +1,129 @@
+"""
+Freshness tracking and stall escalation for sync daemons.
+
+:class:`SyncHealth` records when the source was last read and when the target was last synced
+successfully, and keeps a window of recent cycle latencies. Against a freshness SLO, `check`
+escalates in steps: a stale report once freshness exceeds the SLO, then a source restart whenever
+the source itself is the one not delivering, at most once per restart interval.
+
+Ages are measured on the monotonic clock, so that wall clock steps (NTP, manual changes) neither
+trigger nor hide staleness; the wall clock times of the last successes are kept for reporting only.
+"""
+import math
+import time
+
+DEFAULT_LATENCY_WINDOW = 256
+
+STALE = 'stale'
+RECOVERED = 'recovered'
+RESTART_SOURCE = 'restart_source'
+
+
+class LatencyWindow(object):
+    """
+    The most recent `size` samples, for percentiles.
+    """
+
+    def __init__(self, size=DEFAULT_LATENCY_WINDOW):
+        self.size = size
+        self.samples = []
+        self._next = 0
+
+    def add(self, value):
+        if len(self.samples) < self.size:
+            self.samples.append(value)
+        else:
+            self.samples[self._next] = value
+        self._next = (self._next + 1) % self.size
+
+    def percentile(self, p):
+        """
+        :param p: percentile between 0 and 100
+        :return: nearest-rank percentile, or None without samples
+        """
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        rank = int(math.ceil(p / 100.0 * len(ordered)))
+        return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+class SyncHealth(object):
+    """
+    Freshness of the data a daemon publishes.
+    """
+
+    def __init__(self, slo=0, restart_interval=None, clock=time.monotonic, wall_clock=time.time):
+        """
+        :param slo: freshness objective (in seconds); 0 only tracks, without escalating
+        :param restart_interval: minimum time (in seconds) between source restarts, twice the SLO by default
+        :param clock: clock the ages are measured on
+        :param wall_clock: clock of the reported `last_source_success` and `last_sync_success` times
+        """
+        self.slo = slo
+        self.restart_interval = restart_interval or 2 * slo
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self.started = clock()
+        # wall clock times, for reporting
+        self.last_source_success = None
+        self.last_sync_success = None
+        # the same on `clock`, for ages
+        self._source_mark = None
+        self._sync_mark = None
+        self.latency = LatencyWindow()
+        self.stale = False
+        self.source_restarts = 0
+        self._last_escalation = None
+
+    def source_succeeded(self):
+        self._source_mark = self._clock()
+        self.last_source_success = self._wall_clock()
+
+    def sync_succeeded(self):
+        self._sync_mark = self._clock()
+        self.last_sync_success = self._wall_clock()
+
+    def cycle_finished(self, duration):
+        self.latency.add(duration)
+
+    def _age(self, timestamp):
+        # before the first success, count from start-up
+        return self._clock() - (self.started if timestamp is None else timestamp)
+
+    def source_age(self):
+        """
+        :return: seconds since the last successful source read
+        """
+        return self._age(self._source_mark)
+
+    def freshness(self):
+        """
+        :return: seconds since the published data was last brought up to date
+        """
+        return self._age(self._sync_mark)
+
+    def check(self):
+        """
+        Compare freshness against the SLO.
+        :return: STALE or RECOVERED on a transition, RESTART_SOURCE when the source should be restarted,
+                 None otherwise
+        """
+        if not self.slo:
+            return None
+        if self.freshness() <= self.slo:
+            if self.stale:
+                self.stale = False
+                return RECOVERED
+            return None
+
+        if not self.stale:
+            self.stale = True
+            self._last_escalation = self._clock()
+            return STALE
+        # a failing sync is not fixed by restarting the source
+        if self.source_age() > self.slo and self._clock() - self._last_escalation >= self.restart_interval:
+            self._last_escalation = self._clock()
+            self.source_restarts += 1
+            return RESTART_SOURCE
+        return None
@@ -2,8 +2,10 @@ import threading
 import time
 
 from . import logger
+from .health import RECOVERED, RESTART_SOURCE, STALE, SyncHealth
 
 DEFAULT_UPDATE_FREQUENCY = 10
+DEFAULT_EVENT_DEBOUNCE = 0.1
 
 
 class SonicSyncDaemon(threading.Thread):
@@ -11,13 +13,25 @@ class SonicSyncDaemon(threading.Thread):
     SONiC sync daemon interface.
     """
 
-    def __init__(self, update_frequency=None):
+    def __init__(self, update_frequency=None, event_source=None, event_debounce=DEFAULT_EVENT_DEBOUNCE,
+                 freshness_slo=0, restart_interval=None):
         """
         :param update_frequency: How long to wait before executing the update task (in seconds).
+        :param event_source: optional event source (see sonic_syncd.events) that wakes the daemon between updates
+        :param event_debounce: time (in seconds) to collect further events after the first one before handling them
+        :param freshness_slo: maximum age (in seconds) of the synced data before the watchdog escalates (0 disables it)
+        :param restart_interval: minimum time (in seconds) between source restarts by the watchdog
         """
         super(SonicSyncDaemon, self).__init__(name=self.__class__.__name__)
         self._update_frequency = update_frequency or DEFAULT_UPDATE_FREQUENCY
         self.run_event = threading.Event()
+        self.event_source = event_source
+        self.event_debounce = event_debounce
+        self._wakeup = threading.Event()
+        self._events_lock = threading.Lock()
+        # key -> latest value, waiting to be handled
+        self._pending_events = {}
+        self.health = SyncHealth(freshness_slo, restart_interval)
 
     def source_update(self):
         """
@@ -33,26 +47,137 @@ class SonicSyncDaemon(threading.Thread):
 
     def sync(self, parsed_update):
         """
-        Save and/or store the parsed update.
+        Save and/or store the parsed update. May return False to report that it failed.
         """
         raise NotImplementedError()
 
+    def handle_events(self, events):
+        """
+        React to events delivered between two updates. Runs on the daemon thread.
+        :param events: dict of key -> latest value
+        """
+        pass
+
+    def restart_source(self):
+        """
+        Restart the source backend, as the last escalation step of the freshness watchdog.
+        """
+        pass
+
+    def report_health(self):
+        """
+        Publish `self.health`, called after every cycle.
+        """
+        pass
+
+    def _check_health(self):
+        action = self.health.check()
+        if action == STALE:
+            logger.warning("%s data is %.0fs old, exceeding the freshness objective of %ss (last source update %.0fs ago)",
+                           self.name, self.health.freshness(), self.health.slo, self.health.source_age())
+        elif action == RECOVERED:
+            logger.info("%s data is fresh again", self.name)
+        elif action == RESTART_SOURCE:
+            logger.error("%s source has not delivered for %.0fs, restarting it",
+                         self.name, self.health.source_age())
+            self.restart_source()
+        self.report_health()
+
+    def background_work(self):
+        """
+        Perform deferred work between updates, e.g. draining rate-limited writes. Runs on the daemon thread.
+        :return: seconds until it should run again, or None if there is nothing left to do
+        """
+        return None
+
+    def notify(self, key, value):
+        """
+        Queue an event and wake the run loop. Safe to call from any thread.
+        """
+        with self._events_lock:
+            self._pending_events[key] = value
+        self._wakeup.set()
+
+    def _wait_for_next_update(self):
+        """
+        Sleep until the next update is due, handling events and background work as they come due.
+        """
+        deadline = time.monotonic() + self._update_frequency
+        work_at = time.monotonic()
+        while self.run_event.is_set():
+            now = time.monotonic()
+            if work_at is not None and now >= work_at:
+                delay = self.background_work()
+                work_at = None if delay is None else now + delay
+                continue
+            remaining = deadline - now
+            if remaining <= 0:
+                return
+            timeout = remaining if work_at is None else min(remaining, work_at - now)
+            if not self._wakeup.wait(timeout):
+                continue
+            # let a burst of events (a flapping link, a whole line card going down) settle first
+            time.sleep(min(self.event_debounce, max(deadline - time.monotonic(), 0)))
+            self._wakeup.clear()
+            with self._events_lock:
+                events, self._pending_events = self._pending_events, {}
+            if events and self.run_event.is_set():
+                self.handle_events(events)
+                # handling may have queued deferred work
+                work_at = time.monotonic()
+
+    def connect(self):
+        """
+        Establish the connections `sync` needs. Runs concurrently with the first `source_update`.
+        """
+        pass
+
+    def _connect_in_background(self):
+        try:
+            self.connect()
+        except Exception:
+            # `sync` retries the connection and surfaces the error on the daemon thread
+            logger.exception("Failed to connect during start-up")
+
     def run(self):
         self.run_event.set()
+        # overlap connection set-up with the first (often slow) source update
+        connect_thread = threading.Thread(target=self._connect_in_background,
+                                          name=self.name + '-connect')
+        connect_thread.start()
+        if self.event_source is not None:
+            self.event_source.start(self.notify)
+        try:
+            self._run_updates(connect_thread)
+        finally:
+            if self.event_source is not None:
+                self.event_source.stop()
+
+    def _run_updates(self, connect_thread):
         while self.run_event.is_set():
+            start = time.monotonic()
             update_obj = self.source_update()
+            if connect_thread is not None:
+                connect_thread.join()
+                connect_thread = None
             if update_obj is not None:
+                self.health.source_succeeded()
                 parsed_update = self.parse_update(update_obj)
                 if parsed_update is not None:
-                    self.sync(parsed_update)
+                    # `sync` reports failures by returning False
+                    if self.sync(parsed_update) is not False:
+                        self.health.sync_succeeded()
                 else:
                     logger.warning("No parsed information returned. Skipping sync.")
             else:
                 logger.warning("No source information returned during last update. Skipping sync.")
-            time.sleep(self._update_frequency)
+            self.health.cycle_finished(time.monotonic() - start)
+            self._check_health()
+            self._wait_for_next_update()
 
     def stop(self):
         """
         Stop DBSyncd
         """
         self.run_event.clear()
+        self._wakeup.set()
@@ -0,0 +1,95 @@
+"""
+Logging helpers for the sync daemons' hot paths.
+
+Messages are passed to the logger as ``%``-style templates so nothing is formatted unless the
+level is enabled; large payloads are wrapped in :class:`Truncated`/:class:`LazyJson` so they are
+only rendered (and capped) when a handler actually emits the record.
+"""
+import json
+import logging
+import time
+
+DEFAULT_MAX_PAYLOAD_LEN = 1024
+DEFAULT_RATE_LIMIT_INTERVAL = 60
+
+
+def truncate(text, max_len=DEFAULT_MAX_PAYLOAD_LEN):
+    """
+    Cap `text` at `max_len` characters, noting how much was dropped.
+    """
+    if max_len is None or len(text) <= max_len:
+        return text
+    return "{}... <{} more chars>".format(text[:max_len], len(text) - max_len)
+
+
+class Truncated(object):
+    """
+    Lazily rendered ``str()`` of an object, truncated to `max_len` characters.
+    """
+    __slots__ = ('obj', 'max_len')
+
+    def __init__(self, obj, max_len=DEFAULT_MAX_PAYLOAD_LEN):
+        self.obj = obj
+        self.max_len = max_len
+
+    def __str__(self):
+        return truncate(str(self.obj), self.max_len)
+
+
+class LazyJson(Truncated):
+    """
+    Lazily rendered ``json.dumps()`` of an object, truncated to `max_len` characters.
+    """
+    __slots__ = ('dumps_kwargs',)
+
+    def __init__(self, obj, max_len=DEFAULT_MAX_PAYLOAD_LEN, **dumps_kwargs):
+        super(LazyJson, self).__init__(obj, max_len)
+        self.dumps_kwargs = dumps_kwargs
+
+    def __str__(self):
+        try:
+            text = json.dumps(self.obj, **self.dumps_kwargs)
+        except (TypeError, ValueError):
+            text = repr(self.obj)
+        return truncate(text, self.max_len)
+
+
+class RateLimitedLogger(object):
+    """
+    Wraps a logger so that a given message template is emitted at most once per `interval`
+    seconds for each key (typically an interface name). Repeats in between are counted and the
+    count is appended to the next message emitted for that key.
+    """
+
+    def __init__(self, logger, interval=DEFAULT_RATE_LIMIT_INTERVAL, clock=time.monotonic):
+        self.logger = logger
+        self.interval = interval
+        self._clock = clock
+        # (key, template) -> [last emit time, suppressed count]
+        self._state = {}
+
+    def log(self, level, key, msg, *args):
+        if not self.logger.isEnabledFor(level):
+            return
+        now = self._clock()
+        slot = (key, msg)
+        state = self._state.get(slot)
+        if state is not None and now - state[0] < self.interval:
+            state[1] += 1
+            return
+
+        suppressed = state[1] if state is not None else 0
+        self._state[slot] = [now, 0]
+        if suppressed:
+            msg += " (%d similar messages suppressed)"
+            args += (suppressed,)
+        self.logger.log(level, msg, *args)
+
+    def debug(self, key, msg, *args):
+        self.log(logging.DEBUG, key, msg, *args)
+
+    def info(self, key, msg, *args):
+        self.log(logging.INFO, key, msg, *args)
+
+    def warning(self, key, msg, *args):
+        self.log(logging.WARNING, key, msg, *args)
@@ -0,0 +1,163 @@
+"""
+Publishing backends for the tables owned by a sync daemon.
+
+A publisher exposes per-key operations (delete, replace, set, set_field) with table-relative keys
+(e.g. 'Ethernet0'), plus `flush` at the end of a cycle and `discard` to drop anything buffered.
+:class:`DirectPublisher` writes every operation straight through SonicV2Connector, so each change
+is an individual redis command and consumers see raw keyspace events on the table's own keys.
+:class:`BatchedPublisher` buffers the operations of a cycle, coalesced per key, and sends them on
+`flush` in one round trip (a Lua script, BATCH_SCRIPT) instead of one per command. It writes the
+same keys with the same commands, so consumers see the same keyspace events, and needs no consumer
+of its own. sonic_syncd.scheduler.WriteScheduler wraps a publisher to rate-limit it.
+"""
+from . import logger
+from .connection import is_connection_error, redis_script_runner
+
+# operations per script run, bounding how long one run blocks redis
+DEFAULT_BATCH_SIZE = 512
+
+# KEYS[i]: key of operation i. ARGV, for every operation in turn: 'replace' or 'set', the number n of
+# field/value pairs, then the n pairs. A replace deletes the key first; with no pairs it is a delete.
+BATCH_SCRIPT = """
+local arg = 1
+for i = 1, #KEYS do
+    local count = tonumber(ARGV[arg + 1])
+    if ARGV[arg] == 'replace' then
+        redis.call('DEL', KEYS[i])
+    end
+    if count > 0 then
+        redis.call('HSET', KEYS[i], unpack(ARGV, arg + 2, arg + 1 + 2 * count))
+    end
+    arg = arg + 2 + 2 * count
+end
+"""
+
+
+class DirectPublisher(object):
+    """
+    Writes through a SonicV2Connector as operations are issued.
+    """
+
+    def __init__(self, table_name, get_connector):
+        """
+        :param table_name: e.g. 'LLDP_ENTRY_TABLE'
+        :param get_connector: callable returning a connected SonicV2Connector
+        """
+        self.table_name = table_name
+        self.get_connector = get_connector
+
+    def table_key(self, key):
+        return ':'.join([self.table_name, key])
+
+    def delete(self, key):
+        db_connector = self.get_connector()
+        db_connector.delete(db_connector.APPL_DB, self.table_key(key))
+
+    def replace(self, key, fvs):
+        """
+        Replace all fields of `key` with `fvs`.
+        """
+        db_connector = self.get_connector()
+        db_connector.delete(db_connector.APPL_DB, self.table_key(key))
+        db_connector.hmset(db_connector.APPL_DB, self.table_key(key), fvs)
+
+    def set(self, key, fvs):
+        """
+        Set the given fields of `key`, leaving the others untouched.
+        """
+        db_connector = self.get_connector()
+        db_connector.hmset(db_connector.APPL_DB, self.table_key(key), fvs)
+
+    def set_field(self, key, field, value):
+        db_connector = self.get_connector()
+        db_connector.set(db_connector.APPL_DB, self.table_key(key), field, value, blocking=True)
+
+    def flush(self):
+        pass
+
+    def discard(self):
+        pass
+
+
+class BatchedPublisher(DirectPublisher):
+    """
+    Buffers the operations of a cycle and writes them in one round trip on `flush`.
+    """
+    REPLACE = 'replace'
+    SET = 'set'
+
+    def __init__(self, table_name, get_connector, batch_size=DEFAULT_BATCH_SIZE, script_runner=redis_script_runner):
+        """
+        :param batch_size: operations per script run
+        :param script_runner: callable(SonicV2Connector) returning a callable(script, keys, argv)
+        """
+        super(BatchedPublisher, self).__init__(table_name, get_connector)
+        self.batch_size = batch_size
+        self.script_runner = script_runner
+        # key -> [REPLACE or SET, dict of fields], in the order keys were first written
+        self._pending = {}
+        self.batches = 0
+
+    def delete(self, key):
+        self._pending[key] = [self.REPLACE, {}]
+
+    def replace(self, key, fvs):
+        self._pending[key] = [self.REPLACE, dict(fvs)]
+
+    def set(self, key, fvs):
+        pending = self._pending.get(key)
+        if pending is None:
+            self._pending[key] = [self.SET, dict(fvs)]
+        else:
+            # on top of a replace, still a replace
+            pending[1].update(fvs)
+
+    def set_field(self, key, field, value):
+        self.set(key, {field: value})
+
+    def flush(self):
+        """
+        :raises: connection errors; the buffered operations are dropped, as after `discard`
+        """
+        if not self._pending:
+            return
+        pending, self._pending = list(self._pending.items()), {}
+        db_connector = self.get_connector()
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            if self.script_runner is None:
+                self._write_directly(batch)
+                continue
+            keys = []
+            argv = []
+            for key, (op, fvs) in batch:
+                keys.append(self.table_key(key))
+                argv.append(op)
+                argv.append(str(len(fvs)))
+                for field, value in fvs.items():
+                    argv.append(field)
+                    argv.append(value)
+            try:
+                self.script_runner(db_connector)(BATCH_SCRIPT, keys, argv)
+            except Exception as e:
+                if is_connection_error(e):
+                    raise
+                # e.g. no script support in this swsscommon. The script may have applied part of the batch;
+                # writing all of it again leaves the same result.
+                logger.exception("Failed to write %s in batches, writing directly", self.table_name)
+                self.script_runner = None
+                self._write_directly(batch)
+                continue
+            self.batches += 1
+
+    def _write_directly(self, batch):
+        for key, (op, fvs) in batch:
+            if op == self.SET:
+                DirectPublisher.set(self, key, fvs)
+            elif fvs:
+                DirectPublisher.replace(self, key, fvs)
+            else:
+                DirectPublisher.delete(self, key)
+
+    def discard(self):
+        self._pending.clear()
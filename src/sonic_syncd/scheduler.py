@@ -0,0 +1,224 @@
+"""
+Rate-limited, prioritized writing of table updates.
+
+:class:`WriteScheduler` sits between a daemon's sync logic and its publisher (see
+sonic_syncd.publisher) and exposes the same per-key operations. Operations are queued, coalesced
+per key, and handed to the publisher in priority order only as fast as a token-bucket budget of
+commands and bytes per second allows:
+
+    deletions > content changes > new entries > time marks
+
+so that a burst (e.g. hundreds of ports getting neighbors at boot) is spread out instead of
+competing with other writers all at once. A write larger than a bucket is let through whenever that
+bucket is full, so every queued write is eventually applied.
+"""
+import time
+from collections import OrderedDict
+
+PRIORITY_DELETE = 0
+PRIORITY_CHANGE = 1
+PRIORITY_NEW = 2
+PRIORITY_TIME_MARK = 3
+PRIORITIES = (PRIORITY_DELETE, PRIORITY_CHANGE, PRIORITY_NEW, PRIORITY_TIME_MARK)
+
+# shortest delay `next_due` returns, so a drain loop never spins
+MIN_DRAIN_INTERVAL = 0.01
+
+
+class TokenBucket(object):
+    """
+    Refills at `rate` tokens per second up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        """
+        :param capacity: largest burst, one second worth of tokens by default
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._last = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def delay(self, cost):
+        """
+        :return: seconds until `cost` tokens can be spent (0 if they can be spent now)
+        """
+        self._refill()
+        # an oversized cost may be spent from a full bucket, leaving it in debt
+        needed = min(cost, self.capacity)
+        if self.tokens >= needed:
+            return 0
+        return (needed - self.tokens) / self.rate
+
+    def consume(self, cost):
+        self.tokens -= cost
+
+
+class _PendingWrite(object):
+    __slots__ = ('priority', 'delete_first', 'fvs', 'since')
+
+    def __init__(self, priority, delete_first, fvs, since):
+        self.priority = priority
+        self.delete_first = delete_first
+        self.fvs = fvs
+        self.since = since
+
+    @property
+    def commands(self):
+        return 2 if self.delete_first and self.fvs else 1
+
+    def size(self, key):
+        """
+        Approximate payload size in bytes.
+        """
+        size = len(key)
+        if self.fvs:
+            for field, value in self.fvs.items():
+                size += len(field) + len(value)
+        return size
+
+
+class WriteScheduler(object):
+    """
+    Queues per-key writes and releases them to a publisher within a commands/s and bytes/s budget.
+    """
+
+    def __init__(self, commands_per_second, bytes_per_second, command_burst=None, byte_burst=None,
+                 clock=time.monotonic):
+        """
+        :param commands_per_second: sustained redis command rate
+        :param bytes_per_second: sustained payload rate (keys, fields and values)
+        :param command_burst: commands that may be issued at once (default: one second worth)
+        :param byte_burst: bytes that may be written at once (default: one second worth)
+        """
+        self._clock = clock
+        self.command_bucket = TokenBucket(commands_per_second, command_burst, clock)
+        self.byte_bucket = TokenBucket(bytes_per_second, byte_burst, clock)
+        self.publisher = None
+        self.on_apply = None
+        # one queue per priority: key -> _PendingWrite, oldest first
+        self._queues = [OrderedDict() for _ in PRIORITIES]
+        self._pending = {}
+        self.applied = 0
+
+    def attach(self, publisher, on_apply=None):
+        """
+        :param publisher: publisher the writes are released to
+        :param on_apply: called after each flush with a dict of key -> priority of the writes it applied
+        """
+        self.publisher = publisher
+        self.on_apply = on_apply
+
+    @property
+    def backlog(self):
+        return len(self._pending)
+
+    def backlog_age(self):
+        """
+        :return: seconds the oldest queued write has been waiting (0 if none)
+        """
+        if not self._pending:
+            return 0.0
+        return self._clock() - min(write.since for write in self._pending.values())
+
+    def _enqueue(self, key, priority, delete_first, fvs):
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _PendingWrite(priority, delete_first, fvs, self._clock())
+            self._queues[priority][key] = pending
+            return
+
+        del self._queues[pending.priority][key]
+        if delete_first:
+            # supersedes whatever was queued
+            pending.delete_first = True
+            pending.fvs = fvs
+        elif pending.fvs is None:
+            # set after a pending delete: the key is rewritten from scratch
+            pending.fvs = fvs
+            priority = PRIORITY_CHANGE
+        else:
+            pending.fvs.update(fvs)
+            priority = min(priority, pending.priority)
+        pending.priority = priority
+        self._queues[priority][key] = pending
+
+    def delete(self, key):
+        self._enqueue(key, PRIORITY_DELETE, True, None)
+
+    def replace(self, key, fvs):
+        self._enqueue(key, PRIORITY_CHANGE, True, dict(fvs))
+
+    def set(self, key, fvs):
+        self._enqueue(key, PRIORITY_NEW, False, dict(fvs))
+
+    def set_field(self, key, field, value):
+        self._enqueue(key, PRIORITY_TIME_MARK, False, {field: value})
+
+    def _head(self):
+        for queue in self._queues:
+            if queue:
+                return next(iter(queue.items()))
+        return None, None
+
+    def flush(self):
+        """
+        Release queued writes, highest priority first, until the budget is exhausted.
+        """
+        applied = {}
+        while True:
+            key, pending = self._head()
+            if pending is None:
+                break
+            commands = pending.commands
+            size = pending.size(key)
+            if self.command_bucket.delay(commands) or self.byte_bucket.delay(size):
+                break
+            self.command_bucket.consume(commands)
+            self.byte_bucket.consume(size)
+            del self._queues[pending.priority][key]
+            del self._pending[key]
+            self._apply(key, pending)
+            applied[key] = pending.priority
+
+        if applied:
+            self.publisher.flush()
+            self.applied += len(applied)
+            if self.on_apply is not None:
+                self.on_apply(applied)
+
+    def _apply(self, key, pending):
+        if pending.delete_first and pending.fvs:
+            self.publisher.replace(key, pending.fvs)
+        elif pending.delete_first:
+            self.publisher.delete(key)
+        elif pending.priority == PRIORITY_TIME_MARK and len(pending.fvs) == 1:
+            (field, value), = pending.fvs.items()
+            self.publisher.set_field(key, field, value)
+        else:
+            self.publisher.set(key, pending.fvs)
+
+    def next_due(self):
+        """
+        :return: seconds until the next queued write fits the budget, or None if nothing is queued
+        """
+        key, pending = self._head()
+        if pending is None:
+            return None
+        delay = max(self.command_bucket.delay(pending.commands), self.byte_bucket.delay(pending.size(key)))
+        return max(delay, MIN_DRAIN_INTERVAL)
+
+    def discard(self):
+        """
+        Drop all queued writes, e.g. when the owner falls back to a full resync.
+        """
+        for queue in self._queues:
+            queue.clear()
+        self._pending.clear()
+        self.publisher.discard()
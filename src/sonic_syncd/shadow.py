@@ -0,0 +1,99 @@
+"""
+Atomic replacement of a whole table through a shadow key namespace.
+
+Rewriting a table entry by entry lets readers see a mix of old and new entries, and keys that are
+briefly missing between a DEL and the following HSET. :class:`ShadowTableSwap` instead writes the
+complete table under `<TABLE>_SHADOW:<key>`, then runs one Lua script (SWAP_SCRIPT) that deletes the
+live keys that are no longer wanted and copies every shadow key over its live counterpart. Redis
+runs no other command while a script runs, so readers see either the old table or the new one.
+Shadow keys left behind by an interrupted swap are collected before the next one.
+
+Keyspace notifications: the script does not RENAME, which would notify `rename_from`/`rename_to`
+that table consumers do not handle. For every swapped entry, subscribers of `<TABLE>:*` are notified
+`del` then `hset`, as for an entry replaced by an incremental write, and `del` for every entry
+deleted; the notifications are delivered once the script has completed. A script is not rolled
+back if one of its commands fails: entries handled before the failure stay swapped in.
+
+Meant for rare bulk reconciliations; small changes are cheaper written incrementally.
+"""
+from .connection import is_connection_error, redis_script_runner
+
+SHADOW_SUFFIX = '_SHADOW'
+
+# KEYS: the live keys to delete, then (shadow key, live key) pairs; ARGV[1]: number of live keys to delete
+SWAP_SCRIPT = """
+local deleted = tonumber(ARGV[1])
+for i = 1, deleted do
+    redis.call('DEL', KEYS[i])
+end
+for i = deleted + 1, #KEYS, 2 do
+    local fvs = redis.call('HGETALL', KEYS[i])
+    redis.call('DEL', KEYS[i + 1])
+    if #fvs > 0 then
+        redis.call('HSET', KEYS[i + 1], unpack(fvs))
+    end
+    redis.call('DEL', KEYS[i])
+end
+"""
+
+
+class TableSwapError(Exception):
+    """
+    The swap script could not be run, for reasons other than a lost connection.
+    """
+
+
+class ShadowTableSwap(object):
+    """
+    Replaces the content of one table in a single script.
+    """
+
+    def __init__(self, table_name, script_runner=redis_script_runner):
+        """
+        :param table_name: e.g. 'LLDP_ENTRY_TABLE'
+        :param script_runner: callable(SonicV2Connector) returning a callable(script, keys, argv)
+        """
+        self.table_name = table_name
+        self.shadow_table_name = table_name + SHADOW_SUFFIX
+        self.script_runner = script_runner
+        self.swaps = 0
+
+    def _delete_shadow_keys(self, db_connector):
+        for shadow_key in db_connector.keys(db_connector.APPL_DB, self.shadow_table_name + ':*') or []:
+            db_connector.delete(db_connector.APPL_DB, shadow_key)
+
+    def publish(self, db_connector, entries, keep=()):
+        """
+        Make `entries` the complete content of the table.
+        :param db_connector: SonicV2Connector connected to APPL_DB
+        :param entries: dict of key -> dict of fields
+        :param keep: live keys to leave in place even though they are not in `entries`
+        :return: keys deleted from the live table
+        :raises TableSwapError: if the swap failed other than by a connection error; the shadow keys
+                                are removed, the live table may be partly swapped
+        """
+        prefix = self.table_name + ':'
+        shadow_prefix = self.shadow_table_name + ':'
+
+        self._delete_shadow_keys(db_connector)
+        for key, fvs in entries.items():
+            db_connector.hmset(db_connector.APPL_DB, shadow_prefix + key, fvs)
+
+        deleted = []
+        for live_key in db_connector.keys(db_connector.APPL_DB, prefix + '*') or []:
+            key = live_key[len(prefix):]
+            if key not in entries and key not in keep:
+                deleted.append(key)
+
+        keys = [prefix + key for key in deleted]
+        for key in entries:
+            keys.extend((shadow_prefix + key, prefix + key))
+        try:
+            self.script_runner(db_connector)(SWAP_SCRIPT, keys, [str(len(deleted))])
+        except Exception as e:
+            if is_connection_error(e):
+                raise
+            self._delete_shadow_keys(db_connector)
+            raise TableSwapError("Failed to swap in {}: {}".format(self.table_name, e)) from e
+        self.swaps += 1
+        return deleted
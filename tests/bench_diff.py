@@ -0,0 +1,94 @@
+"""
+Cache diff benchmark for lldp_syncd.
+
+Run from the repository root:
+    python -m tests.bench_diff [ports] [runs]
+
+Times CacheIndex.diff against the set-and-dict-comparison diff it replaced, on a table of `ports`
+entries, for an identical update and for one where every lldp_rem_time_mark moved (the usual
+polling cycle). The cycle timings add building the entries from the parsed (field, value) pairs,
+where parsed_entry extracts the content CacheIndex compares. The best of `runs` is reported.
+"""
+import os
+import sys
+import time
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from lldp_syncd.diff import CacheIndex, TIME_MARK_KEY, parsed_entry
+
+
+def make_pairs(ports, time_mark):
+    # as parse_interface returns them, with distinct string objects per cycle
+    return [('Ethernet%d' % (port * 4), [
+        ('lldp_rem_port_id_subtype', '5'),
+        ('lldp_rem_port_id', 'Ethernet%d' % port),
+        ('lldp_rem_port_desc', 'Ethernet%d' % port),
+        ('lldp_rem_chassis_id_subtype', '4'),
+        ('lldp_rem_chassis_id', '00:11:22:33:%02x:%02x' % (port >> 8, port & 0xff)),
+        ('lldp_rem_sys_name', 'switch%d' % (port // 32)),
+        ('lldp_rem_sys_desc', 'SONiC Software Version: SONiC.master'),
+        ('lldp_rem_man_addr', '10.0.%d.%d' % (port >> 8, port & 0xff)),
+        ('lldp_rem_index', '1'),
+        ('lldp_rem_sys_cap_supported', '28 00'),
+        ('lldp_rem_sys_cap_enabled', '28 00'),
+        (TIME_MARK_KEY, str(time_mark)),
+    ]) for port in range(ports)]
+
+
+def previous_diff(cache, update):
+    # the diff CacheIndex replaced: key set algebra, then full dict comparisons
+    new = list(set(update) - set(cache))
+    changed = []
+    time_mark_only = []
+    for key in set(update) & set(cache):
+        cached, updated = cache[key], update[key]
+        if cached == updated:
+            continue
+        if len(cached) == len(updated) and all(key == TIME_MARK_KEY or updated.get(key) == value
+                                               for key, value in cached.items()):
+            time_mark_only.append(key)
+        else:
+            changed.append(key)
+    deleted = list(set(cache) - set(update))
+    return new, changed, time_mark_only, deleted
+
+
+def previous_cycle(cache, pairs):
+    return previous_diff(cache, {if_name: dict(parsed) for if_name, parsed in pairs})
+
+
+def indexed_cycle(index, pairs):
+    return index.diff({if_name: parsed_entry(parsed) for if_name, parsed in pairs})
+
+
+def best_of(runs, func, *args):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(ports=4096, runs=50):
+    cache_pairs = make_pairs(ports, 10)
+    plain_cache = {if_name: dict(parsed) for if_name, parsed in cache_pairs}
+    index = CacheIndex()
+    index.commit(index.diff({if_name: parsed_entry(parsed) for if_name, parsed in cache_pairs})[1])
+    print("{:<18} {:>22} {:>22}".format('', 'diff (previous/new)', 'cycle (previous/new)'))
+    for name, pairs in (('identical update', make_pairs(ports, 10)),
+                        ('time marks moved', make_pairs(ports, 11))):
+        plain_update = {if_name: dict(parsed) for if_name, parsed in pairs}
+        parsed_update = {if_name: parsed_entry(parsed) for if_name, parsed in pairs}
+        timings = (best_of(runs, previous_diff, plain_cache, plain_update),
+                   best_of(runs, index.diff, parsed_update),
+                   best_of(runs, previous_cycle, plain_cache, pairs),
+                   best_of(runs, indexed_cycle, index, pairs))
+        print("{:<18} {:9.2f} / {:6.2f} ms {:9.2f} / {:6.2f} ms".format(name, *(t * 1000 for t in timings)))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,47 @@
+"""
+Start-up benchmark for lldp_syncd.
+
+Run from the repository root (swsscommon must be importable for the daemon steps):
+    python -m tests.bench_startup [runs]
+
+Each step is timed in a fresh interpreter and the median over `runs` is reported.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STEPS = (
+    ('import lldp_syncd', 'import lldp_syncd'),
+    ('import lldp_syncd.daemon', 'import lldp_syncd.daemon'),
+    ('construct LldpSyncDaemon', 'import lldp_syncd; lldp_syncd.LldpSyncDaemon()'),
+)
+
+TIMER = ("import time; _start = time.perf_counter(); {}; "
+         "print(time.perf_counter() - _start)")
+
+
+def time_step(statement, runs):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.join(modules_path, 'src'),
+                                                        os.environ.get('PYTHONPATH', '')]))
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', TIMER.format(statement)], env=env)
+        samples.append(float(output))
+    return statistics.median(samples)
+
+
+def main(runs=10):
+    for name, statement in STEPS:
+        try:
+            elapsed = time_step(statement, runs)
+        except subprocess.CalledProcessError:
+            print("{:<28} failed".format(name))
+            continue
+        print("{:<28} {:8.2f} ms".format(name, elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
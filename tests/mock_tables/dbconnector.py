@@ -1,7 +1,10 @@
 # MONKEY PATCH!!!
+import hashlib
 import json
 import os
+import queue
 import sys
+import threading
 
 import mockredis
 import redis
@@ -105,10 +108,10 @@ class MockConnector(object):
     CONFIG_DB = 4
     data = {}
 
-    def __init__(self):
+    def __init__(self, *args, **kwargs):
         pass
 
-    def connect(self, db_id):
+    def connect(self, db_id, retry_on=True):
         if db_id == 0:
             with open(INPUT_DIR + '/LLDP_ENTRY_TABLE.json') as f:
                 db = json.load(f)
@@ -129,22 +132,25 @@ class MockConnector(object):
     def get(self, db_id, key, field):
         return MockConnector.data[key][field]
 
-    def keys(self, db_id):
+    def keys(self, db_id, pattern='*'):
+        import fnmatch
+
         ret = []
         for key in MockConnector.data.keys():
-            ret.append(key)
+            if fnmatch.fnmatchcase(key, pattern):
+                ret.append(key)
 
         return ret
 
     def get_all(self, db_id, key):
-        return MockConnector.data[key]
+        # HGETALL of a missing key is empty
+        return MockConnector.data.get(key, {})
 
     def exists(self, db_id, key):
         return key in MockConnector.data
 
     def set(self, db_id, key, field, value, blocking=False):
-        self.data[key] = {}
-        self.data[key][field] = value
+        self.data.setdefault(key, {})[field] = value
 
     def hmset(self, db_id, key, fieldsvalues):
         self.data[key] = {}
@@ -154,9 +160,107 @@ class MockConnector(object):
     def delete(self, db_id, key):
         del self.data[key]
 
+    def get_redis_client(self, db_name):
+        return self
+
+
+class MockRedisScripts(object):
+    """
+    Stand-in for swsscommon.loadRedisScript/runRedisScript. Lua does not run here: a script runs the
+    Python twin registered in `handlers` under its source, given a redis.call-like `call` over
+    MockConnector.data. As in Redis, commands run before a failing one are not rolled back.
+    """
+    # script source -> callable(call, keys, argv)
+    handlers = {}
+    # sha -> script source
+    scripts = {}
+    # every command run by a script, as (command, args...)
+    calls = []
+
+    @classmethod
+    def load(cls, connector, script):
+        sha = hashlib.sha1(script.encode('utf-8')).hexdigest()
+        cls.scripts[sha] = script
+        return sha
+
+    @classmethod
+    def run(cls, connector, sha, keys, argv):
+        if sha not in cls.scripts:
+            raise RuntimeError("NOSCRIPT No matching script")
+        return cls.handlers[cls.scripts[sha]](cls.call, list(keys), list(argv))
+
+    @classmethod
+    def call(cls, command, *args):
+        data = MockConnector.data
+        cls.calls.append((command,) + args)
+        if command == 'DEL':
+            return int(data.pop(args[0], None) is not None)
+        if command == 'HGETALL':
+            return [item for field_value in data.get(args[0], {}).items() for item in field_value]
+        if command == 'HSET':
+            data.setdefault(args[0], {}).update(zip(args[1::2], args[2::2]))
+            return len(args[1:]) // 2
+        raise RuntimeError("ERR unknown command '{}'".format(command))
+
+
+class MockDBConnector(object):
+    def __init__(self, db_name, timeout, *args):
+        self.db_name = db_name
+
+
+class MockSubscriberStateTable(object):
+    """
+    Stand-in for swsscommon.SubscriberStateTable, fed through `publish`.
+    """
+    # table name -> queue of (key, op, fvs); published events wait there until a subscriber pops them
+    queues = {}
+    _lock = threading.Lock()
+
+    def __init__(self, db, table_name, *args):
+        self.queue = MockSubscriberStateTable.table_queue(table_name)
+        self.popped = None
+
+    @classmethod
+    def table_queue(cls, table_name):
+        with cls._lock:
+            return cls.queues.setdefault(table_name, queue.Queue())
+
+    @classmethod
+    def publish(cls, table_name, key, op, fvs=()):
+        cls.table_queue(table_name).put((key, op, tuple(fvs)))
+
+    def pop(self):
+        popped, self.popped = self.popped, None
+        return popped
+
+
+class MockSelect(object):
+    OBJECT = 0
+    ERROR = 1
+    TIMEOUT = 2
+
+    def __init__(self):
+        self.selectables = []
+
+    def addSelectable(self, selectable):
+        self.selectables.append(selectable)
+
+    def select(self, timeout_ms):
+        selectable = self.selectables[0]
+        try:
+            selectable.popped = selectable.queue.get(timeout=timeout_ms / 1000.0)
+        except queue.Empty:
+            return MockSelect.TIMEOUT, None
+        return MockSelect.OBJECT, selectable
+
 
 DBInterface._subscribe_keyspace_notification = _subscribe_keyspace_notification
 mockredis.MockRedis.config_set = config_set
 redis.StrictRedis = SwssSyncClient
 SonicV2Connector.connect = MockConnector.connect
 swsscommon.SonicV2Connector = MockConnector
+swsscommon.DBConnector = MockDBConnector
+swsscommon.SubscriberStateTable = MockSubscriberStateTable
+swsscommon.Select = MockSelect
+swsscommon.loadRedisScript = MockRedisScripts.load
+swsscommon.runRedisScript = MockRedisScripts.run
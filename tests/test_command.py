@@ -0,0 +1,106 @@
+import os
+import sys
+# noinspection PyUnresolvedReferences
+import tests.mock_tables.dbconnector
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase
+import shutil
+import tempfile
+import time
+
+import lldp_syncd
+from sonic_syncd.command import CommandRunner, INITIAL_BUFFER_SIZE
+
+
+class TestCommandRunner(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def make_script(self, name, body):
+        """
+        Create a fake source command.
+        """
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'w') as f:
+            f.write('#!/bin/sh\n' + body + '\n')
+        os.chmod(path, 0o755)
+        return path
+
+    def test_concurrent_execution(self):
+        first = self.make_script('first', 'sleep 0.3; echo \'{"a": 1}\'')
+        second = self.make_script('second', 'sleep 0.3; echo \'{"b": 2}\'')
+        start = time.monotonic()
+        results = CommandRunner(timeout=5).run([[first], [second]])
+        self.assertLess(time.monotonic() - start, 0.55)
+        self.assertEqual([r.output for r in results], [b'{"a": 1}\n', b'{"b": 2}\n'])
+        self.assertTrue(all(r.ok for r in results))
+
+    def test_timeout_kills_and_reaps(self):
+        hung = self.make_script('hung', 'printf \'{"lldp": \'; exec sleep 30')
+        fast = self.make_script('fast', 'echo done')
+        start = time.monotonic()
+        hung_result, fast_result = CommandRunner(timeout=0.3, kill_grace=0.5).run([[hung], [fast]])
+        self.assertLess(time.monotonic() - start, 2)
+
+        self.assertTrue(hung_result.timed_out)
+        self.assertFalse(hung_result.ok)
+        self.assertEqual(hung_result.output, b'{"lldp": ')
+        # the child was reaped
+        self.assertIsNotNone(hung_result.returncode)
+        self.assertTrue(fast_result.ok)
+        self.assertEqual(fast_result.output, b'done\n')
+
+    def test_closed_stdout_does_not_block(self):
+        # closes stdout, then keeps running until killed
+        lingering = self.make_script('lingering', 'echo partial; exec sleep 30 >&-')
+        slow = self.make_script('slow', 'sleep 0.3; echo slow')
+        start = time.monotonic()
+        lingering_result, slow_result = CommandRunner(timeout=0.6, kill_grace=0.2).run([[lingering], [slow]])
+        elapsed = time.monotonic() - start
+        # the other command was read while the lingering one was waited for
+        self.assertEqual(slow_result.output, b'slow\n')
+        self.assertTrue(slow_result.ok)
+        self.assertTrue(lingering_result.timed_out)
+        self.assertEqual(lingering_result.output, b'partial\n')
+        self.assertIsNotNone(lingering_result.returncode)
+        self.assertLess(elapsed, 1.5)
+
+    def test_large_output_and_buffer_reuse(self):
+        size = INITIAL_BUFFER_SIZE * 3 + 17
+        big = self.make_script('big', 'head -c {} /dev/zero'.format(size))
+        runner = CommandRunner(timeout=5)
+        result, = runner.run([[big]])
+        self.assertEqual(len(result.output), size)
+        buffer = runner._buffers[0]
+
+        small = self.make_script('small', 'echo small')
+        result, = runner.run([[small]])
+        self.assertEqual(result.output, b'small\n')
+        self.assertIs(runner._buffers[0], buffer)
+
+    def test_failures(self):
+        failing = self.make_script('failing', 'echo partial; exit 3')
+        missing = os.path.join(self.tmpdir, 'missing')
+        failing_result, missing_result = CommandRunner(timeout=5).run([[failing], [missing]])
+        self.assertEqual(failing_result.returncode, 3)
+        self.assertFalse(failing_result.ok)
+        self.assertIsInstance(missing_result.error, OSError)
+
+    def test_stale_source(self):
+        hung = self.make_script('lldpctl', 'printf \'{"lldp": \'; exec sleep 30')
+        daemon = lldp_syncd.LldpSyncDaemon(command_timeout=0.2)
+        daemon.command_runner.kill_grace = 0.2
+        real_run = daemon.command_runner.run
+
+        def run(cmds, timeout=None):
+            return real_run([[hung] for _ in cmds], timeout)
+
+        daemon.command_runner.run = run
+        self.assertIsNone(daemon.source_update())
+        self.assertTrue(daemon.source_stale)
+        self.assertEqual(daemon.source_stats['timeouts'], 1)
+        self.assertIsNone(daemon.source_stats['last_success'])
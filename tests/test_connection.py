@@ -0,0 +1,110 @@
+import os
+import sys
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase
+
+from sonic_syncd.connection import DBConnectionManager, DBUnavailableError, is_connection_error
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeConnector(object):
+    APPL_DB = 0
+
+    def __init__(self, server, use_unix_socket_path):
+        self.server = server
+        self.use_unix_socket_path = use_unix_socket_path
+
+    def connect(self, db_id, retry_on=True):
+        # retrying forever would never give up on the Unix socket nor back off
+        assert retry_on is False
+        if not self.server.up or (self.use_unix_socket_path and not self.server.unix_socket):
+            raise RuntimeError("Unable to connect to redis")
+
+    def exists(self, db_id, key):
+        if not self.server.up:
+            raise RuntimeError("Connection reset by peer")
+        return False
+
+
+class FakeServer(object):
+    def __init__(self):
+        self.up = True
+        self.unix_socket = True
+        self.connectors = []
+
+    def factory(self, use_unix_socket_path):
+        self.connectors.append(FakeConnector(self, use_unix_socket_path))
+        return self.connectors[-1]
+
+
+class TestDBConnectionManager(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.server = FakeServer()
+        self.reconnected = []
+        self.manager = DBConnectionManager(connector_factory=self.server.factory, backoff_initial=1,
+                                           backoff_max=8, on_reconnect=lambda: self.reconnected.append(True),
+                                           clock=self.clock)
+
+    def test_lazy_connect_prefers_unix_socket(self):
+        self.assertFalse(self.manager.connected)
+        self.assertTrue(self.manager.get().use_unix_socket_path)
+        self.assertIs(self.manager.get(), self.server.connectors[0])
+
+    def test_tcp_fallback(self):
+        self.server.unix_socket = False
+        self.assertFalse(self.manager.get().use_unix_socket_path)
+        self.assertEqual([c.use_unix_socket_path for c in self.server.connectors], [True, False])
+
+    def test_backoff_and_reconnect(self):
+        self.manager.get()
+        self.server.up = False
+        self.assertFalse(self.manager.check_health())
+        self.assertFalse(self.manager.connected)
+
+        delays = []
+        for _ in range(5):
+            with self.assertRaises(RuntimeError):
+                self.manager.get()
+            next_attempt = self.manager._next_attempt
+            delays.append(next_attempt - self.clock.now)
+            # no new connection attempt until the backoff has elapsed
+            attempts = len(self.server.connectors)
+            with self.assertRaises(DBUnavailableError):
+                self.manager.get()
+            self.assertEqual(len(self.server.connectors), attempts)
+            self.clock.now = next_attempt
+
+        for delay, limit in zip(delays, (1, 2, 4, 8, 8)):
+            self.assertTrue(limit / 2 <= delay <= limit, (delay, limit))
+
+        self.server.up = True
+        self.manager.get()
+        self.assertTrue(self.manager.check_health())
+        self.assertEqual(self.reconnected, [True])
+        self.assertEqual(self.manager.reconnects, 1)
+
+    def test_connection_errors(self):
+        self.assertTrue(is_connection_error(RuntimeError("Unable to connect to redis (unix-socket): No such file")))
+        self.assertTrue(is_connection_error(RuntimeError("Failed to redisGetReply with HGETALL")))
+        self.assertTrue(is_connection_error(ConnectionResetError()))
+        # other failures are bugs and must not look like a lost connection
+        self.assertFalse(is_connection_error(RuntimeError("dictionary changed size during iteration")))
+        self.assertFalse(is_connection_error(FileNotFoundError()))
+        self.assertFalse(is_connection_error(KeyError('Ethernet0')))
+
+        self.manager.get()
+        self.server.connectors[0].exists = lambda db_id, key: {}['missing']
+        with self.assertRaises(KeyError):
+            self.manager.check_health()
+        self.assertTrue(self.manager.connected)
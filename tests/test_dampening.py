@@ -0,0 +1,87 @@
+import os
+import sys
+# noinspection PyUnresolvedReferences
+import tests.mock_tables.dbconnector
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase
+
+from lldp_syncd.dampening import DampeningConfig, NeighborDampener, same_content
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def neighbor(port_desc, time_mark='10'):
+    return {'lldp_rem_port_desc': port_desc, 'lldp_rem_time_mark': time_mark}
+
+
+class TestNeighborDampener(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_same_content_ignores_time_mark(self):
+        self.assertTrue(same_content(neighbor('a', '1'), neighbor('a', '2')))
+        self.assertFalse(same_content(neighbor('a'), neighbor('b')))
+        self.assertFalse(same_content(neighbor('a'), None))
+        self.assertTrue(same_content(None, None))
+
+    def test_first_update_passes_through(self):
+        dampener = NeighborDampener(DampeningConfig(hold_down=30), clock=self.clock)
+        update = {'Ethernet0': neighbor('a')}
+        self.assertEqual(dampener.apply(update), update)
+
+    def test_hold_down(self):
+        dampener = NeighborDampener(DampeningConfig(hold_down=30, suppress_threshold=10000), clock=self.clock)
+        dampener.apply({'Ethernet0': neighbor('a')})
+
+        self.clock.now = 10
+        self.assertEqual(dampener.apply({'Ethernet0': neighbor('b')}), {'Ethernet0': neighbor('a')})
+        # a link going down is held as well
+        self.clock.now = 20
+        self.assertEqual(dampener.apply({}), {'Ethernet0': neighbor('a')})
+        self.clock.now = 25
+        self.assertEqual(dampener.apply({'Ethernet0': neighbor('b')}), {'Ethernet0': neighbor('a')})
+        self.clock.now = 55
+        self.assertEqual(dampener.apply({'Ethernet0': neighbor('b')}), {'Ethernet0': neighbor('b')})
+        self.assertEqual(dampener.flap_counts, {'Ethernet0': 3})
+
+    def test_time_mark_only_is_not_a_flap(self):
+        dampener = NeighborDampener(DampeningConfig(hold_down=30), clock=self.clock)
+        dampener.apply({'Ethernet0': neighbor('a', '1')})
+        self.clock.now = 10
+        self.assertEqual(dampener.apply({'Ethernet0': neighbor('a', '2')}), {'Ethernet0': neighbor('a', '2')})
+        self.assertEqual(dampener.flap_counts, {})
+
+    def test_suppress_and_reuse(self):
+        config = DampeningConfig(penalty=1000, suppress_threshold=2000, reuse_threshold=750, half_life=10)
+        dampener = NeighborDampener(clock=self.clock, overrides={'Ethernet4': config})
+        dampener.apply({'Ethernet4': neighbor('a')})
+
+        self.clock.now = 1
+        self.assertEqual(dampener.apply({}), {})
+        self.clock.now = 2
+        self.assertEqual(dampener.apply({'Ethernet4': neighbor('b')}), {'Ethernet4': neighbor('b')})
+        self.clock.now = 3
+        # third flap crosses the suppress threshold: the last published state is frozen
+        self.assertEqual(dampener.apply({}), {'Ethernet4': neighbor('b')})
+        self.assertTrue(dampener.is_suppressed('Ethernet4'))
+        self.clock.now = 4
+        self.assertEqual(dampener.apply({'Ethernet4': neighbor('c')}), {'Ethernet4': neighbor('b')})
+
+        # penalty decays below the reuse threshold after a few half-lives
+        self.clock.now = 30
+        self.assertEqual(dampener.apply({'Ethernet4': neighbor('c')}), {'Ethernet4': neighbor('c')})
+        self.assertFalse(dampener.is_suppressed('Ethernet4'))
+        self.assertEqual(dampener.flap_counts, {'Ethernet4': 4})
+
+    def test_invalid_thresholds(self):
+        with self.assertRaises(ValueError):
+            DampeningConfig(suppress_threshold=100, reuse_threshold=200)
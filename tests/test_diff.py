@@ -0,0 +1,68 @@
+import os
+import sys
+# noinspection PyUnresolvedReferences
+import tests.mock_tables.dbconnector
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase
+
+import mock
+
+import lldp_syncd.diff
+from lldp_syncd.diff import CacheIndex, entry_content, parsed_entry
+
+
+def neighbor(port_desc, time_mark='10'):
+    return {'lldp_rem_port_desc': port_desc, 'lldp_rem_time_mark': time_mark}
+
+
+class TestCacheIndex(TestCase):
+    def test_content(self):
+        self.assertEqual(entry_content(neighbor('a', '1')), entry_content(neighbor('a', '2')))
+        self.assertNotEqual(entry_content(neighbor('a')), entry_content(neighbor('b')))
+        entry = parsed_entry(list(neighbor('a', '1').items()))
+        self.assertEqual(entry, neighbor('a', '1'))
+        self.assertEqual(entry.content, entry_content(neighbor('a', '2')))
+
+    def test_parsed_entries(self):
+        index = CacheIndex()
+        index.commit(index.diff({'Ethernet0': parsed_entry(list(neighbor('a').items())), 'Ethernet4': neighbor('b')})[1])
+        update = {'Ethernet0': parsed_entry(list(neighbor('a', '20').items())),
+                  'Ethernet4': parsed_entry(list(neighbor('c').items()))}
+        # the content of parsed entries is not extracted again
+        with mock.patch.object(lldp_syncd.diff, 'entry_content', side_effect=AssertionError("extracted again")):
+            diff, _ = index.diff(update)
+        self.assertEqual(diff, ([], ['Ethernet4'], ['Ethernet0'], []))
+
+    def test_diff(self):
+        index = CacheIndex()
+        diff, fingerprints = index.diff({'Ethernet0': neighbor('a'), 'Ethernet4': neighbor('b')})
+        self.assertEqual(sorted(diff.new), ['Ethernet0', 'Ethernet4'])
+        self.assertEqual((diff.changed, diff.time_mark_only, diff.deleted), ([], [], []))
+        index.commit(fingerprints)
+
+        diff, fingerprints = index.diff({'Ethernet0': neighbor('a', '20'),
+                                         'Ethernet4': neighbor('c'),
+                                         'Ethernet8': neighbor('d')})
+        self.assertEqual(diff, (['Ethernet8'], ['Ethernet4'], ['Ethernet0'], []))
+        index.commit(fingerprints)
+
+        diff, fingerprints = index.diff({'Ethernet0': neighbor('a', '20')})
+        self.assertEqual(diff.new + diff.changed + diff.time_mark_only, [])
+        self.assertEqual(sorted(diff.deleted), ['Ethernet4', 'Ethernet8'])
+
+    def test_diff_subset(self):
+        index = CacheIndex()
+        _, fingerprints = index.diff({'Ethernet0': neighbor('a'), 'Ethernet4': neighbor('b'), 'Ethernet8': neighbor('c')})
+        index.commit(fingerprints)
+
+        # Ethernet8 is not part of the refresh and is left alone
+        diff, fingerprints = index.diff_subset({'Ethernet0': neighbor('x'), 'Ethernet12': neighbor('d')},
+                                               ['Ethernet0', 'Ethernet4', 'Ethernet12'])
+        self.assertEqual(diff, (['Ethernet12'], ['Ethernet0'], [], ['Ethernet4']))
+        index.commit_subset(['Ethernet0', 'Ethernet4', 'Ethernet12'], fingerprints)
+        self.assertEqual(sorted(index.entries), ['Ethernet0', 'Ethernet12', 'Ethernet8'])
+        self.assertEqual(index.diff({'Ethernet0': neighbor('x'), 'Ethernet8': neighbor('c'),
+                                     'Ethernet12': neighbor('d')})[0], ([], [], [], []))
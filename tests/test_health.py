@@ -0,0 +1,92 @@
+import os
+import sys
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase
+
+from sonic_syncd.health import LatencyWindow, RECOVERED, RESTART_SOURCE, STALE, SyncHealth
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSyncHealth(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_latency_window(self):
+        window = LatencyWindow(size=100)
+        self.assertIsNone(window.percentile(50))
+        for i in range(1, 201):
+            window.add(i)
+        # only the last 100 samples (101..200) are kept
+        self.assertEqual(window.percentile(50), 150)
+        self.assertEqual(window.percentile(99), 199)
+        self.assertEqual(window.percentile(100), 200)
+
+    def test_escalation(self):
+        health = SyncHealth(slo=30, clock=self.clock)
+        self.clock.now += 10
+        health.source_succeeded()
+        health.sync_succeeded()
+        self.assertIsNone(health.check())
+
+        # the source stops delivering
+        self.clock.now += 31
+        self.assertEqual(health.check(), STALE)
+        self.assertTrue(health.stale)
+        self.assertIsNone(health.check())
+        self.clock.now += 60
+        self.assertEqual(health.check(), RESTART_SOURCE)
+        self.clock.now += 30
+        self.assertIsNone(health.check())
+        self.clock.now += 30
+        self.assertEqual(health.check(), RESTART_SOURCE)
+        self.assertEqual(health.source_restarts, 2)
+
+        health.source_succeeded()
+        health.sync_succeeded()
+        self.assertEqual(health.check(), RECOVERED)
+        self.assertIsNone(health.check())
+
+    def test_failing_sync_does_not_restart_source(self):
+        health = SyncHealth(slo=30, clock=self.clock)
+        for _ in range(10):
+            self.clock.now += 20
+            health.source_succeeded()
+            self.assertNotEqual(health.check(), RESTART_SOURCE)
+        self.assertTrue(health.stale)
+        self.assertEqual(health.source_restarts, 0)
+
+    def test_disabled(self):
+        health = SyncHealth(clock=self.clock)
+        self.clock.now += 3600
+        self.assertIsNone(health.check())
+        self.assertEqual(health.freshness(), 3600)
+
+    def test_wall_clock_steps(self):
+        wall_clock = FakeClock()
+        health = SyncHealth(slo=30, clock=self.clock, wall_clock=wall_clock)
+        self.clock.now += 10
+        wall_clock.now = 1700000000.0
+        health.source_succeeded()
+        health.sync_succeeded()
+        # reported times are wall clock times
+        self.assertEqual((health.last_source_success, health.last_sync_success), (1700000000.0, 1700000000.0))
+
+        # a wall clock step neither makes the data stale...
+        wall_clock.now += 3600
+        self.assertEqual(health.freshness(), 0)
+        self.assertIsNone(health.check())
+        # ...nor hides staleness
+        self.clock.now += 31
+        wall_clock.now -= 3600
+        self.assertEqual(health.check(), STALE)
+        self.assertEqual(health.source_age(), 31)
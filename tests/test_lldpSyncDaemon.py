@@ -16,6 +16,7 @@ import lldp_syncd
 import lldp_syncd.conventions
 import lldp_syncd.daemon
 from swsscommon.swsscommon import SonicV2Connector
+from sonic_syncd.command import CommandResult
 
 INPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'subproc_outputs')
 TABLE_PREFIX = "LLDP_ENTRY_TABLE:"
@@ -26,6 +27,30 @@ def create_dbconnector():
     return db
 
 
+def delete_keys(db, *prefixes):
+    """
+    Remove auxiliary tables so they do not leak into other tests sharing the mock APPL_DB.
+    """
+    for k in db.keys(db.APPL_DB):
+        if k.startswith(prefixes):
+            db.delete(db.APPL_DB, k)
+
+
+def swap_script(call, keys, argv):
+    """
+    Python twin of sonic_syncd.shadow.SWAP_SCRIPT, run by the mock swsscommon.runRedisScript.
+    """
+    deleted = int(argv[0])
+    for key in keys[:deleted]:
+        call('DEL', key)
+    for shadow_key, live_key in zip(keys[deleted::2], keys[deleted + 1::2]):
+        fvs = call('HGETALL', shadow_key)
+        call('DEL', live_key)
+        if fvs:
+            call('HSET', live_key, *fvs)
+        call('DEL', shadow_key)
+
+
 def make_seconds(days, hours, minutes, seconds):
     """
     >>> make_seconds(0,5,9,5)
@@ -180,10 +205,9 @@ class TestLldpSyncDaemon(TestCase):
         if 'LLDP_ENTRY_TABLE:Ethernet104' in jo:
             self.fail("After removing Ethernet104, it is still found in APPL_DB!")
 
-    @mock.patch('subprocess.check_output')
-    def test_invalid_chassis_name(self, mock_check_output):
+    def test_invalid_chassis_name(self):
         # mock the invalid chassis name
-        mock_check_output.return_value = '''
+        output = b'''
         {
             "local-chassis": {
                 "chassis": {
@@ -216,8 +240,11 @@ class TestLldpSyncDaemon(TestCase):
             }
         }
         '''
-        result = self.daemon.source_update()
+        results = [CommandResult([cmd], output, returncode=0) for cmd in ('lldpctl', 'lldpcli')]
+        with mock.patch.object(self.daemon.command_runner, 'run', return_value=results):
+            result = self.daemon.source_update()
         self.assertIsNone(result)
+        self.assertTrue(self.daemon.source_stale)
 
 
     def test_changed_interface(self):
@@ -271,3 +298,609 @@ class TestLldpSyncDaemon(TestCase):
                     self.assertEqual(jo[k], 'Ethernet1')
                 else:
                     jo[k] = db.get_all(db.APPL_DB, k)
+
+    def test_dampened_flap(self):
+        from lldp_syncd.dampening import DampeningConfig, NeighborDampener
+        clock = mock.Mock(return_value=0)
+        self.daemon.dampener = NeighborDampener(DampeningConfig(hold_down=30, suppress_threshold=10000),
+                                                clock=clock)
+        parsed_update = self.daemon.parse_update(self._json)
+        self.daemon.sync(parsed_update)
+        db = create_dbconnector()
+        self.assertTrue(db.exists(db.APPL_DB, TABLE_PREFIX + 'Ethernet104'))
+
+        # Ethernet104 goes away, then comes back before the hold-down expires
+        clock.return_value = 10
+        flapped_json = json.loads(json.dumps(self._json))
+        flapped_json['lldp']['interface'].pop(3)
+        self.daemon.sync(self.daemon.parse_update(flapped_json))
+        self.assertTrue(db.exists(db.APPL_DB, TABLE_PREFIX + 'Ethernet104'))
+
+        clock.return_value = 20
+        self.daemon.sync(self.daemon.parse_update(self._json))
+        self.assertTrue(db.exists(db.APPL_DB, TABLE_PREFIX + 'Ethernet104'))
+        self.assertEqual(self.daemon.dampener.flap_counts, {'Ethernet104': 2})
+
+        # once the interface has settled down, the removal is published
+        clock.return_value = 30
+        self.daemon.sync(self.daemon.parse_update(flapped_json))
+        clock.return_value = 60
+        self.daemon.sync(self.daemon.parse_update(flapped_json))
+        self.assertFalse(db.exists(db.APPL_DB, TABLE_PREFIX + 'Ethernet104'))
+
+    def test_change_journal(self):
+        from lldp_syncd.journal import read_changes
+        db = create_dbconnector()
+        self.addCleanup(delete_keys, db, 'LLDP_ENTRY_JOURNAL', 'LLDP_ENTRY_GENERATION')
+        daemon = lldp_syncd.LldpSyncDaemon(journal_size=2)
+        daemon.sync(daemon.parse_update(self._json))
+        epoch = daemon.journal.epoch
+        # a new reader has to scan the table first
+        self.assertEqual(read_changes(db, None, 0), (epoch, 1, None))
+        _, generation, changes = read_changes(db, epoch, 0)
+        self.assertEqual(generation, 1)
+        self.assertEqual(set(changes), set(k for k in daemon.interfaces_cache
+                                           if re.match(lldp_syncd.daemon.SONIC_ETHERNET_RE_PATTERN, k)))
+
+        # time mark refreshes do not bump the generation
+        changed_json = json.loads(json.dumps(self._json))
+        changed_json['lldp']['interface'][0]['eth0']['age'] = '0 day, 05:09:12'
+        daemon.sync(daemon.parse_update(changed_json))
+        self.assertEqual(read_changes(db, epoch, 1), (epoch, 1, {}))
+
+        changed_json['lldp']['interface'][1]['Ethernet0']['port']['descr'] = 'Ethernet1'
+        daemon.sync(daemon.parse_update(changed_json))
+        changed_json['lldp']['interface'].pop(3)
+        daemon.sync(daemon.parse_update(changed_json))
+        self.assertEqual(read_changes(db, epoch, 1), (epoch, 3, {'Ethernet0': 'set', 'Ethernet104': 'del'}))
+        self.assertEqual(read_changes(db, epoch, 2), (epoch, 3, {'Ethernet104': 'del'}))
+
+        # generation 1 fell out of the journal: the reader has to rescan
+        self.assertFalse(db.exists(db.APPL_DB, 'LLDP_ENTRY_JOURNAL:1'))
+        self.assertEqual(read_changes(db, epoch, 0), (epoch, 3, None))
+
+        # APPL_DB flushed: the generation restarts, under a new epoch
+        delete_keys(db, 'LLDP_ENTRY_JOURNAL', 'LLDP_ENTRY_GENERATION')
+        daemon.request_full_resync()
+        for _ in range(3):
+            changed_json['lldp']['interface'][1]['Ethernet0']['port']['descr'] += '1'
+            daemon.sync(daemon.parse_update(changed_json))
+        new_epoch, generation, changes = read_changes(db, epoch, 2)
+        self.assertNotEqual(new_epoch, epoch)
+        self.assertGreater(generation, 2)
+        self.assertIsNone(changes)
+
+    def test_neighbor_index(self):
+        from lldp_syncd.neighbor_index import CHASSIS_INDEX_TABLE, MAN_ADDR_INDEX_TABLE, lookup_ports
+        db = create_dbconnector()
+        self.addCleanup(delete_keys, db, CHASSIS_INDEX_TABLE, MAN_ADDR_INDEX_TABLE)
+        daemon = lldp_syncd.LldpSyncDaemon(neighbor_index=True)
+        daemon.sync(daemon.parse_update(self._json))
+
+        expected = set(k for k, v in daemon.interfaces_cache.items()
+                       if v.get('lldp_rem_chassis_id') == '00:11:22:33:44:55')
+        self.assertIn('Ethernet104', expected)
+        self.assertEqual(lookup_ports(db, CHASSIS_INDEX_TABLE, '00:11:22:33:44:55'), expected)
+        self.assertIn('Ethernet0', lookup_ports(db, MAN_ADDR_INDEX_TABLE, '10.3.147.196'))
+
+        changed_json = json.loads(json.dumps(self._json))
+        changed_json['lldp']['interface'][1]['Ethernet0']['chassis']['switch13']['id']['value'] = '00:11:22:33:44:66'
+        changed_json['lldp']['interface'].pop(3)  # Remove interface Ethernet104
+        daemon.sync(daemon.parse_update(changed_json))
+
+        self.assertEqual(lookup_ports(db, CHASSIS_INDEX_TABLE, '00:11:22:33:44:55'),
+                         expected - {'Ethernet0', 'Ethernet104'})
+        self.assertEqual(lookup_ports(db, CHASSIS_INDEX_TABLE, '00:11:22:33:44:66'), {'Ethernet0'})
+        self.assertEqual(daemon.neighbor_index.ports(CHASSIS_INDEX_TABLE, '00:11:22:33:44:66'), {'Ethernet0'})
+
+    def test_field_projection(self):
+        daemon = lldp_syncd.LldpSyncDaemon(fields=('lldp_rem_port_id', 'lldp_rem_chassis_id'))
+        with mock.patch.object(lldp_syncd.daemon, 'get_sys_capability_list',
+                               wraps=lldp_syncd.daemon.get_sys_capability_list) as mock_capabilities:
+            parsed_update = daemon.parse_update(self._json)
+        # only the local chassis capabilities are parsed
+        self.assertEqual([args[1] for args, _ in mock_capabilities.call_args_list], ['local'])
+        self.assertEqual(parsed_update['Ethernet0'], {'lldp_rem_port_id': 'Ethernet1',
+                                                      'lldp_rem_chassis_id': '00:11:22:33:44:55'})
+        # the local chassis is not subject to the projection
+        self.assertIn('lldp_loc_sys_cap_enabled', parsed_update['local-chassis'])
+
+    def test_extra_tlv_fields(self):
+        from lldp_syncd.fields import DEFAULT_FIELDS
+        daemon = lldp_syncd.LldpSyncDaemon(fields=DEFAULT_FIELDS + ('lldp_rem_vlan_ids', 'lldp_rem_pvid',
+                                                                    'lldp_rem_med_device_type',
+                                                                    'lldp_rem_med_capabilities'))
+        parsed_update = daemon.parse_update(self._json)
+        default_update = self.daemon.parse_update(json.loads(json.dumps(self._json)))
+        self.assertEqual(parsed_update['eth0']['lldp_rem_med_device_type'], 'Network Connectivity Device')
+        self.assertEqual(parsed_update['eth0']['lldp_rem_med_capabilities'],
+                         'Capabilities,Policy,Location,MDI/PSE')
+        self.assertEqual(parsed_update['Ethernet0']['lldp_rem_vlan_ids'], '101,201')
+        self.assertEqual(parsed_update['Ethernet0']['lldp_rem_pvid'], '101')
+        self.assertEqual(parsed_update['Ethernet0']['lldp_rem_med_device_type'], '')
+        for field in DEFAULT_FIELDS:
+            self.assertEqual(parsed_update['Ethernet0'][field], default_update['Ethernet0'][field])
+
+        with self.assertRaises(ValueError):
+            lldp_syncd.LldpSyncDaemon(fields=('lldp_rem_no_such_field',))
+
+    def test_deferred_connection(self):
+        daemon = lldp_syncd.LldpSyncDaemon()
+        self.assertFalse(daemon.connection.connected)
+        daemon.parse_update(self._json)
+        self.assertFalse(daemon.connection.connected)
+        self.assertIsNotNone(daemon.db_connector)
+        self.assertTrue(daemon.connection.connected)
+
+    def test_snapshot_restart(self):
+        import shutil
+        import tempfile
+        from lldp_syncd.snapshot import load_snapshot
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        snapshot_path = os.path.join(tmpdir, 'lldp.snapshot')
+
+        daemon = lldp_syncd.LldpSyncDaemon(snapshot_path=snapshot_path)
+        daemon.sync(daemon.parse_update(self._json))
+        chassis_cache, interfaces_cache = load_snapshot(snapshot_path)
+        self.assertEqual(chassis_cache, daemon.chassis_cache)
+        self.assertEqual(interfaces_cache, daemon.interfaces_cache)
+
+        restarted = lldp_syncd.LldpSyncDaemon(snapshot_path=snapshot_path)
+        restarted.connect()
+        # while the daemon was down, APPL_DB lost one entry and another was overwritten
+        restarted.db_connector.delete(restarted.db_connector.APPL_DB, TABLE_PREFIX + 'Ethernet0')
+        restarted.db_connector.set(restarted.db_connector.APPL_DB, TABLE_PREFIX + 'Ethernet100',
+                                   'lldp_rem_port_desc', 'stale')
+
+        with mock.patch.object(restarted.db_connector, 'hmset', wraps=restarted.db_connector.hmset) as hmset, \
+                mock.patch.object(restarted.db_connector, 'set', wraps=restarted.db_connector.set) as set_:
+            restarted.sync(restarted.parse_update(self._json))
+        self.assertEqual(sorted(args[1] for args, _ in hmset.call_args_list),
+                         [TABLE_PREFIX + 'Ethernet0', TABLE_PREFIX + 'Ethernet100'])
+        set_.assert_not_called()
+        self.assertEqual(restarted.interfaces_cache, daemon.interfaces_cache)
+
+    def test_corrupt_snapshot(self):
+        import shutil
+        import tempfile
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        snapshot_path = os.path.join(tmpdir, 'lldp.snapshot')
+        with open(snapshot_path, 'wb') as f:
+            f.write(b'LLDPSNP1\xff\xff')
+
+        daemon = lldp_syncd.LldpSyncDaemon(snapshot_path=snapshot_path)
+        parsed_update = daemon.parse_update(self._json)
+        daemon.sync(parsed_update)
+        self.assertEqual(daemon.interfaces_cache, parsed_update)
+
+        # a failed write leaves neither a partial snapshot nor its temporary file behind
+        with mock.patch('os.fsync', side_effect=OSError("No space left on device")):
+            daemon.save_snapshot()
+        self.assertEqual(os.listdir(tmpdir), ['lldp.snapshot'])
+
+    def test_reconnect_full_resync(self):
+        from sonic_syncd.connection import DBConnectionManager
+        from tests.mock_tables.dbconnector import MockConnector
+        connectors = []
+
+        def connector_factory(use_unix_socket_path):
+            connectors.append(MockConnector(use_unix_socket_path=use_unix_socket_path))
+            return connectors[-1]
+
+        daemon = lldp_syncd.LldpSyncDaemon(connection=DBConnectionManager(connector_factory=connector_factory))
+        daemon.sync(daemon.parse_update(self._json))
+        db = create_dbconnector()
+        db.hmset(db.APPL_DB, TABLE_PREFIX + 'Ethernet999', {'lldp_rem_port_id': 'stale'})
+
+        # the write fails half way: the connection is dropped and nothing propagates out of sync
+        changed_json = json.loads(json.dumps(self._json))
+        changed_json['lldp']['interface'][1]['Ethernet0']['port']['descr'] = 'Ethernet1'
+        with mock.patch.object(connectors[0], 'hmset', side_effect=RuntimeError("connection reset")):
+            daemon.sync(daemon.parse_update(changed_json))
+        self.assertFalse(daemon.connection.connected)
+
+        # the next cycle reconnects and rewrites everything, dropping entries nobody owns anymore
+        daemon.sync(daemon.parse_update(changed_json))
+        self.assertEqual(len(connectors), 2)
+        self.assertEqual(daemon.connection.reconnects, 1)
+        self.assertFalse(db.exists(db.APPL_DB, TABLE_PREFIX + 'Ethernet999'))
+        self.assertEqual(db.get(db.APPL_DB, TABLE_PREFIX + 'Ethernet0', 'lldp_rem_port_desc'), 'Ethernet1')
+        self.assertEqual(daemon.chassis_cache, db.get_all(db.APPL_DB, 'LLDP_LOC_CHASSIS'))
+
+        # a bug is not mistaken for a lost connection
+        with mock.patch.object(daemon, '_publish', side_effect=RuntimeError("dictionary changed size")):
+            with self.assertRaises(RuntimeError):
+                daemon.sync(daemon.parse_update(changed_json))
+        self.assertTrue(daemon.connection.connected)
+        self.assertFalse(daemon._full_resync_pending)
+
+    def test_port_down_event(self):
+        from sonic_syncd.events import PortStatusEventSource
+        from tests.mock_tables.dbconnector import MockSubscriberStateTable
+        self.addCleanup(MockSubscriberStateTable.queues.clear)
+        MockSubscriberStateTable.queues.clear()
+
+        daemon = lldp_syncd.LldpSyncDaemon(journal_size=4,
+                                           event_source=PortStatusEventSource(select_timeout_ms=50))
+        db = create_dbconnector()
+        self.addCleanup(delete_keys, db, 'LLDP_ENTRY_GENERATION', 'LLDP_ENTRY_JOURNAL')
+        synced = mock.MagicMock()
+        daemon.source_update = mock.MagicMock(return_value=self._json)
+        real_sync = daemon.sync
+
+        def sync(parsed_update):
+            real_sync(parsed_update)
+            synced()
+
+        daemon.sync = sync
+        daemon.start()
+        self.addCleanup(daemon.join, 5)
+        self.addCleanup(daemon.stop)
+        deadline = time.time() + 5
+        while not synced.called and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(db.exists(db.APPL_DB, TABLE_PREFIX + 'Ethernet0'))
+
+        MockSubscriberStateTable.publish('PORT_TABLE', 'Ethernet4', 'SET', [('oper_status', 'up')])
+        MockSubscriberStateTable.publish('PORT_TABLE', 'Ethernet0', 'SET', [('oper_status', 'down'), ('mtu', '9100')])
+        start = time.time()
+        while db.exists(db.APPL_DB, TABLE_PREFIX + 'Ethernet0') and time.time() - start < 5:
+            time.sleep(0.01)
+        # removed well before the next poll, without one
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(daemon.source_update.call_count, 1)
+        self.assertNotIn('Ethernet0', daemon.interfaces_cache)
+        self.assertTrue(db.exists(db.APPL_DB, TABLE_PREFIX + 'Ethernet4'))
+        self.assertEqual(db.get_all(db.APPL_DB, 'LLDP_ENTRY_JOURNAL:2'), {'Ethernet0': 'del'})
+
+        # lldpd still reports the neighbor until it ages out: it stays withdrawn while the port is down
+        daemon.sync(daemon.parse_update(self._json))
+        self.assertFalse(db.exists(db.APPL_DB, TABLE_PREFIX + 'Ethernet0'))
+
+        MockSubscriberStateTable.publish('PORT_TABLE', 'Ethernet0', 'SET', [('oper_status', 'up')])
+        start = time.time()
+        while daemon.oper_down and time.time() - start < 5:
+            time.sleep(0.01)
+        daemon.stop()
+        daemon.join(5)
+        daemon.sync(daemon.parse_update(self._json))
+        self.assertTrue(db.exists(db.APPL_DB, TABLE_PREFIX + 'Ethernet0'))
+
+    def test_refresh_ports(self):
+        daemon = lldp_syncd.LldpSyncDaemon()
+        daemon.sync(daemon.parse_update(self._json))
+        db = create_dbconnector()
+        ethernet8 = db.get_all(db.APPL_DB, TABLE_PREFIX + 'Ethernet8')
+
+        # lldpcli reports Ethernet0 with a new port description and no neighbor on Ethernet4
+        refreshed_json = json.loads(json.dumps(self._json))
+        refreshed_json['lldp']['interface'] = [i for i in refreshed_json['lldp']['interface'] if 'Ethernet0' in i]
+        refreshed_json['lldp']['interface'][0]['Ethernet0']['port']['descr'] = 'Ethernet1'
+        result = CommandResult(None, json.dumps(refreshed_json).encode(), returncode=0)
+        daemon.command_runner.run = mock.MagicMock(return_value=[result])
+        daemon.cache_index.diff = mock.MagicMock(side_effect=AssertionError("full diff on a partial refresh"))
+
+        self.assertTrue(daemon.refresh_ports(['Ethernet4', 'Ethernet0']))
+        cmd, = daemon.command_runner.run.call_args[0][0]
+        self.assertEqual(cmd[-3:], ['ports', 'Ethernet0,Ethernet4', 'details'])
+        self.assertEqual(db.get(db.APPL_DB, TABLE_PREFIX + 'Ethernet0', 'lldp_rem_port_desc'), 'Ethernet1')
+        self.assertFalse(db.exists(db.APPL_DB, TABLE_PREFIX + 'Ethernet4'))
+        self.assertNotIn('Ethernet4', daemon.interfaces_cache)
+        # other ports are untouched
+        self.assertEqual(db.get_all(db.APPL_DB, TABLE_PREFIX + 'Ethernet8'), ethernet8)
+        self.assertIn('Ethernet8', daemon.interfaces_cache)
+
+    def test_interface_layouts(self):
+        from lldp_syncd.daemon import split_chassis
+        # a single neighbor is rendered as a dict keyed by interface name instead of a list
+        list_json = json.loads(json.dumps(self._json))
+        list_json['lldp']['interface'] = [i for i in list_json['lldp']['interface'] if 'Ethernet0' in i]
+        dict_json = json.loads(json.dumps(list_json))
+        dict_json['lldp']['interface'] = dict_json['lldp']['interface'][0]
+        expected = self.daemon.parse_update(list_json)
+        self.assertEqual(list(expected), ['Ethernet0', 'local-chassis'])
+        self.assertEqual(self.daemon.parse_update(dict_json), expected)
+
+        self.assertEqual(split_chassis({'id': {'type': 'mac'}, 'descr': 'd'}), ('', {'id': {'type': 'mac'}, 'descr': 'd'}))
+        self.assertEqual(split_chassis({'switch': {'id': {'type': 'mac'}}}), ('switch', {'id': {'type': 'mac'}}))
+        self.assertEqual(split_chassis({'id': {'id': {'type': 'mac'}}}), ('id', {'id': {'type': 'mac'}}))
+        self.assertEqual(split_chassis({}), ('', {}))
+
+    def test_write_scheduler(self):
+        from sonic_syncd.scheduler import WriteScheduler
+        from tests.test_scheduler import FakeClock
+        clock = FakeClock()
+        from lldp_syncd.neighbor_index import CHASSIS_INDEX_TABLE
+        daemon = lldp_syncd.LldpSyncDaemon(journal_size=4, neighbor_index=True, history_size=100,
+                                           write_scheduler=WriteScheduler(10, 10 ** 6, clock=clock))
+        db = create_dbconnector()
+        self.addCleanup(delete_keys, db, 'LLDP_ENTRY_GENERATION', 'LLDP_ENTRY_JOURNAL', 'LLDP_REM_')
+        daemon.connect()
+        delete_keys(db, TABLE_PREFIX)
+        parsed_update = daemon.parse_update(self._json)
+        interfaces = sorted(k for k in parsed_update if k != 'local-chassis')
+        daemon.sync(parsed_update)
+
+        # the first burst is capped at the budget; the rest is drained by background work
+        written = [k for k in db.keys(db.APPL_DB) if k.startswith(TABLE_PREFIX)]
+        self.assertEqual(len(written), 10)
+        self.assertEqual(daemon.write_scheduler.backlog, len(interfaces) - 10)
+        self.assertEqual(len(db.get_all(db.APPL_DB, 'LLDP_ENTRY_JOURNAL:1')), 10)
+        # indexes and history only cover what was written
+        indexed = set()
+        for key in db.keys(db.APPL_DB, CHASSIS_INDEX_TABLE + ':*'):
+            indexed.update(db.get(db.APPL_DB, key, 'ports').split(','))
+        self.assertEqual(indexed, set(k[len(TABLE_PREFIX):] for k in written))
+        self.assertEqual(set(event['interface'] for event in daemon.history.query(count=100)), indexed)
+        while True:
+            delay = daemon.background_work()
+            if delay is None:
+                break
+            self.assertLessEqual(delay, 0.1)
+            # a second worth of budget per step: 3 more batches
+            clock.now += 1
+        self.assertEqual(sorted(k[len(TABLE_PREFIX):] for k in db.keys(db.APPL_DB) if k.startswith(TABLE_PREFIX)),
+                         interfaces)
+        self.assertEqual(db.get_all(db.APPL_DB, TABLE_PREFIX + 'Ethernet0'), parsed_update['Ethernet0'])
+        self.assertEqual(db.get(db.APPL_DB, 'LLDP_ENTRY_GENERATION', 'generation'), '4')
+        self.assertEqual(len(daemon.history), len(interfaces))
+
+    def test_write_scheduler_commands(self):
+        from sonic_syncd.scheduler import WriteScheduler
+        from tests.mock_tables.dbconnector import MockConnector
+        from tests.test_scheduler import FakeClock
+        clock = FakeClock()
+        daemon = lldp_syncd.LldpSyncDaemon(write_scheduler=WriteScheduler(20, 10 ** 7, command_burst=2, clock=clock))
+        db = create_dbconnector()
+        daemon.connect()
+        delete_keys(db, TABLE_PREFIX)
+        daemon.sync(daemon.parse_update(self._json))
+        backlog = daemon.write_scheduler.backlog
+        self.assertGreater(backlog, 0)
+
+        # every Redis command sent while draining the backlog
+        commands = []
+        for name in ('exists', 'keys', 'get', 'get_all', 'set', 'hmset', 'delete'):
+            def counted(connector, *args, _name=name, _method=getattr(MockConnector, name)):
+                commands.append(_name)
+                return _method(connector, *args)
+            patcher = mock.patch.object(MockConnector, name, counted)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        while daemon.background_work() is not None:
+            clock.now += 1
+        # only the scheduled writes: no health probe per drain step
+        self.assertEqual(daemon.write_scheduler.backlog, 0)
+        self.assertEqual(commands, ['hmset'] * backlog)
+
+    def test_parallel_parse(self):
+        from concurrent.futures import ProcessPoolExecutor
+        from lldp_syncd import parallel
+        daemon = lldp_syncd.LldpSyncDaemon(parse_processes=2)
+        self.addCleanup(daemon.parallel_parser.close)
+        interfaces = len(self._json['lldp']['interface'])
+        daemon.parallel_parser.threshold = interfaces
+        expected = self.daemon.parse_update(self._json)
+
+        # below the threshold: parsed serially, no pool is started
+        short = json.loads(json.dumps(self._json))
+        short['lldp']['interface'] = short['lldp']['interface'][:4]
+        self.assertEqual(set(daemon.parse_update(short)), {'eth0', 'Ethernet0', 'Ethernet100', 'Ethernet104',
+                                                           'local-chassis'})
+        self.assertIsNone(daemon.parallel_parser._executor)
+
+        # each worker is sent its own slice of the interfaces only
+        with mock.patch.object(daemon, 'parse_interface', side_effect=AssertionError("parsed serially")), \
+                mock.patch.object(ProcessPoolExecutor, 'map', autospec=True,
+                                  side_effect=ProcessPoolExecutor.map) as pool_map:
+            parsed_update = daemon.parse_update(self._json)
+        _, function, slices = pool_map.call_args[0]
+        self.assertIs(function, parallel._parse_part)
+        self.assertEqual([len(part) for part in slices], [interfaces // 2, interfaces - interfaces // 2])
+        self.assertEqual(parsed_update, expected)
+        self.assertEqual(list(parsed_update), list(expected))
+        executor = daemon.parallel_parser._executor
+        self.assertIsNotNone(executor)
+        # the pool is reused across cycles
+        daemon.parse_update(self._json)
+        self.assertIs(daemon.parallel_parser._executor, executor)
+
+        # worker log records are re-emitted in the parent
+        broken = json.loads(json.dumps(self._json))
+        del broken['lldp']['interface'][1]['Ethernet0']['chassis']
+        with self.assertLogs('lldp_syncd', 'INFO') as logs:
+            daemon.parse_update(broken)
+        self.assertIn("Failed to get system capabilities on Ethernet0 ()", logs.output[0])
+
+        # an unusable pool falls back to serial parsing
+        with mock.patch.object(daemon.parallel_parser, '_pool', side_effect=OSError("no processes")), \
+                self.assertLogs('lldp_syncd', 'ERROR'):
+            self.assertEqual(daemon.parse_update(self._json), expected)
+
+    def _register_swap_script(self, handler):
+        from sonic_syncd.shadow import SWAP_SCRIPT
+        from tests.mock_tables.dbconnector import MockRedisScripts
+        self.addCleanup(MockRedisScripts.handlers.pop, SWAP_SCRIPT, None)
+        self.addCleanup(setattr, MockRedisScripts, 'calls', [])
+        MockRedisScripts.handlers[SWAP_SCRIPT] = handler
+        MockRedisScripts.calls = []
+        return MockRedisScripts
+
+    def test_table_swap(self):
+        scripts = self._register_swap_script(swap_script)
+        daemon = lldp_syncd.LldpSyncDaemon(table_swap_threshold=5)
+        db = create_dbconnector()
+        daemon.connect()
+        db.hmset(db.APPL_DB, TABLE_PREFIX + 'Ethernet999', {'lldp_rem_port_id': 'stale'})
+        db.hmset(db.APPL_DB, 'LLDP_ENTRY_TABLE_SHADOW:Ethernet998', {'lldp_rem_port_id': 'leftover'})
+
+        # the first sync rewrites every entry: swapped in, in one script
+        parsed_update = daemon.parse_update(self._json)
+        daemon.sync(parsed_update)
+        self.assertEqual(daemon.table_swap.swaps, 1)
+        self.assertIn(('DEL', TABLE_PREFIX + 'Ethernet999'), scripts.calls)
+        # live entries are notified as del + hset, as for an incremental replace
+        live_calls = [call[0] for call in scripts.calls if call[1] == TABLE_PREFIX + 'Ethernet0']
+        self.assertEqual(live_calls, ['DEL', 'HSET'])
+        self.assertEqual([k for k in db.keys(db.APPL_DB) if k.startswith('LLDP_ENTRY_TABLE_SHADOW')], [])
+        self.assertEqual(db.get_all(db.APPL_DB, TABLE_PREFIX + 'Ethernet0'), parsed_update['Ethernet0'])
+
+        # a small change is written incrementally
+        changed_json = json.loads(json.dumps(self._json))
+        changed_json['lldp']['interface'][1]['Ethernet0']['port']['descr'] = 'Ethernet1'
+        del changed_json['lldp']['interface'][2]
+        daemon.sync(daemon.parse_update(changed_json))
+        self.assertEqual(daemon.table_swap.swaps, 1)
+        self.assertEqual(db.get(db.APPL_DB, TABLE_PREFIX + 'Ethernet0', 'lldp_rem_port_desc'), 'Ethernet1')
+        self.assertFalse(db.exists(db.APPL_DB, TABLE_PREFIX + 'Ethernet100'))
+
+        # a full resync is always swapped in
+        daemon.request_full_resync()
+        daemon.sync(daemon.parse_update(changed_json))
+        self.assertEqual(daemon.table_swap.swaps, 2)
+        self.assertFalse(daemon._full_resync_pending)
+
+        with self.assertRaises(ValueError):
+            lldp_syncd.LldpSyncDaemon(table_swap_threshold=5, publisher=mock.MagicMock())
+
+    def test_table_swap_failure(self):
+        def failing_swap_script(call, keys, argv):
+            # fails midway, after some entries were swapped in
+            call('DEL', keys[0])
+            call('BOGUS')
+
+        self._register_swap_script(failing_swap_script)
+        daemon = lldp_syncd.LldpSyncDaemon(table_swap_threshold=5)
+        db = create_dbconnector()
+        daemon.connect()
+        db.hmset(db.APPL_DB, TABLE_PREFIX + 'Ethernet999', {'lldp_rem_port_id': 'stale'})
+
+        # the cycle is written incrementally instead, and later ones too
+        with self.assertLogs('lldp_syncd', 'ERROR'):
+            parsed_update = daemon.parse_update(self._json)
+            daemon.sync(parsed_update)
+        self.assertIsNone(daemon.table_swap)
+        self.assertEqual(sorted(k[len(TABLE_PREFIX):] for k in db.keys(db.APPL_DB) if k.startswith(TABLE_PREFIX)),
+                         sorted(k for k in parsed_update if k != 'local-chassis'))
+        self.assertEqual(db.get_all(db.APPL_DB, TABLE_PREFIX + 'Ethernet0'), parsed_update['Ethernet0'])
+        self.assertEqual([k for k in db.keys(db.APPL_DB) if k.startswith('LLDP_ENTRY_TABLE_SHADOW')], [])
+
+    def test_freshness_watchdog(self):
+        from sonic_syncd.health import SyncHealth
+        from tests.test_health import FakeClock
+        clock = FakeClock()
+        daemon = lldp_syncd.LldpSyncDaemon(freshness_slo=30)
+        wall_clock = FakeClock()
+        wall_clock.now = 1700000000.0
+        daemon.health = SyncHealth(30, clock=clock, wall_clock=wall_clock)
+        db = create_dbconnector()
+        self.addCleanup(delete_keys, db, 'LLDP_ENTRY_FRESHNESS')
+
+        daemon.health.source_succeeded()
+        self.assertTrue(daemon.sync(daemon.parse_update(self._json)))
+        daemon.health.sync_succeeded()
+        daemon.health.cycle_finished(0.25)
+        daemon._check_health()
+        status = db.get_all(db.APPL_DB, 'LLDP_ENTRY_FRESHNESS')
+        self.assertEqual(status['stale'], 'false')
+        self.assertEqual(status['last_sync'], '1700000000.000')
+        self.assertEqual(status['cycle_latency_p99'], '0.250')
+
+        # lldpctl keeps failing: reported stale, then lldpd is restarted
+        daemon.command_runner.run = mock.MagicMock(return_value=[CommandResult(None, returncode=0)])
+        clock.now += 31
+        daemon._check_health()
+        self.assertEqual(db.get(db.APPL_DB, 'LLDP_ENTRY_FRESHNESS', 'stale'), 'true')
+        daemon.command_runner.run.assert_not_called()
+        clock.now += 60
+        daemon._check_health()
+        daemon.command_runner.run.assert_called_once_with([list(lldp_syncd.daemon.DEFAULT_SOURCE_RESTART_CMD)])
+
+    def test_batch_writes(self):
+        from sonic_syncd.publisher import BATCH_SCRIPT
+        from tests.mock_tables.dbconnector import MockRedisScripts
+        from tests.test_publisher import batch_script
+        runs = []
+
+        def counting_batch_script(call, keys, argv):
+            runs.append(len(keys))
+            batch_script(call, keys, argv)
+
+        self.addCleanup(MockRedisScripts.handlers.pop, BATCH_SCRIPT, None)
+        MockRedisScripts.handlers[BATCH_SCRIPT] = counting_batch_script
+        daemon = lldp_syncd.LldpSyncDaemon(batch_writes=True)
+        db = create_dbconnector()
+        daemon.connect()
+
+        parsed_update = daemon.parse_update(self._json)
+        daemon.sync(parsed_update)
+        # the whole cycle in one script run
+        self.assertEqual(len(runs), 1)
+        for key, fvs in parsed_update.items():
+            if key != 'local-chassis':
+                self.assertEqual(db.get_all(db.APPL_DB, TABLE_PREFIX + key), fvs)
+
+        changed_json = json.loads(json.dumps(self._json))
+        changed_json['lldp']['interface'][1]['Ethernet0']['port']['descr'] = 'Ethernet1'
+        del changed_json['lldp']['interface'][2]
+        daemon.sync(daemon.parse_update(changed_json))
+        self.assertEqual(len(runs), 2)
+        self.assertEqual(db.get(db.APPL_DB, TABLE_PREFIX + 'Ethernet0', 'lldp_rem_port_desc'), 'Ethernet1')
+        self.assertFalse(db.exists(db.APPL_DB, TABLE_PREFIX + 'Ethernet100'))
+
+        with self.assertRaises(ValueError):
+            lldp_syncd.LldpSyncDaemon(batch_writes=True, publisher=mock.MagicMock())
+
+    def test_main_history_opt_in(self):
+        import lldp_syncd.main
+        from lldp_syncd.history import DEFAULT_HISTORY_SIZE, DEFAULT_SOCKET_PATH
+        with mock.patch.object(lldp_syncd.daemon, 'LldpSyncDaemon') as daemon_class:
+            lldp_syncd.main.main()
+            # off by default, keeping the per-change INFO log lines
+            _, kwargs = daemon_class.call_args
+            self.assertEqual((kwargs['history_size'], kwargs['history_socket']), (0, None))
+            self.assertFalse(kwargs['batch_writes'])
+            lldp_syncd.main.main(history=True)
+            _, kwargs = daemon_class.call_args
+            self.assertEqual((kwargs['history_size'], kwargs['history_socket']),
+                             (DEFAULT_HISTORY_SIZE, DEFAULT_SOCKET_PATH))
+            lldp_syncd.main.main(batch_writes=True)
+            self.assertTrue(daemon_class.call_args[1]['batch_writes'])
+
+    def test_change_history(self):
+        import shutil
+        import tempfile
+        from lldp_syncd.history import HistoryServer, query_history
+        daemon = lldp_syncd.LldpSyncDaemon(history_size=8)
+        daemon.connect()
+        parsed_update = daemon.parse_update(self._json)
+        daemon.sync(parsed_update)
+        self.assertEqual({event['op'] for event in daemon.history.query(count=100)}, {'add'})
+
+        changed_json = json.loads(json.dumps(self._json))
+        changed_json['lldp']['interface'][1]['Ethernet0']['port']['descr'] = 'Ethernet1'
+        del changed_json['lldp']['interface'][2]
+        with mock.patch.object(lldp_syncd.daemon.logger, 'info') as info:
+            daemon.sync(daemon.parse_update(changed_json))
+        # per-change lines are demoted to debug
+        info.assert_not_called()
+        event, = daemon.history.query('Ethernet0')
+        self.assertEqual((event['op'], event['fields']), ('change', ['lldp_rem_port_desc']))
+        self.assertEqual(daemon.history.query('Ethernet100')[-1]['op'], 'delete')
+        # bounded
+        self.assertEqual(len(daemon.history), 8)
+
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        server = HistoryServer(daemon.history, os.path.join(tmp_dir, 'history.sock'))
+        server.start()
+        self.addCleanup(server.stop)
+        self.assertEqual(query_history(server.path, 'Ethernet0', 1), [event])
+        self.assertEqual(len(query_history(server.path, count=5)), 5)
+        # counts below 1 are rejected, not sliced from the wrong end
+        for count in (0, -1):
+            self.assertEqual(query_history(server.path, count=count), {'error': 'count must be at least 1'})
+            with self.assertRaises(ValueError):
+                daemon.history.query(count=count)
@@ -0,0 +1,66 @@
+import os
+import sys
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase
+import logging
+
+from sonic_syncd.logutil import LazyJson, RateLimitedLogger, Truncated, truncate
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super(ListHandler, self).__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class Unprintable(object):
+    def __str__(self):
+        raise AssertionError("payload formatted while the level is disabled")
+
+
+class TestLogUtil(TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('test_logutil')
+        self.logger.propagate = False
+        self.handler = ListHandler()
+        self.logger.handlers = [self.handler]
+        self.logger.setLevel(logging.INFO)
+        self.clock = FakeClock()
+        self.rate_limited = RateLimitedLogger(self.logger, interval=10, clock=self.clock)
+
+    def test_truncate(self):
+        self.assertEqual(truncate("abc", 5), "abc")
+        self.assertEqual(truncate("abcdef", 3), "abc... <3 more chars>")
+        self.assertEqual(str(Truncated(list(range(100)), 10)), "[0, 1, 2, ... <380 more chars>")
+        self.assertEqual(str(LazyJson({'a': 1})), '{"a": 1}')
+
+    def test_deferred_formatting(self):
+        self.logger.debug("payload %s", Unprintable())
+        self.rate_limited.debug('Ethernet0', "payload %s", Unprintable())
+        self.assertEqual(self.handler.messages, [])
+
+    def test_rate_limit_per_key(self):
+        for _ in range(5):
+            self.rate_limited.warning('Ethernet0', "Ignoring interface '%s'", 'Ethernet0')
+            self.rate_limited.warning('Ethernet4', "Ignoring interface '%s'", 'Ethernet4')
+        self.assertEqual(self.handler.messages, ["Ignoring interface 'Ethernet0'",
+                                                 "Ignoring interface 'Ethernet4'"])
+
+        self.clock.now = 10
+        self.rate_limited.warning('Ethernet0', "Ignoring interface '%s'", 'Ethernet0')
+        self.assertEqual(self.handler.messages[-1],
+                         "Ignoring interface 'Ethernet0' (4 similar messages suppressed)")
@@ -0,0 +1,100 @@
+import os
+import sys
+# noinspection PyUnresolvedReferences
+import tests.mock_tables.dbconnector
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase
+import mock
+import lldp_syncd.daemon
+import lldp_syncd.main
+from lldp_syncd.main import parse_daemon_options
+
+
+class TestMain(TestCase):
+    def start(self, **kwargs):
+        """
+        Run main() without starting a daemon.
+        :return: keyword arguments the daemon was built with
+        """
+        with mock.patch.object(lldp_syncd.daemon, 'LldpSyncDaemon') as daemon_class:
+            lldp_syncd.main.main(**kwargs)
+        return daemon_class.call_args[1]
+
+    def test_parse_daemon_options(self):
+        options, remaining = parse_daemon_options(['--port-events', '-d', '10', '--dampening'])
+        self.assertEqual(options, {'port_events': True, 'dampening': True})
+        # left to process_options
+        self.assertEqual(remaining, ['-d', '10'])
+        self.assertEqual(parse_daemon_options([]), ({}, []))
+
+    def test_dampening(self):
+        from lldp_syncd.dampening import NeighborDampener
+        self.assertIsNone(self.start()['dampener'])
+        self.assertIsInstance(self.start(dampening=True)['dampener'], NeighborDampener)
+
+    def test_journal(self):
+        from lldp_syncd.journal import DEFAULT_JOURNAL_SIZE
+        self.assertEqual(self.start()['journal_size'], 0)
+        self.assertEqual(self.start(journal=True)['journal_size'], DEFAULT_JOURNAL_SIZE)
+        self.assertEqual(parse_daemon_options(['--journal']), ({'journal': True}, []))
+
+    def test_neighbor_index(self):
+        self.assertFalse(self.start()['neighbor_index'])
+        self.assertTrue(self.start(neighbor_index=True)['neighbor_index'])
+        self.assertEqual(parse_daemon_options(['--neighbor-index']), ({'neighbor_index': True}, []))
+
+    def test_fields(self):
+        self.assertIsNone(self.start()['fields'])
+        self.assertEqual(self.start(fields=('lldp_rem_port_id',))['fields'], ('lldp_rem_port_id',))
+        options, remaining = parse_daemon_options(['--fields=lldp_rem_port_id,lldp_rem_chassis_id', '-d', '10'])
+        self.assertEqual(options, {'fields': ('lldp_rem_port_id', 'lldp_rem_chassis_id')})
+        self.assertEqual(remaining, ['-d', '10'])
+        # the value is not optional
+        with self.assertRaises(ValueError):
+            parse_daemon_options(['--fields'])
+        with self.assertRaises(ValueError):
+            parse_daemon_options(['--fields='])
+        with self.assertRaisesRegex(ValueError, 'lldp_rem_bogus'):
+            parse_daemon_options(['--fields=lldp_rem_port_id,lldp_rem_bogus'])
+
+    def test_snapshot(self):
+        self.assertIsNone(self.start()['snapshot_path'])
+        self.assertEqual(self.start(snapshot_path='/tmp/lldp.snapshot')['snapshot_path'], '/tmp/lldp.snapshot')
+        self.assertEqual(parse_daemon_options(['--snapshot=/tmp/lldp.snapshot']),
+                         ({'snapshot_path': '/tmp/lldp.snapshot'}, []))
+
+    def test_write_rate(self):
+        from sonic_syncd.scheduler import WriteScheduler
+        self.assertIsNone(self.start()['write_scheduler'])
+        write_scheduler = self.start(write_rate=(500, 10 ** 6))['write_scheduler']
+        self.assertIsInstance(write_scheduler, WriteScheduler)
+        self.assertEqual((write_scheduler.command_bucket.rate, write_scheduler.byte_bucket.rate), (500, 10 ** 6))
+        self.assertEqual(parse_daemon_options(['--write-rate=500,1000000']), ({'write_rate': (500, 10 ** 6)}, []))
+        for value in ('500', '500,1e6,1', 'fast,1e6', '0,1e6'):
+            with self.assertRaises(ValueError):
+                parse_daemon_options(['--write-rate=' + value])
+
+    def test_parse_processes(self):
+        self.assertEqual(self.start()['parse_processes'], 0)
+        self.assertEqual(self.start(parse_processes=4)['parse_processes'], 4)
+        self.assertEqual(parse_daemon_options(['--parse-processes=4']), ({'parse_processes': 4}, []))
+        for value in ('0', 'all'):
+            with self.assertRaises(ValueError):
+                parse_daemon_options(['--parse-processes=' + value])
+
+    def test_table_swap_threshold(self):
+        self.assertEqual(self.start()['table_swap_threshold'], 0)
+        self.assertEqual(self.start(table_swap_threshold=64)['table_swap_threshold'], 64)
+        self.assertEqual(parse_daemon_options(['--table-swap-threshold=64']), ({'table_swap_threshold': 64}, []))
+        with self.assertRaises(ValueError):
+            parse_daemon_options(['--table-swap-threshold=-1'])
+
+    def test_freshness_slo(self):
+        self.assertEqual(self.start()['freshness_slo'], 0)
+        self.assertEqual(self.start(freshness_slo=60)['freshness_slo'], 60)
+        self.assertEqual(parse_daemon_options(['--freshness-slo=7.5']), ({'freshness_slo': 7.5}, []))
+        with self.assertRaises(ValueError):
+            parse_daemon_options(['--freshness-slo=0'])
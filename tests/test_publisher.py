@@ -0,0 +1,136 @@
+import os
+import sys
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase
+
+from sonic_syncd.publisher import BATCH_SCRIPT, BatchedPublisher
+
+
+def batch_script(call, keys, argv):
+    """
+    Python twin of sonic_syncd.publisher.BATCH_SCRIPT.
+    """
+    arg = 0
+    for key in keys:
+        count = int(argv[arg + 1])
+        if argv[arg] == 'replace':
+            call('DEL', key)
+        if count:
+            call('HSET', key, *argv[arg + 2:arg + 2 + 2 * count])
+        arg += 2 + 2 * count
+
+
+class FakeConnector(object):
+    """
+    APPL_DB as a dict, counting every command sent to it.
+    """
+    APPL_DB = 0
+
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+        self.script_runs = 0
+
+    def delete(self, db_id, key):
+        self.commands.append('DEL')
+        self.data.pop(key, None)
+
+    def hmset(self, db_id, key, fvs):
+        self.commands.append('HSET')
+        self.data.setdefault(key, {}).update(fvs)
+
+    def set(self, db_id, key, field, value, blocking=False):
+        self.hmset(db_id, key, {field: value})
+
+    def call(self, command, *args):
+        if command == 'DEL':
+            self.data.pop(args[0], None)
+        elif command == 'HSET':
+            self.data.setdefault(args[0], {}).update(zip(args[1::2], args[2::2]))
+        else:
+            raise RuntimeError("ERR unknown command '{}'".format(command))
+
+    def script_runner(self, db_connector):
+        def run(script, keys, argv):
+            assert script == BATCH_SCRIPT
+            self.commands.append('EVALSHA')
+            self.script_runs += 1
+            batch_script(self.call, keys, argv)
+        return run
+
+
+class TestBatchedPublisher(TestCase):
+    def setUp(self):
+        self.db = FakeConnector()
+        self.db.data['TABLE:Ethernet8'] = {'a': 'old', 'b': 'old'}
+        self.db.data['TABLE:Ethernet12'] = {'a': 'gone'}
+        self.publisher = BatchedPublisher('TABLE', lambda: self.db, script_runner=self.db.script_runner)
+
+    def write_cycle(self):
+        publisher = self.publisher
+        publisher.set('Ethernet0', {'a': '1'})
+        publisher.set_field('Ethernet0', 'b', '2')
+        publisher.delete('Ethernet4')
+        publisher.set('Ethernet4', {'a': '4'})
+        publisher.replace('Ethernet8', {'a': 'new'})
+        publisher.delete('Ethernet12')
+
+    def test_one_round_trip_per_cycle(self):
+        self.write_cycle()
+        # nothing is sent before the flush
+        self.assertEqual(self.db.commands, [])
+        self.publisher.flush()
+        self.assertEqual(self.db.commands, ['EVALSHA'])
+        self.assertEqual(self.db.data, {'TABLE:Ethernet0': {'a': '1', 'b': '2'},
+                                        'TABLE:Ethernet4': {'a': '4'},
+                                        'TABLE:Ethernet8': {'a': 'new'}})
+        # an empty cycle sends nothing
+        self.publisher.flush()
+        self.assertEqual(self.db.script_runs, 1)
+
+    def test_batch_size(self):
+        self.publisher.batch_size = 2
+        self.write_cycle()
+        self.publisher.flush()
+        self.assertEqual(self.db.script_runs, 2)
+        self.assertEqual(sorted(self.db.data), ['TABLE:Ethernet0', 'TABLE:Ethernet4', 'TABLE:Ethernet8'])
+
+    def test_discard(self):
+        self.write_cycle()
+        self.publisher.discard()
+        self.publisher.flush()
+        self.assertEqual(self.db.commands, [])
+
+    def test_script_failure(self):
+        def failing_runner(db_connector):
+            def run(script, keys, argv):
+                raise RuntimeError("ERR unknown command 'EVALSHA'")
+            return run
+
+        self.publisher.script_runner = failing_runner
+        self.write_cycle()
+        # written directly instead, and from then on
+        with self.assertLogs('sonic_syncd', 'ERROR'):
+            self.publisher.flush()
+        self.assertIsNone(self.publisher.script_runner)
+        self.assertEqual(self.db.data, {'TABLE:Ethernet0': {'a': '1', 'b': '2'},
+                                        'TABLE:Ethernet4': {'a': '4'},
+                                        'TABLE:Ethernet8': {'a': 'new'}})
+
+    def test_connection_error(self):
+        def lost_runner(db_connector):
+            def run(script, keys, argv):
+                raise RuntimeError("Unable to connect to redis")
+            return run
+
+        self.publisher.script_runner = lost_runner
+        self.write_cycle()
+        with self.assertRaises(RuntimeError):
+            self.publisher.flush()
+        # the batch is dropped; the owner resyncs after reconnecting
+        self.assertIsNotNone(self.publisher.script_runner)
+        self.publisher.flush()
+        self.assertEqual(self.db.commands, [])
@@ -0,0 +1,67 @@
+import os
+import sys
+# noinspection PyUnresolvedReferences
+import tests.mock_tables.dbconnector
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase
+import io
+import subprocess
+
+from lldp_syncd import replay
+
+INPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'subproc_outputs')
+LLDPCTL_JSON = os.path.join(INPUT_DIR, 'lldpctl.json')
+
+
+class TestReplay(TestCase):
+    def run_replay(self, *args):
+        out = io.StringIO()
+        self.assertEqual(replay.main(list(args), out=out), 0)
+        return out.getvalue()
+
+    def operations(self, output, cycle):
+        """
+        Redis operations printed for a cycle.
+        """
+        block = output.split('cycle {}: '.format(cycle))[1].split('\ncycle ')[0]
+        return [line.strip() for line in block.splitlines() if line.startswith(('  DEL ', '  HSET '))]
+
+    def test_consecutive_cycles(self):
+        output = self.run_replay(LLDPCTL_JSON, LLDPCTL_JSON)
+        first = self.operations(output, 1)
+        self.assertIn('DEL LLDP_LOC_CHASSIS', first)
+        self.assertTrue(any(op.startswith('HSET LLDP_ENTRY_TABLE:Ethernet0 ') for op in first))
+        self.assertEqual(len([op for op in first if op.startswith('HSET LLDP_ENTRY_TABLE:')]), 33)
+        # the second cycle matches the in-memory APPL_DB: nothing to write
+        self.assertEqual(self.operations(output, 2), [])
+        self.assertIn('0 redis operations, 33 interfaces', output)
+        for stage in replay.STAGES:
+            self.assertIn(' {} '.format(stage), output.splitlines()[-1])
+        self.assertIn('peak', output.splitlines()[-1])
+
+    def test_dry_run(self):
+        output = self.run_replay('--dry-run', '--quiet', LLDPCTL_JSON, LLDPCTL_JSON)
+        self.assertNotIn('HSET', output)
+        # nothing was applied: the daemon cache still skips the unchanged second cycle
+        self.assertIn('0 redis operations', output.split('cycle 2: ')[1])
+
+    def test_no_memory(self):
+        output = self.run_replay('--no-memory', '-q', LLDPCTL_JSON, LLDPCTL_JSON)
+        self.assertNotIn('peak', output)
+        self.assertIn('0 redis operations, 33 interfaces', output)
+
+    def test_command_line(self):
+        # dispatched before any SONiC-only import
+        env = dict(os.environ, PYTHONPATH=os.path.join(modules_path, 'src'))
+        output = subprocess.check_output([sys.executable, '-m', 'lldp_syncd', 'replay', '-q', LLDPCTL_JSON],
+                                         env=env)
+        self.assertIn(b'cycle 1: ', output)
+        self.assertIn(b'1 cycles: ', output)
+
+    def test_missing_file(self):
+        out = io.StringIO()
+        self.assertEqual(replay.main([os.path.join(INPUT_DIR, 'missing.json')], out=out), 1)
+        self.assertIn('error:', out.getvalue())
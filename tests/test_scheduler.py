@@ -0,0 +1,127 @@
+import os
+import sys
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase
+
+from sonic_syncd.scheduler import (PRIORITY_CHANGE, PRIORITY_DELETE, PRIORITY_NEW, PRIORITY_TIME_MARK,
+                                   WriteScheduler)
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingPublisher(object):
+    def __init__(self):
+        self.ops = []
+        self.flushes = 0
+
+    def delete(self, key):
+        self.ops.append(('delete', key))
+
+    def replace(self, key, fvs):
+        self.ops.append(('replace', key, fvs))
+
+    def set(self, key, fvs):
+        self.ops.append(('set', key, fvs))
+
+    def set_field(self, key, field, value):
+        self.ops.append(('set_field', key, field, value))
+
+    def flush(self):
+        self.flushes += 1
+
+    def discard(self):
+        pass
+
+
+class TestWriteScheduler(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.publisher = RecordingPublisher()
+        self.applied = []
+
+    def make_scheduler(self, commands_per_second, bytes_per_second=10 ** 6):
+        scheduler = WriteScheduler(commands_per_second, bytes_per_second, clock=self.clock)
+        scheduler.attach(self.publisher, self.applied.append)
+        return scheduler
+
+    def test_priority_order(self):
+        scheduler = self.make_scheduler(100)
+        scheduler.set_field('Ethernet0', 'lldp_rem_time_mark', '5')
+        scheduler.set('Ethernet4', {'a': '1'})
+        scheduler.replace('Ethernet8', {'a': '2'})
+        scheduler.delete('Ethernet12')
+        scheduler.flush()
+        self.assertEqual([op[:2] for op in self.publisher.ops],
+                         [('delete', 'Ethernet12'), ('replace', 'Ethernet8'),
+                          ('set', 'Ethernet4'), ('set_field', 'Ethernet0')])
+        self.assertEqual(self.applied, [{'Ethernet12': PRIORITY_DELETE, 'Ethernet8': PRIORITY_CHANGE,
+                                         'Ethernet4': PRIORITY_NEW, 'Ethernet0': PRIORITY_TIME_MARK}])
+        self.assertEqual(self.publisher.flushes, 1)
+
+    def test_coalescing(self):
+        scheduler = self.make_scheduler(100)
+        scheduler.set('Ethernet0', {'a': '1'})
+        scheduler.set_field('Ethernet0', 'lldp_rem_time_mark', '5')
+        scheduler.delete('Ethernet4')
+        scheduler.set('Ethernet4', {'a': '2'})
+        self.assertEqual(scheduler.backlog, 2)
+        scheduler.flush()
+        self.assertEqual(self.publisher.ops, [('replace', 'Ethernet4', {'a': '2'}),
+                                              ('set', 'Ethernet0', {'a': '1', 'lldp_rem_time_mark': '5'})])
+
+    def test_budget_spreads_burst(self):
+        scheduler = self.make_scheduler(10)
+        for i in range(25):
+            scheduler.set('Ethernet%d' % (i * 4), {'a': str(i)})
+        scheduler.delete('Ethernet400')
+        self.clock.now = 1.0
+        scheduler.flush()
+        # one second worth of commands, deletion first
+        self.assertEqual(len(self.publisher.ops), 10)
+        self.assertEqual(self.publisher.ops[0], ('delete', 'Ethernet400'))
+        self.assertEqual(scheduler.backlog, 16)
+        self.assertEqual(scheduler.backlog_age(), 1.0)
+        self.assertAlmostEqual(scheduler.next_due(), 0.1)
+
+        self.clock.now = 1.5
+        scheduler.flush()
+        self.assertEqual(len(self.publisher.ops), 15)
+        while scheduler.backlog:
+            self.clock.now += scheduler.next_due()
+            scheduler.flush()
+        self.assertEqual(len(self.publisher.ops), 26)
+        self.assertIsNone(scheduler.next_due())
+        self.assertEqual(scheduler.backlog_age(), 0)
+
+    def test_oversized_write_converges(self):
+        scheduler = self.make_scheduler(100, bytes_per_second=10)
+        scheduler.set('Ethernet0', {'lldp_rem_sys_desc': 'x' * 100})
+        scheduler.set('Ethernet4', {'a': '1'})
+        scheduler.flush()
+        # larger than the byte bucket: goes out from a full bucket, leaving it in debt
+        self.assertEqual([op[1] for op in self.publisher.ops], ['Ethernet0'])
+        while scheduler.backlog:
+            self.clock.now += scheduler.next_due()
+            scheduler.flush()
+        self.assertEqual([op[1] for op in self.publisher.ops], ['Ethernet0', 'Ethernet4'])
+        self.assertGreater(self.clock.now, 10)
+
+    def test_discard(self):
+        scheduler = self.make_scheduler(1)
+        scheduler.set('Ethernet0', {'a': '1'})
+        scheduler.set('Ethernet4', {'a': '1'})
+        scheduler.flush()
+        scheduler.discard()
+        self.assertEqual(scheduler.backlog, 0)
+        self.clock.now = 10
+        scheduler.flush()
+        self.assertEqual(len(self.publisher.ops), 1)
@@ -0,0 +1,119 @@
+import os
+import sys
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase
+import subprocess
+import threading
+import time
+
+from sonic_syncd import SonicSyncDaemon
+
+
+class RecordingDaemon(SonicSyncDaemon):
+    """
+    Runs a single cycle with slow connect/source steps and records when each step happened.
+    """
+
+    def __init__(self, delay):
+        super(RecordingDaemon, self).__init__(update_frequency=0.01)
+        self.delay = delay
+        self.events = []
+        self.lock = threading.Lock()
+
+    def _record(self, event):
+        with self.lock:
+            self.events.append(event)
+
+    def connect(self):
+        self._record('connect_start')
+        time.sleep(self.delay)
+        self._record('connect_end')
+
+    def source_update(self):
+        self._record('source_start')
+        time.sleep(self.delay)
+        self._record('source_end')
+        return {}
+
+    def parse_update(self, update_obj):
+        return update_obj
+
+    def sync(self, parsed_update):
+        self._record('sync')
+        self.stop()
+
+
+class EventDaemon(SonicSyncDaemon):
+    """
+    Polls rarely and records the events it is woken up for.
+    """
+
+    def __init__(self):
+        super(EventDaemon, self).__init__(update_frequency=60, event_debounce=0.1)
+        self.updates = 0
+        self.handled = []
+        self.handled_event = threading.Event()
+
+    def source_update(self):
+        self.updates += 1
+        return {}
+
+    def parse_update(self, update_obj):
+        return update_obj
+
+    def sync(self, parsed_update):
+        pass
+
+    def handle_events(self, events):
+        self.handled.append(events)
+        self.handled_event.set()
+
+
+class TestSonicSyncDaemon(TestCase):
+    def test_connect_overlaps_first_source_update(self):
+        daemon = RecordingDaemon(delay=0.2)
+        start = time.time()
+        daemon.start()
+        daemon.join(5)
+        elapsed = time.time() - start
+
+        self.assertEqual(daemon.events[-1], 'sync')
+        self.assertEqual(set(daemon.events[:2]), {'connect_start', 'source_start'})
+        self.assertLess(elapsed, 0.35)
+        # the cycle was accounted for
+        self.assertIsNotNone(daemon.health.last_source_success)
+        self.assertIsNotNone(daemon.health.last_sync_success)
+        self.assertEqual(len(daemon.health.latency.samples), 1)
+
+    def test_lazy_package_import(self):
+        code = ("import sys, lldp_syncd; "
+                "print(','.join(m for m in ('swsscommon', 'lldp_syncd.daemon') if m in sys.modules))")
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.join(modules_path, 'src'),
+                                                            os.environ.get('PYTHONPATH', '')]))
+        output = subprocess.check_output([sys.executable, '-c', code], env=env)
+        self.assertEqual(output.strip(), b'')
+
+    def test_events_wake_run_loop(self):
+        daemon = EventDaemon()
+        daemon.start()
+        self.addCleanup(daemon.join, 5)
+        self.addCleanup(daemon.stop)
+
+        # a burst within the debounce window is handled once, with the latest value per key
+        daemon.notify('Ethernet0', 'down')
+        daemon.notify('Ethernet4', 'down')
+        daemon.notify('Ethernet0', 'up')
+        self.assertTrue(daemon.handled_event.wait(2))
+        self.assertEqual(daemon.handled, [{'Ethernet0': 'up', 'Ethernet4': 'down'}])
+        # events do not trigger a full poll
+        self.assertEqual(daemon.updates, 1)
+
+        # stop() interrupts the wait for the next poll
+        start = time.time()
+        daemon.stop()
+        daemon.join(5)
+        self.assertFalse(daemon.is_alive())
+        self.assertLess(time.time() - start, 1)
@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+
+modules_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(modules_path, 'src'))
+
+from unittest import TestCase
+
+# not needed until the first DB write or history query; see tests/bench_startup.py for timings
+DEFERRED_MODULES = ('socketserver', 'argparse', 'multiprocessing', 'concurrent.futures',
+                    'redis', 'swsscommon', 'sonic_py_common')
+
+STARTUP = """
+import sys
+import lldp_syncd
+import lldp_syncd.main
+lldp_syncd.LldpSyncDaemon(history_size=16)
+print(' '.join(name for name in {!r} if name in sys.modules))
+"""
+
+
+class TestStartup(TestCase):
+    def test_deferred_imports(self):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        output = subprocess.check_output([sys.executable, '-c', STARTUP.format(DEFERRED_MODULES)], env=env)
+        self.assertEqual(output.decode().split(), [])